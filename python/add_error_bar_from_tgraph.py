@@ -7,61 +7,156 @@
 # error. Replace the original file with the modified one (and keep
 # everything else as it is in the input).
 #
+# The graphs are grouped by channel from their names
+# (obs_limit_<ch>, obs_limit_up_<ch>, obs_limit_down_<ch>), looking at
+# the list of keys once per file, and the errors are computed on whole
+# arrays. The up/down graphs must have the same x values as the
+# nominal one. Several files (or glob patterns) can be processed in
+# one go, in parallel with -j. The output is always given with -o, so
+# that a glob matching two files does not overwrite the second one.
+#
+# Example:
+# > add_error_bar_from_tgraph.py input.root -o output.root
+# > add_error_bar_from_tgraph.py -j 4 -o input_formatted/ 'input_from_alberto/1D_*.root'
+#
 # davide.gerbaudo@gmail.com
 # Jun 2015
 
+import argparse
+import collections
+import glob
+import multiprocessing
+import os
 import re
 import sys
+import numpy as np
 import ROOT as R
+import tracing
+from root_arrays import graph_arrays
 R.gROOT.SetBatch(1)
 
+limit_name = re.compile(r'^obs_limit_(?:(up|down)_)?(.+)$') # role (None for the nominal), channel
+
 def main():
-    if len(sys.argv)<2:
-        print "usage: {} input,root output.root".format(sys.argv[0])
-        return
+    parser = argparse.ArgumentParser(description='attach the up/down limit graphs as errors of the nominal one')
+    parser.add_argument('inputs', nargs='+', help='input root files or glob patterns')
+    parser.add_argument('-o', '--output', required=True, help='output file (one input) or directory (several inputs)')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of files processed in parallel')
+    args = parser.parse_args()
+    output = args.output
+    try:
+        input_filenames = expand_inputs(args.inputs)
+    except IOError as e:
+        parser.error(str(e))
+    if len(input_filenames)==1 and not os.path.isdir(output):
+        jobs = [(input_filenames[0], output)]
+    elif os.path.exists(output) and not os.path.isdir(output):
+        parser.error("several inputs need -o output_directory")
+    else:
+        jobs = [(f, os.path.join(output, os.path.basename(f))) for f in input_filenames]
+    replaced = [i for i, o in jobs if os.path.abspath(i)==os.path.abspath(o)]
+    if replaced:
+        parser.error("the output would replace the input %s" % ', '.join(replaced))
+    if len(jobs)>1 and not os.path.exists(output) : os.makedirs(output)
+    errors = run_jobs(jobs, args.jobs)
+    if errors:
+        sys.exit('\n'.join(errors))
+
+def expand_inputs(patterns):
+    filenames = []
+    for p in patterns:
+        matches = sorted(glob.glob(p))
+        if not matches:
+            raise IOError("no input file matching %s" % p)
+        filenames.extend(m for m in matches if m not in filenames)
+    return filenames
+
+def _add_error_bars_job(args):
+    input_filename, output_filename = args
+    try:
+        add_error_bars(input_filename, output_filename)
+    except (IOError, ValueError) as e:
+        return "%s: %s" % (input_filename, e)
 
-    input_filename  = sys.argv[1]
-    output_filename = sys.argv[2]
+def run_jobs(jobs, processes=1):
+    """process (input, output) pairs; return the list of errors"""
+    if processes>1 and len(jobs)>1:
+        pool = multiprocessing.Pool(min(processes, len(jobs)))
+        errors = pool.map(_add_error_bars_job, jobs)
+        pool.close()
+        pool.join()
+    else:
+        errors = map(_add_error_bars_job, jobs)
+    return [e for e in errors if e]
 
+def index_limit_graphs(keys):
+    """{channel : {None/'up'/'down' : key name}} from the key names (highest cycle only)"""
+    index = collections.defaultdict(dict)
+    for name in keys:
+        m = limit_name.match(name)
+        if m:
+            role, channel = m.groups()
+            index[channel].setdefault(role, name)
+    return index
+
+def graph_with_errors(nominal, up, down):
+    """TGraphAsymmErrors with the nominal points and |up-nominal|, |down-nominal| as y errors"""
+    x, y = [np.array(a) for a in graph_arrays(nominal)[:2]]
+    for g in [up, down]:
+        gx = graph_arrays(g)[0]
+        if len(gx)!=len(x) or not np.array_equal(gx, x):
+            raise ValueError("x values of %s (%d points) differ from those of %s (%d points)"
+                             % (g.GetName(), len(gx), nominal.GetName(), len(x)))
+    y_up, y_do = graph_arrays(up)[1], graph_arrays(down)[1]
+    if tracing.verbose():
+        for xi, yi, u, d in zip(x, y, y_up-y, y_do-y):
+            tracing.debug("x: %.2f y: %.2f + %.2f - %.2f" % (xi, yi, u, d))
+    zeros = np.zeros(len(x))
+    gr = R.TGraphAsymmErrors(len(x), x, y, zeros, zeros,
+                             np.ascontiguousarray(np.abs(y_do-y)), np.ascontiguousarray(np.abs(y_up-y)))
+    gr.SetName(nominal.GetName())
+    gr.SetTitle(nominal.GetTitle())
+    return gr
+
+def add_error_bars(input_filename, output_filename):
     input_file = R.TFile.Open(input_filename)
+    if not input_file or input_file.IsZombie():
+        raise IOError("cannot open %s" % input_filename)
+    keys = collections.OrderedDict()
+    for key in input_file.GetListOfKeys():
+        keys.setdefault(key.GetName(), key) # the highest cycle comes first
+    index = index_limit_graphs(keys.keys())
     output_file = R.TFile.Open(output_filename, 'recreate')
     output_file.cd()
+    with tracing.span('add_error_bar', figure=os.path.basename(output_filename), input=input_filename) as s:
+        try:
+            write_objects(input_filename, keys, index, s)
+        finally:
+            output_file.Close()
+            input_file.Close()
+        s.add(bytes=os.path.getsize(output_filename))
 
-    input_file.ls()
-    channels = ['bb', 'gg', 'ss', 'combi']
-    for key in input_file.GetListOfKeys():
-        keyname = key.GetName()
-        obj = input_file.Get(keyname)
-        name = obj.GetName()
-        title = obj.GetTitle()
-        to_be_zipped = name.startswith('obs_limit_')
-        is_nominal = to_be_zipped and ('up' not in name) and ('down' not in name)
-        if not to_be_zipped:
-            obj.Write()
-        elif is_nominal:
-            gr_cen = obj
-            gr_cen_err = R.TGraphAsymmErrors(gr_cen.GetN())
-            gr_cen_err.SetName(gr_cen.GetName())
-            gr_cen_err.SetTitle(gr_cen.GetTitle())
-            gr_up_name = name.replace('_limit', '_limit_up')
-            gr_do_name = name.replace('_limit', '_limit_down')
-            gr_up = input_file.Get(gr_up_name)
-            gr_do = input_file.Get(gr_do_name)
-            if not gr_up or not gr_do:
-                print "gr missing : %s"%(gr_do_name if not gr_do else gr_up_name)
-                gr_cen.Write()
-                continue
-            for i in range(gr_cen.GetN()):
-                x = gr_cen.GetX()[i]
-                y = gr_cen.GetY()[i]
-                print "x: %.2f y: %.2f + %.2f - %.2f"%(x, y, gr_up.GetY()[i]-y, gr_do.GetY()[i]-y)
-                gr_cen_err.SetPoint(i, x, y)
-                gr_cen_err.SetPointError(i, 0.0, 0.0, abs(gr_do.GetY()[i]-y), abs(gr_up.GetY()[i]-y))
-            gr_cen_err.Write()
-                
-    output_file.Close()
-    output_file.Delete()
-    input_file.Close()
+def write_objects(input_filename, keys, index, span):
+    """write every object, with the up/down graphs attached to the nominal ones"""
+    for name, key in keys.iteritems():
+        m = limit_name.match(name)
+        if not m:
+            key.ReadObj().Write()
+            continue
+        role, channel = m.groups()
+        if role is not None:
+            continue # attached to the nominal one
+        names = index[channel]
+        gr_cen = key.ReadObj()
+        if 'up' not in names or 'down' not in names:
+            tracing.warning("%s: gr missing : obs_limit_%s_%s" % (input_filename, 'down' if 'down' not in names else 'up', channel),
+                            channel=channel)
+            gr_cen.Write()
+            continue
+        gr = graph_with_errors(gr_cen, keys[names['up']].ReadObj(), keys[names['down']].ReadObj())
+        gr.Write()
+        span.add(objects=1, points=gr.GetN())
+        tracing.info("%s: %s, %d points" % (input_filename, channel, gr.GetN()), channel=channel)
 
 if __name__=='__main__':
     main()
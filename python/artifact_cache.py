@@ -0,0 +1,217 @@
+#!/bin/env python
+
+# Content-addressed cache of the files produced by the pipeline steps
+#
+# The key of a step is a hash of its command and of the content of its
+# inputs (the input root files, the scripts that do the work, the
+# counts table that lives in its script, ...). After a step succeeds
+# its outputs are copied into the cache under that key; when the same
+# key comes up again the outputs are copied back and the step (and its
+# ROOT work) is skipped. Editing one figure thus only reruns what
+# depends on it, and rebuilding with no changes only copies files.
+#
+# The cache is bounded in size: the least recently used entries are
+# dropped first. The hashes of the input files are remembered by
+# (size, mtime) so that unchanged files are not read again.
+#
+# Example:
+# > artifact_cache.py stats
+# > artifact_cache.py invalidate 'figure_6_*'    # by step name
+# > artifact_cache.py evict --max-size 500M
+# > artifact_cache.py clear
+# The cache is in $ARTIFACT_CACHE_DIR (default .artifact_cache).
+#
+# Oct 2026
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+version = 1 # change to invalidate all the entries
+default_dir = os.environ.get('ARTIFACT_CACHE_DIR', '.artifact_cache')
+default_max_size = 2*1024**3
+
+def main():
+    parser = argparse.ArgumentParser(description='inspect and clean the artifact cache')
+    parser.add_argument('action', choices=['stats', 'clear', 'evict', 'invalidate'])
+    parser.add_argument('names', nargs='*', help='for invalidate: step names (glob patterns)')
+    parser.add_argument('-d', '--dir', default=default_dir, help='cache directory')
+    parser.add_argument('--max-size', default=str(default_max_size), help='for evict: size in bytes (suffix K, M, G)')
+    args = parser.parse_args()
+    cache = ArtifactCache(args.dir)
+    if args.action=='stats':
+        entries = cache.entries()
+        print "%s: %d entries, %.1f MB" % (cache.directory, len(entries), sum(e['size'] for e in entries)/1024.**2)
+        for e in sorted(entries, key=lambda e: e['name']):
+            print "  %-28s %s %8d B  %s" % (e['name'], e['key'][:12], e['size'], time.ctime(e['used']))
+    elif args.action=='clear':
+        cache.clear()
+    elif args.action=='evict':
+        removed = cache.evict(parse_size(args.max_size))
+        print "removed %d entries" % len(removed)
+    elif args.action=='invalidate':
+        removed = cache.invalidate(args.names or ['*'])
+        print "removed %d entries" % len(removed)
+
+def parse_size(size):
+    units = {'K': 1024, 'M': 1024**2, 'G': 1024**3}
+    size = size.strip().upper()
+    if size and size[-1] in units:
+        return int(float(size[:-1])*units[size[-1]])
+    return int(size)
+
+def expand(paths):
+    """files in paths (directories are walked); sorted, so that the order does not matter"""
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            for dirpath, dirnames, filenames in os.walk(p):
+                dirnames.sort()
+                files.extend(os.path.join(dirpath, f) for f in sorted(filenames))
+        else:
+            files.append(p)
+    return sorted(set(os.path.normpath(f) for f in files))
+
+def file_hash(filename, block_size=1<<20):
+    h = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+class ArtifactCache(object):
+    def __init__(self, directory=default_dir):
+        self.directory = directory
+        self._hashes_filename = os.path.join(directory, 'file_hashes.json')
+        self._hashes = None
+    def _entry_dir(self, key):
+        return os.path.join(self.directory, key[:2], key)
+    # keys
+    def input_hash(self, filename):
+        """content hash of a file, reused while its size and mtime do not change"""
+        if self._hashes is None:
+            self._hashes = {}
+            if os.path.exists(self._hashes_filename):
+                with open(self._hashes_filename) as f:
+                    self._hashes = json.load(f)
+        st = os.stat(filename)
+        path = os.path.abspath(filename)
+        cached = self._hashes.get(path)
+        if cached and cached[0]==st.st_size and cached[1]==st.st_mtime:
+            return cached[2]
+        h = file_hash(filename)
+        self._hashes[path] = [st.st_size, st.st_mtime, h]
+        return h
+    def save_hashes(self):
+        if self._hashes is None:
+            return
+        if not os.path.exists(self.directory) : os.makedirs(self.directory)
+        tmp = self._hashes_filename + '.%d.tmp' % os.getpid()
+        with open(tmp, 'w') as f:
+            json.dump(self._hashes, f)
+        os.rename(tmp, self._hashes_filename)
+    def key(self, command, inputs, parameters=None, root=None):
+        """hash of the command, of the parameters and of the content of the inputs;
+        None if an input is missing (the step cannot be cached). With root, the relative
+        inputs are under root and named relative to it, so that the same step run in
+        another directory (e.g. for another analysis, see run_batch.py) has the same key."""
+        files = expand([os.path.join(root, p) for p in inputs] if root else inputs)
+        if not files or not all(os.path.isfile(f) for f in files):
+            return None
+        prefix = os.path.join(os.path.normpath(root), '') if root else None
+        h = hashlib.sha1()
+        h.update(json.dumps([version, list(command), parameters], sort_keys=True))
+        for f in files:
+            name = f[len(prefix):] if prefix and f.startswith(prefix) else f
+            h.update('\0%s\0%s' % (name, self.input_hash(f)))
+        return h.hexdigest()
+    # entries
+    def restore(self, key, outputs):
+        """copy the stored outputs back in place; False if there is no entry"""
+        entry = self._entry_dir(key)
+        meta_filename = os.path.join(entry, 'meta.json')
+        if not os.path.exists(meta_filename):
+            return False
+        with open(meta_filename) as f:
+            meta = json.load(f)
+        if sorted(meta['outputs'])!=sorted(outputs):
+            return False
+        for f in meta['files']:
+            destination_dir = os.path.dirname(f)
+            if destination_dir and not os.path.exists(destination_dir) : os.makedirs(destination_dir)
+            tmp = f + '.%d.tmp' % os.getpid()
+            shutil.copy2(os.path.join(entry, 'files', f.lstrip(os.sep)), tmp)
+            os.rename(tmp, f)
+        meta['used'] = time.time()
+        self._write_meta(entry, meta)
+        return True
+    def store(self, key, name, outputs):
+        """copy the outputs (files or directories) into the cache; False if one is missing"""
+        if not all(os.path.exists(o) for o in outputs):
+            return False
+        files = expand(outputs)
+        entry = self._entry_dir(key)
+        parent = os.path.dirname(entry)
+        if not os.path.exists(parent) : os.makedirs(parent)
+        tmp = tempfile.mkdtemp(dir=parent)
+        for f in files:
+            destination = os.path.join(tmp, 'files', f.lstrip(os.sep))
+            if not os.path.exists(os.path.dirname(destination)) : os.makedirs(os.path.dirname(destination))
+            shutil.copy2(f, destination)
+        meta = {'key': key, 'name': name, 'outputs': list(outputs), 'files': files,
+                'size': sum(os.path.getsize(f) for f in files), 'used': time.time()}
+        self._write_meta(tmp, meta)
+        if os.path.exists(entry):
+            shutil.rmtree(entry) # same key, same content: the newest copy wins
+        os.rename(tmp, entry)
+        return True
+    def _write_meta(self, entry, meta):
+        tmp = os.path.join(entry, 'meta.json.%d.tmp' % os.getpid())
+        with open(tmp, 'w') as f:
+            json.dump(meta, f, indent=1)
+        os.rename(tmp, os.path.join(entry, 'meta.json'))
+    def entries(self):
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for prefix in sorted(os.listdir(self.directory)):
+            prefix_dir = os.path.join(self.directory, prefix)
+            if len(prefix)!=2 or not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                meta_filename = os.path.join(prefix_dir, key, 'meta.json')
+                if os.path.exists(meta_filename):
+                    with open(meta_filename) as f:
+                        entries.append(json.load(f))
+        return entries
+    def remove(self, key):
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+    def evict(self, max_size=default_max_size):
+        """drop the least recently used entries until the total size is below max_size"""
+        entries = sorted(self.entries(), key=lambda e: e['used'])
+        total = sum(e['size'] for e in entries)
+        removed = []
+        while entries and total>max_size:
+            e = entries.pop(0)
+            self.remove(e['key'])
+            total -= e['size']
+            removed.append(e['name'])
+        return removed
+    def invalidate(self, patterns):
+        """drop the entries of the steps whose name matches one of the patterns"""
+        removed = []
+        for e in self.entries():
+            if any(fnmatch.fnmatchcase(e['name'], p) for p in patterns):
+                self.remove(e['key'])
+                removed.append(e['name'])
+        return removed
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,482 @@
+#!/bin/env python
+
+# Time the pipeline stages on synthetic inputs much larger than the real ones
+#
+# For each stage the inputs are generated with the same structure as
+# the real ones (canvases with a 'canvas_1' pad holding the bkg/sig/dat
+# primitives and some unrelated ones, 'c1' canvases of 'Graph'
+# objects, obs_limit_* nominal/up/down triplets, a large signal grid,
+# hepdata text files), scaled by the number of points per object, the
+# number of primitives (or channels) per file and the number of
+# figures. Each measurement runs in its own process, so that the peak
+# RSS is the one of that stage only; the time does not include the
+# python/ROOT startup (which is reported separately as 'wall').
+#
+# The results are written as json; --compare prints the ratio to a
+# previous result file.
+#
+# Example:
+# > benchmark.py -o bench.json
+# > benchmark.py --stages format_input hepdata_writer --points 1000 1000000 --figures 1 10
+# > benchmark.py -o new.json --compare bench.json
+#
+# Oct 2026
+
+import argparse
+import collections
+import itertools
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import interpolation
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+Scale = collections.namedtuple('Scale', ['points', 'primitives', 'figures'])
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmark the pipeline stages on synthetic inputs')
+    parser.add_argument('--stages', nargs='+', default=list(stages.keys()), choices=list(stages.keys()))
+    parser.add_argument('--points', nargs='+', type=int, default=[1000, 100000], help='points per object')
+    parser.add_argument('--primitives', nargs='+', type=int, default=[10], help='primitives (or channels) per file')
+    parser.add_argument('--figures', nargs='+', type=int, default=[1], help='number of figures (files)')
+    parser.add_argument('-r', '--repeat', type=int, default=1, help='repetitions of each measurement (the fastest is kept)')
+    parser.add_argument('-o', '--output', help='json file for the results')
+    parser.add_argument('--compare', help='json file with previous results')
+    parser.add_argument('--workdir', help='where the inputs are generated (default: a temporary directory)')
+    parser.add_argument('--keep', action='store_true', help='do not remove the generated inputs')
+    # used internally, to run one step in a separate process
+    parser.add_argument('--generate', help=argparse.SUPPRESS)
+    parser.add_argument('--run', help=argparse.SUPPRESS)
+    parser.add_argument('--scale', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.generate or args.run:
+        scale = Scale(*json.loads(args.scale))
+        stage = args.generate or args.run
+        generate, run = stages[stage]
+        if args.generate:
+            generate(args.workdir, scale)
+        else:
+            start = time.time()
+            items = run(args.workdir, scale)
+            print json.dumps({'time': time.time()-start, 'items': items})
+        return
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='hepdata_bench_')
+    scales = [Scale(*s) for s in itertools.product(args.points, args.primitives, args.figures)]
+    results = []
+    try:
+        for stage in args.stages:
+            for scale in scales:
+                try:
+                    result = measure(stage, scale, workdir, repeat=args.repeat)
+                except RuntimeError as e:
+                    result = {'stage': stage, 'scale': scale._asdict(), 'error': str(e)}
+                results.append(result)
+                print format_result(result)
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    report = {'meta': metadata(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+def run_child(arguments):
+    """run this script in a new process; return (stdout, wall time, peak rss in kB)"""
+    start = time.time()
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__)] + arguments, stdout=subprocess.PIPE)
+    output = proc.stdout.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.stdout.close()
+    proc.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -1
+    if proc.returncode!=0:
+        raise RuntimeError("%s failed:\n%s" % (' '.join(arguments), output))
+    return output, time.time()-start, usage.ru_maxrss # kB on linux
+
+def measure(stage, scale, workdir, repeat=1):
+    stage_dir = os.path.join(workdir, '%s_%d_%d_%d' % ((stage,)+tuple(scale)))
+    if os.path.exists(stage_dir) : shutil.rmtree(stage_dir)
+    os.makedirs(stage_dir)
+    common = ['--workdir', stage_dir, '--scale', json.dumps(list(scale))]
+    run_child(['--generate', stage] + common)
+    best = None
+    for i in range(repeat):
+        output, wall, rss = run_child(['--run', stage] + common)
+        timing = json.loads(output.strip().splitlines()[-1])
+        if best is None or timing['time']<best['time']:
+            best = dict(timing, wall=wall, peak_rss_kb=rss)
+    return {'stage': stage, 'scale': scale._asdict(), 'time': best['time'], 'wall': best['wall'],
+            'items': best['items'], 'throughput': best['items']/best['time'] if best['time']>0 else None,
+            'peak_rss_kb': best['peak_rss_kb']}
+
+def format_result(r):
+    s = r['scale']
+    if 'error' in r:
+        return "%-20s points=%-8d primitives=%-4d figures=%-4d FAILED\n%s" % (r['stage'], s['points'], s['primitives'], s['figures'], r['error'])
+    return ("%-20s points=%-8d primitives=%-4d figures=%-4d time %8.3fs wall %8.3fs rss %8.1f MB %12.0f items/s"
+            % (r['stage'], s['points'], s['primitives'], s['figures'], r['time'], r['wall'],
+               r['peak_rss_kb']/1024., r['throughput'] or 0))
+
+def metadata():
+    try:
+        revision = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=here, stderr=open(os.devnull, 'w')).strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'host': socket.gethostname(),
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'cpus': os.sysconf('SC_NPROCESSORS_ONLN'), 'revision': revision}
+
+def compare(previous, current):
+    def key(r):
+        return (r['stage'],) + tuple(sorted(r['scale'].items()))
+    reference = dict((key(r), r) for r in previous['results'] if 'error' not in r)
+    print "ratio to %s (%s)" % (previous['meta'].get('revision'), previous['meta'].get('date'))
+    for r in current['results']:
+        p = reference.get(key(r))
+        if p is None or 'error' in r:
+            continue
+        print "%-20s %-40s time x%.2f  rss x%.2f" % (r['stage'], ' '.join('%s=%s' % kv for kv in sorted(r['scale'].items())),
+                                                     r['time']/p['time'] if p['time'] else float('nan'),
+                                                     float(r['peak_rss_kb'])/p['peak_rss_kb'] if p['peak_rss_kb'] else float('nan'))
+
+#___________________________________________________________
+# synthetic inputs; each stage is (generate, run), run returns the number of items processed
+
+def random_values(n, seed=0):
+    return np.random.RandomState(seed).exponential(100.0, n)
+
+def figure_files(workdir, prefix, scale):
+    return [os.path.join(workdir, '%s_%d.root' % (prefix, f)) for f in range(scale.figures)]
+
+def fill_histogram(h, values):
+    h.FillN(len(values), np.ascontiguousarray(np.arange(len(values))+0.5), np.ascontiguousarray(values))
+
+def generate_format_input(workdir, scale):
+    import ROOT as r
+    r.gROOT.SetBatch(True)
+    n = scale.points
+    for f, filename in enumerate(figure_files(workdir, 'canvas', scale)):
+        output_file = r.TFile.Open(filename, 'recreate')
+        canvas = r.TCanvas('canvas', '', 800, 600)
+        pad = r.TPad('canvas_1', '', 0.0, 0.0, 1.0, 1.0)
+        pad.Draw()
+        pad.cd()
+        objects = []
+        bkg = r.TH1F('h_bkg_%d' % f, '', n, 0.0, n)
+        fill_histogram(bkg, random_values(n, f))
+        bkg.SetFillStyle(3004)
+        sig = r.TH1F('h_sig_%d' % f, '', n, 0.0, n)
+        fill_histogram(sig, random_values(n, f+1))
+        sig.SetLineColor(616)
+        sig.SetLineStyle(2)
+        y = random_values(n, f+2)
+        y[::7] = -10 # empty bins, see clean_data_graph
+        zeros = np.zeros(n)
+        dat = r.TGraphAsymmErrors(n, np.ascontiguousarray(np.arange(n)+0.5), y, zeros, zeros, np.sqrt(np.abs(y)), np.sqrt(np.abs(y)))
+        dat.SetLineColor(1)
+        dat.SetLineStyle(1)
+        objects.extend([bkg, sig, dat])
+        for i in range(scale.primitives):
+            other = r.TH1F('h_other_%d_%d' % (f, i), '', n, 0.0, n)
+            fill_histogram(other, random_values(n, 100+i))
+            other.SetLineColor(2+i%50)
+            objects.append(other)
+        for o in objects:
+            o.Draw('same' if o is not bkg else '')
+        canvas.cd()
+        canvas.Write()
+        output_file.Close()
+
+def run_format_input(workdir, scale):
+    import ROOT as r
+    import format_input
+    for filename in figure_files(workdir, 'canvas', scale):
+        input_file = r.TFile.Open(filename)
+        output_file = r.TFile.Open(filename.replace('.root', '_formatted.root'), 'recreate')
+        format_input.move_everything_from_canvas_to_base(input_file, output_file)
+        input_file.Close()
+    return scale.figures*(3+scale.primitives)*scale.points
+
+def generate_rename_tgraphs(workdir, scale):
+    import ROOT as r
+    r.gROOT.SetBatch(True)
+    for filename in figure_files(workdir, 'c1', scale):
+        output_file = r.TFile.Open(filename, 'recreate')
+        canvas = r.TCanvas('c1', '', 800, 600)
+        graphs = []
+        for i in range(scale.primitives):
+            g = r.TGraph(scale.points, np.ascontiguousarray(np.arange(scale.points, dtype=np.float64)), random_values(scale.points, i))
+            g.SetName('Graph')
+            g.SetTitle('limit_%d' % i)
+            g.Draw('l' if graphs else 'al')
+            graphs.append(g)
+        canvas.Write()
+        output_file.Close()
+
+def run_rename_tgraphs(workdir, scale):
+    import rename_tgraphs
+    for filename in figure_files(workdir, 'c1', scale):
+        rename_tgraphs.rename_tgraphs(filename, filename.replace('.root', '_renamed.root'))
+    return scale.figures*scale.primitives*scale.points
+
+def generate_add_error_bar(workdir, scale):
+    import ROOT as r
+    r.gROOT.SetBatch(True)
+    x = np.ascontiguousarray(np.linspace(100.0, 500.0, scale.points))
+    for filename in figure_files(workdir, 'limits', scale):
+        output_file = r.TFile.Open(filename, 'recreate')
+        for i in range(scale.primitives):
+            y = random_values(scale.points, i)
+            for name, values in [('obs_limit_ch%d' % i, y), ('obs_limit_up_ch%d' % i, 1.2*y), ('obs_limit_down_ch%d' % i, 0.8*y),
+                                 ('exp_limit_ch%d' % i, 1.1*y)]:
+                g = r.TGraph(scale.points, x, np.ascontiguousarray(values))
+                g.SetName(name)
+                g.Write()
+        output_file.Close()
+
+def run_add_error_bar(workdir, scale):
+    import add_error_bar_from_tgraph
+    for filename in figure_files(workdir, 'limits', scale):
+        add_error_bar_from_tgraph.add_error_bars(filename, filename.replace('.root', '_errors.root'))
+    return scale.figures*scale.primitives*scale.points
+
+def synthetic_counts(n_points, regions):
+    """rows like the ones of the counts table in plot_acceptance_efficiency_TGraph2D.py"""
+    side = int(np.ceil(np.sqrt(n_points)))
+    rnd = np.random.RandomState(0)
+    counts = []
+    for i in range(n_points):
+        mc1, mn1 = 130.0+2.5*(i%side), 2.5*(i//side)
+        n_fiducial = rnd.poisson(300, len(regions)).astype(float)+1
+        n_reco = np.floor(n_fiducial*rnd.uniform(0.3, 0.9, len(regions)))
+        counts.append((170000+i, mc1, mn1, 0.5, 0.30636, 0.17, 50000,
+                       dict((r, (f, e)) for r, f, e in zip(regions, n_fiducial.tolist(), n_reco.tolist()))))
+    return counts
+
+def generate_acceptance(workdir, scale):
+    import cPickle
+    regions = ['sr1jee', 'sr1jmm', 'sr1jem', 'sr2jee', 'sr2jmm', 'sr2jem']
+    with open(os.path.join(workdir, 'counts.pkl'), 'wb') as f:
+        cPickle.dump(synthetic_counts(scale.points, regions), f, cPickle.HIGHEST_PROTOCOL)
+
+def run_acceptance(workdir, scale):
+    """everything but the drawing: table, acc/eff, one TGraph2D file per region and quantity"""
+    import cPickle
+    import ROOT as r
+    import plot_acceptance_efficiency_TGraph2D as pae
+    with open(os.path.join(workdir, 'counts.pkl'), 'rb') as f:
+        counts = cPickle.load(f)
+    table = pae.counts_to_array(counts)
+    acceptance, efficiency = pae.acceptance_efficiency(table)
+    mc1, mn1 = pae.column(table['mc1']), pae.column(table['mn1'])
+    for iRegion, selection in enumerate(pae.regions):
+        for quantity, values in [('acceptance', acceptance), ('efficiency', efficiency)]:
+            g = r.TGraph2D(len(table), mc1, mn1, pae.column(values[:, iRegion]))
+            g.SetName(quantity+'_'+selection)
+            out_file = r.TFile.Open(os.path.join(workdir, g.GetName()+'.root'), 'recreate')
+            g.Write()
+            out_file.Close()
+    return len(table)*len(pae.regions)
+
+def run_acceptance_render(workdir, scale):
+    """draw one acceptance canvas (with one label per point)"""
+    import cPickle
+    import plot_acceptance_efficiency_TGraph2D as pae
+    with open(os.path.join(workdir, 'counts.pkl'), 'rb') as f:
+        counts = cPickle.load(f)
+    table = pae.counts_to_array(counts)
+    acceptance, efficiency = pae.acceptance_efficiency(table)
+    mc1, mn1 = pae.column(table['mc1']), pae.column(table['mn1'])
+    values = pae.column(acceptance[:, 0])*1.0e4
+    mc1Range, mn1Range = {'min': mc1.min(), 'max': mc1.max()}, {'min': mn1.min(), 'max': mn1.max()}
+    grid = interpolation.Grid(pae.n_bins, mc1Range['min'], mc1Range['max'], pae.n_bins, mn1Range['min'], mn1Range['max'])
+    pae.output_dir = workdir
+    pae.setAtlasStyle()
+    pae.render_canvas(dict({'name': 'c_h_acceptance_sr1jee', 'quantity': 'acceptance', 'selection': 'sr1jee',
+                            'mc1': mc1, 'mn1': mn1, 'values': values,
+                            'labels': [str(round(v, 1)) for v in values.tolist()],
+                            'mc1Range': mc1Range, 'mn1Range': mn1Range},
+                           **pae.interpolated_map(interpolation.Interpolator(mc1, mn1), values, grid)),
+                      ['png'])
+    return len(table)
+
+def run_acceptance_maps(workdir, scale):
+    """interpolated maps (triangulation, bins located once) for all the regions and both quantities"""
+    import cPickle
+    with open(os.path.join(workdir, 'counts.pkl'), 'rb') as f:
+        counts = cPickle.load(f)
+    mc1 = np.array([c[1] for c in counts])
+    mn1 = np.array([c[2] for c in counts])
+    values = np.array([[v[0] for k, v in sorted(c[7].items())] for c in counts])
+    interpolator = interpolation.Interpolator(mc1, mn1)
+    grid = interpolation.Grid(100, mc1.min(), mc1.max(), 100, mn1.min(), mn1.max())
+    for quantity in range(2):
+        for iRegion in range(values.shape[1]):
+            interpolator.sparse(values[:, iRegion], grid)
+    return len(counts)*values.shape[1]*2
+
+def mass_grid_files(workdir, scale):
+    return [os.path.join(workdir, 'grid_%d.txt' % f) for f in range(scale.primitives)]
+
+def generate_mass_grid(workdir, scale):
+    """grids in the format of xsecs.txt: a scan of the triangle mn1 < mc1-80, shifted from one grid to the other"""
+    side = int(np.ceil(np.sqrt(2*scale.points)))
+    mc1, mn1 = [a.ravel() for a in np.meshgrid(130.0+2.5*np.arange(side), 2.5*np.arange(side))]
+    for f, filename in enumerate(mass_grid_files(workdir, scale)):
+        x, y = mc1+0.5*f, mn1+0.25*f
+        keep = np.flatnonzero(y<x-80.0)[:scale.points]
+        with open(filename, 'w') as output_file:
+            np.savetxt(output_file, np.column_stack([x[keep], y[keep], random_values(len(keep), f)]),
+                       fmt='%.2f', delimiter='; ')
+
+def run_mass_grid(workdir, scale):
+    """read the grids, join all of them to the first one, exactly and with the nearest points"""
+    import mass_grid
+    grids = [mass_grid.read(f) for f in mass_grid_files(workdir, scale)]
+    for grid in grids[1:]:
+        mass_grid.join(grids[0], grid, how='exact')
+        mass_grid.join(grids[0], grid, how='nearest')
+    return sum(len(g.x) for g in grids)
+
+def generate_contours(workdir, scale):
+    """a wiggly closed contour of 'points' vertices, cut in 'primitives' pieces, and as many mass points"""
+    t = np.linspace(0.0, 2*np.pi, scale.points)
+    radius = 1.0 + 0.1*np.sin(40*t)
+    x, y = 300.0 + 150.0*radius*np.cos(t), 120.0 + 100.0*radius*np.sin(t)
+    x[-1], y[-1] = x[0], y[0]
+    cuts = np.linspace(0, len(t)-1, scale.primitives+1).astype(np.int64)
+    pieces = dict(('piece_%d' % i, np.vstack([x[a:b+1], y[a:b+1]])) for i, (a, b) in enumerate(zip(cuts[:-1], cuts[1:])))
+    rng = np.random.RandomState(1)
+    np.savez(os.path.join(workdir, 'contours.npz'), mc1=rng.uniform(100.0, 500.0, scale.points),
+             mn1=rng.uniform(0.0, 250.0, scale.points), **pieces)
+
+def run_contours(workdir, scale):
+    """stitch the pieces, simplify the contour and tell which mass points are inside"""
+    import contours
+    inputs = np.load(os.path.join(workdir, 'contours.npz'))
+    pieces = [tuple(inputs['piece_%d' % i]) for i in range(scale.primitives)]
+    x, y = contours.merge(pieces[::-1])
+    contours.simplify(x, y, 0.5)
+    contours.Region([(x, y)]).contains(inputs['mc1'], inputs['mn1'])
+    return len(x) + len(inputs['mc1'])
+
+def generate_hepdata_writer(workdir, scale):
+    import ROOT as r
+    r.gROOT.SetBatch(True)
+    n = scale.points
+    x = np.ascontiguousarray(np.arange(n)+0.5)
+    for f, filename in enumerate(figure_files(workdir, 'objects', scale)):
+        output_file = r.TFile.Open(filename, 'recreate')
+        for name, seed in [('sig', 0), ('dat', 1), ('bkg', 2)]:
+            y = random_values(n, seed+f)
+            e = np.sqrt(y)
+            g = r.TGraphAsymmErrors(n, x, y, np.full(n, 0.5), np.full(n, 0.5), e, 1.1*e)
+            g.SetName(name)
+            g.Write()
+        output_file.Close()
+
+def run_hepdata_writer(workdir, scale):
+    import hepdata_writer
+    for filename in figure_files(workdir, 'objects', scale):
+        hepdata_writer.convert([filename], filename.replace('.root', ''), y=['sig', 'dat', 'bkg'])
+    return scale.figures*3*scale.points
+
+placeholders = [
+    ('*location: Figure GIVE FIGURE NUMBER', '*location: Figure %d'),
+    ('*reackey: P P --> GIVE THE PRODUCTION PROCESSES', '*reackey: P P --> CHARGINO1 NEUTRALINO2 X'),
+    ('*obskey: GIVE KEY FOR Y-AXIS VARIABLE', '*obskey: N'),
+    ('*qual: . : GIVE COLUMN EXPLANATIONS, IF YOU USED OVERLAYS', '*qual: . : columns'),
+    ('*qual: RE : P P --> GIVE THE PRODUCTION PROCESSES + DECAYS (IF RELEVANT)', '*qual: RE : P P --> X'),
+    ]
+
+def hepdat_files(workdir, scale):
+    return [os.path.join(workdir, 'figure_%d.hep.dat' % f) for f in range(scale.figures)]
+
+def generate_fill_header(workdir, scale):
+    """hepdata_writer outputs with one dataset per primitive"""
+    from hepdata_writer import Variable, Measurement, Dataset, write
+    x = np.arange(scale.points)+0.5
+    for f, filename in enumerate(hepdat_files(workdir, scale)):
+        datasets = []
+        for i in range(scale.primitives):
+            y = random_values(scale.points, i)
+            error = np.sqrt(y)
+            datasets.append(Dataset('d%d' % i, 'dataset %d' % i, [Variable('X', x, x-0.5, x+0.5)],
+                                    [Measurement('Y', y, error, error)]))
+        with open(filename, 'w') as output_file:
+            write(output_file, datasets)
+
+def run_fill_header(workdir, scale):
+    import fill_header
+    fill_header.fill_files([(f, [(a, b.replace('%d', str(i))) for a, b in placeholders])
+                            for i, f in enumerate(hepdat_files(workdir, scale))])
+    return scale.figures*scale.primitives*scale.points
+
+def generate_merge_hepdata(workdir, scale):
+    generate_fill_header(workdir, scale)
+    run_fill_header(workdir, scale)
+    with open(os.path.join(workdir, 'header.txt'), 'w') as f:
+        f.write('*author: SOMEONE\n*reference: ARXIV:0000.00000\n')
+
+def run_merge_hepdata(workdir, scale):
+    import merge_hepdata
+    parts = [os.path.join(workdir, 'header.txt')] + hepdat_files(workdir, scale)
+    merge_hepdata.merge({os.path.join(workdir, 'merged.hep.dat'): parts})
+    return scale.figures*scale.primitives*scale.points
+
+def generate_hepdata_reader(workdir, scale):
+    generate_merge_hepdata(workdir, scale)
+    run_merge_hepdata(workdir, scale)
+
+def run_hepdata_reader(workdir, scale):
+    from hepdata_reader import HepDataFile
+    items = 0
+    with HepDataFile(os.path.join(workdir, 'merged.hep.dat')) as hd:
+        for d in hd:
+            items += sum(len(y.values) for y in d.data.ys)
+    return items
+
+def generate_compare_hepdata(workdir, scale):
+    """the merged file, and a copy where every dataset has another header (so that none is skipped by its hash)"""
+    generate_hepdata_reader(workdir, scale)
+    with open(os.path.join(workdir, 'merged.hep.dat')) as f:
+        text = f.read()
+    with open(os.path.join(workdir, 'reference.hep.dat'), 'w') as f:
+        f.write(text.replace('*dscomment: dataset', '*dscomment: Dataset'))
+
+def run_compare_hepdata(workdir, scale):
+    import compare_hepdata
+    tolerance = compare_hepdata.Tolerance(1e-3, 0.0, 5, False)
+    pairs = [(os.path.join(workdir, 'merged.hep.dat'), os.path.join(workdir, 'reference.hep.dat'))]
+    return sum(r.rows for r in compare_hepdata.compare(pairs, tolerance, jobs=2))
+
+stages = collections.OrderedDict([
+    ('format_input', (generate_format_input, run_format_input)),
+    ('rename_tgraphs', (generate_rename_tgraphs, run_rename_tgraphs)),
+    ('add_error_bar', (generate_add_error_bar, run_add_error_bar)),
+    ('acceptance', (generate_acceptance, run_acceptance)),
+    ('acceptance_render', (generate_acceptance, run_acceptance_render)),
+    ('acceptance_maps', (generate_acceptance, run_acceptance_maps)),
+    ('mass_grid', (generate_mass_grid, run_mass_grid)),
+    ('contours', (generate_contours, run_contours)),
+    ('hepdata_writer', (generate_hepdata_writer, run_hepdata_writer)),
+    ('fill_header', (generate_fill_header, run_fill_header)),
+    ('merge_hepdata', (generate_merge_hepdata, run_merge_hepdata)),
+    ('hepdata_reader', (generate_hepdata_reader, run_hepdata_reader)),
+    ('compare_hepdata', (generate_compare_hepdata, run_compare_hepdata)),
+    ])
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,184 @@
+#!/bin/env python
+
+# Confidence intervals on binomial fractions, for whole arrays at once
+#
+# The acceptance (N_fiducial out of N_generated, times BR x filter
+# efficiency) and the efficiency (N_fiducial-reco out of N_fiducial)
+# are binomial fractions; their intervals are computed here for all
+# the mass points and all the regions in one go, with array operations
+# only (no per-point calls):
+# - clopper-pearson: exact, from the quantiles of the beta distribution
+#   (regularized incomplete beta by continued fraction, inverted with
+#   a bracketed Newton iteration started from the Wilson interval)
+# - wilson: score interval, closed form
+# - bootstrap: percentiles of k/n resampled from Binomial(n, k/n),
+#   drawn in chunks to bound the memory
+# Only numpy is needed.
+#
+# Example:
+#   low, high = binomial.interval(k, n)                        # clopper-pearson, 68.27% CL
+#   low, high = binomial.interval(k, n, 'wilson', cl=0.95)
+#   low, high = binomial.interval(k, n, 'bootstrap', samples=2000)
+#
+# Oct 2026
+
+import math
+import numpy as np
+
+methods = ['clopper-pearson', 'wilson', 'bootstrap']
+one_sigma = 0.6827
+
+_lanczos = [0.99999999999980993, 676.5203681218851, -1259.1392167224028, 771.32342877765313,
+            -176.61502916214059, 12.507343278686905, -0.13857109526572012,
+            9.9843695780195716e-6, 1.5056327351493116e-7]
+
+def lgamma(x):
+    """log of the gamma function (Lanczos, g=7), element-wise for x>0"""
+    x = np.asarray(x, dtype=np.float64)
+    small = x<0.5
+    z = np.where(small, 1.0-x, x) - 1.0 # reflection for x<0.5
+    s = np.repeat(_lanczos[0], z.size).reshape(z.shape)
+    for i, c in enumerate(_lanczos[1:]):
+        s = s + c/(z+i+1)
+    t = z + 7.5
+    result = 0.5*math.log(2*math.pi) + (z+0.5)*np.log(t) - t + np.log(s)
+    return np.where(small, np.log(np.pi/np.abs(np.sin(np.pi*x))) - result, result)
+
+def _continued_fraction(a, b, x, eps=1e-14, max_iterations=100000):
+    """continued fraction of the incomplete beta (modified Lentz); converges for x < (a+1)/(a+b+2).
+    The number of terms grows with a+b: only the elements not converged yet are iterated on."""
+    tiny = 1e-300
+    def clip(v):
+        return np.where(np.abs(v)<tiny, tiny, v)
+    qab, qap, qam = a+b, a+1.0, a-1.0
+    c = np.ones_like(x)
+    d = 1.0/clip(1.0 - qab*x/qap)
+    h = d.copy()
+    active = np.arange(len(x))
+    for m in range(1, max_iterations+1):
+        m2 = 2*m
+        aa = m*(b-m)*x/((qam+m2)*(a+m2))
+        d = 1.0/clip(1.0 + aa*d)
+        c = clip(1.0 + aa/c)
+        h[active] *= d*c
+        aa = -(a+m)*(qab+m)*x/((a+m2)*(qap+m2))
+        d = 1.0/clip(1.0 + aa*d)
+        c = clip(1.0 + aa/c)
+        delta = d*c
+        h[active] *= delta
+        left = np.abs(delta-1.0)>=eps
+        if not left.any():
+            break
+        active, a, b, x, c, d = active[left], a[left], b[left], x[left], c[left], d[left]
+        qab, qap, qam = qab[left], qap[left], qam[left]
+    return h
+
+def log_beta(a, b):
+    return lgamma(a) + lgamma(b) - lgamma(a+b)
+
+def betainc(a, b, x):
+    """regularized incomplete beta function I_x(a, b), element-wise"""
+    a, b, x = np.broadcast_arrays(*[np.asarray(v, dtype=np.float64) for v in (a, b, x)])
+    result = np.where(x<=0.0, 0.0, 1.0)
+    inside = (x>0.0) & (x<1.0)
+    if not inside.any():
+        return result
+    a, b, x = a[inside], b[inside], x[inside]
+    front = np.exp(a*np.log(x) + b*np.log1p(-x) - log_beta(a, b))
+    direct = x < (a+1.0)/(a+b+2.0) # otherwise use I_x(a, b) = 1 - I_{1-x}(b, a)
+    values = np.empty_like(x)
+    if direct.any():
+        values[direct] = front[direct]*_continued_fraction(a[direct], b[direct], x[direct])/a[direct]
+    swapped = ~direct
+    if swapped.any():
+        values[swapped] = 1.0 - front[swapped]*_continued_fraction(b[swapped], a[swapped], 1.0-x[swapped])/b[swapped]
+    result[inside] = values
+    return result
+
+def beta_quantile(q, a, b, start=None, xtol=1e-10, ftol=1e-13, max_iterations=200):
+    """x such that I_x(a, b) = q, element-wise: Newton steps kept inside a bracket (bisection otherwise);
+    each iteration only works on the elements that have not converged yet"""
+    q, a, b = [np.array(v, dtype=np.float64).ravel() for v in np.broadcast_arrays(q, a, b)]
+    shape = np.broadcast(q, a, b).shape
+    x = np.clip(np.ravel(start) if start is not None else a/(a+b), 1e-300, 1.0-1e-16)
+    low, high = np.zeros(len(x)), np.ones(len(x))
+    active = np.arange(len(x))
+    for i in range(max_iterations):
+        xa, qa, aa, ba = x[active], q[active], a[active], b[active]
+        f = betainc(aa, ba, xa) - qa
+        low[active] = np.where(f<0, xa, low[active])
+        high[active] = np.where(f>0, xa, high[active])
+        density = np.exp((aa-1.0)*np.log(xa) + (ba-1.0)*np.log1p(-xa) - log_beta(aa, ba))
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            new = xa - f/density
+        la, ha = low[active], high[active]
+        bisect = ~np.isfinite(new) | (new<=la) | (new>=ha)
+        new = np.where(bisect, 0.5*(la+ha), new)
+        converged = (np.abs(f)<=ftol) | (np.abs(new-xa)<=xtol*xa) | (ha-la<=xtol*ha)
+        x[active] = np.where(np.abs(f)<=ftol, xa, new)
+        active = active[~converged]
+        if not len(active):
+            break
+    return x.reshape(shape)
+
+def normal_quantile(p):
+    """z with P(Z<z) = p, for a scalar p (bisection on erfc)"""
+    low, high = -40.0, 40.0
+    for i in range(200):
+        middle = 0.5*(low+high)
+        if 0.5*math.erfc(-middle/math.sqrt(2.0))<p:
+            low = middle
+        else:
+            high = middle
+    return 0.5*(low+high)
+
+def _counts(k, n):
+    k, n = np.broadcast_arrays(np.asarray(k, dtype=np.float64), np.asarray(n, dtype=np.float64))
+    if np.any(n<=0) or np.any(k<0) or np.any(k>n):
+        raise ValueError("binomial counts must have 0 <= k <= n and n > 0")
+    return k, n
+
+def wilson(k, n, cl=one_sigma):
+    k, n = _counts(k, n)
+    z = normal_quantile(0.5*(1.0+cl))
+    p = k/n
+    denominator = 1.0 + z*z/n
+    centre = (p + z*z/(2.0*n))/denominator
+    half_width = z*np.sqrt(p*(1.0-p)/n + z*z/(4.0*n*n))/denominator
+    return np.clip(centre-half_width, 0.0, 1.0), np.clip(centre+half_width, 0.0, 1.0)
+
+def clopper_pearson(k, n, cl=one_sigma):
+    k, n = _counts(k, n)
+    alpha = 1.0-cl
+    start_low, start_high = wilson(k, n, cl)
+    low, high = np.zeros(k.shape), np.ones(k.shape)
+    some = k>0
+    if some.any():
+        low[some] = beta_quantile(0.5*alpha, k[some], n[some]-k[some]+1.0, start=start_low[some])
+    some = k<n
+    if some.any():
+        high[some] = beta_quantile(1.0-0.5*alpha, k[some]+1.0, n[some]-k[some], start=start_high[some])
+    return low, high
+
+def bootstrap(k, n, cl=one_sigma, samples=1000, seed=0, max_draws=10**7):
+    """percentile interval of k/n resampled from Binomial(n, k/n); at most max_draws values in memory"""
+    k, n = _counts(k, n)
+    shape = k.shape
+    k, n = k.ravel(), n.ravel()
+    rng = np.random.RandomState(seed)
+    low, high = np.empty(k.shape), np.empty(k.shape)
+    chunk = max(1, max_draws//samples)
+    percentiles = [50.0*(1.0-cl), 50.0*(1.0+cl)]
+    for start in range(0, len(k), chunk):
+        kc, nc = k[start:start+chunk], n[start:start+chunk]
+        draws = rng.binomial(np.round(nc).astype(np.int64)[:, np.newaxis], (kc/nc)[:, np.newaxis],
+                             size=(len(kc), samples))/nc[:, np.newaxis]
+        low[start:start+chunk], high[start:start+chunk] = np.percentile(draws, percentiles, axis=1)
+    return low.reshape(shape), high.reshape(shape)
+
+def interval(k, n, method='clopper-pearson', cl=one_sigma, **options):
+    """(low, high) of the fraction k/n, with the shape of k and n"""
+    functions = {'clopper-pearson' : clopper_pearson, 'wilson' : wilson, 'bootstrap' : bootstrap}
+    if method not in functions:
+        raise ValueError("unknown interval %r; known: %s" % (method, ', '.join(methods)))
+    return functions[method](k, n, cl, **options)
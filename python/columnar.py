@@ -0,0 +1,139 @@
+#!/bin/env python
+
+# Columnar binary copy of the hepdata datasets, to be memory-mapped
+#
+# The .hep.dat files are text, and each reader parses the decimal
+# strings again. Next to output/<figure>.hep.dat, the directory
+# output/<figure>.columns has one .npy file per column of each dataset
+# (values, errors, bin edges) and a manifest.json saying which file is
+# which. The columns are written from the same arrays as the text
+# (the datasets returned by hepdata_writer.convert). np.load with
+# mmap_mode='r' maps them without parsing or copying, so a large 2D
+# grid or contour costs a file open rather than a parse. Symmetric
+# errors are written once: err_minus and err_plus then name the same
+# file. The manifest is written last (and renamed into place), so
+# that a reader never sees a manifest pointing to missing columns.
+#
+# Example:
+# > make_figure.py --columnar figure_8_a         # output/figure_8_a.hep.dat and output/figure_8_a.columns/
+# > columnar.py export output/hepdata.hep.dat    # from a text file (e.g. the merged ones)
+# > columnar.py show output/figure_8_a.columns
+#   for d in columnar.load('output/figure_8_a.columns'):
+#       x, y = d.xs[0].values, d.ys[0].values    # read-only memory maps
+#
+# Oct 2026
+
+import argparse
+import collections
+import glob
+import json
+import os
+import sys
+import numpy as np
+import tracing
+from hepdata_writer import Variable, Measurement, Dataset
+
+format_version = 1
+manifest_name = 'manifest.json'
+suffix = '.columns'
+
+def main():
+    parser = argparse.ArgumentParser(description='write or inspect the columnar copy of hepdata files')
+    parser.add_argument('action', choices=['export', 'show'])
+    parser.add_argument('inputs', nargs='+', help='export: .hep.dat files; show: .columns directories')
+    args = parser.parse_args()
+    try:
+        for name in args.inputs:
+            if args.action=='export':
+                print "written %s" % export(name)
+            else:
+                content = manifest(name)
+                print "%s: %d datasets (from %s)" % (name, len(content['datasets']), content['source'])
+                for d in content['datasets']:
+                    print "  %-30s %8d rows, %d x, %d y" % (d['name'], d['rows'], len(d['xs']), len(d['ys']))
+    except (IOError, OSError, ValueError) as e:
+        sys.exit(str(e))
+
+def directory_name(output_name):
+    """output/figure_8_a(.hep.dat) -> output/figure_8_a.columns"""
+    if output_name.endswith('.hep.dat'):
+        output_name = output_name[:-len('.hep.dat')]
+    return output_name + suffix
+
+def write(directory, datasets, source='', fields=None):
+    """one .npy per column of the datasets and the manifest; fields: figure-level values for the manifest"""
+    with tracing.span('columnar', figure=os.path.basename(directory)[:-len(suffix)]) as s:
+        if not os.path.exists(directory) : os.makedirs(directory)
+        for stale in glob.glob(os.path.join(directory, '*.npy')) : os.remove(stale)
+        written = {} # id of the array : file name, so that an array shared by two columns is written once
+        size = [0]
+        def save(array, name):
+            if array is None:
+                return None
+            if id(array) not in written:
+                filename = name + '.npy'
+                np.save(os.path.join(directory, filename), np.ascontiguousarray(array, dtype=np.float64))
+                size[0] += os.path.getsize(os.path.join(directory, filename))
+                written[id(array)] = filename
+            return written[id(array)]
+        entries = []
+        for i, d in enumerate(datasets):
+            xs = [collections.OrderedDict([('title', v.title),
+                                           ('values', save(v.values, '%d_x%d' % (i, j))),
+                                           ('bin_low', save(v.bin_low, '%d_x%d_low' % (i, j))),
+                                           ('bin_high', save(v.bin_high, '%d_x%d_high' % (i, j)))])
+                  for j, v in enumerate(d.xs)]
+            ys = [collections.OrderedDict([('title', m.title),
+                                           ('values', save(m.values, '%d_y%d' % (i, j))),
+                                           ('err_minus', save(m.err_minus, '%d_y%d_minus' % (i, j))),
+                                           ('err_plus', save(m.err_plus, '%d_y%d_plus' % (i, j)))])
+                  for j, m in enumerate(d.ys)]
+            rows = len(d.xs[0].values) if d.xs else len(d.ys[0].values) if d.ys else 0
+            entries.append(collections.OrderedDict([('name', d.name), ('title', d.title), ('rows', rows),
+                                                    ('xs', xs), ('ys', ys)]))
+        content = collections.OrderedDict([('format', format_version), ('source', source), ('dtype', 'float64'),
+                                           ('fields', fields or {}), ('datasets', entries)])
+        temporary = os.path.join(directory, manifest_name + '.tmp')
+        with open(temporary, 'w') as manifest_file:
+            json.dump(content, manifest_file, indent=1)
+        os.rename(temporary, os.path.join(directory, manifest_name))
+        s.add(objects=len(entries), points=sum(e['rows'] for e in entries), bytes=size[0])
+    return directory
+
+def manifest(directory):
+    filename = os.path.join(directory, manifest_name)
+    if not os.path.exists(filename):
+        raise IOError("%s: no %s (see columnar.py export)" % (directory, manifest_name))
+    with open(filename) as manifest_file:
+        content = json.load(manifest_file)
+    if content.get('format')!=format_version:
+        raise ValueError("%s: format %s, expected %d" % (filename, content.get('format'), format_version))
+    return content
+
+def load(directory, mmap=True):
+    """the datasets (hepdata_writer.Dataset), with read-only memory-mapped columns (in memory if not mmap)"""
+    content = manifest(directory)
+    mode = 'r' if mmap else None
+    loaded = {}
+    def column(filename):
+        if filename is None:
+            return None
+        if filename not in loaded:
+            loaded[filename] = np.load(os.path.join(directory, filename), mmap_mode=mode)
+        return loaded[filename]
+    return [Dataset(d['name'], d['title'],
+                    [Variable(v['title'], column(v['values']), column(v['bin_low']), column(v['bin_high']))
+                     for v in d['xs']],
+                    [Measurement(m['title'], column(m['values']), column(m['err_minus']), column(m['err_plus']))
+                     for m in d['ys']])
+            for d in content['datasets']]
+
+def export(filename, directory=None):
+    """the columnar copy of a .hep.dat file, parsed once (for the files not made by hepdata_writer, e.g. the merged ones)"""
+    from hepdata_reader import HepDataFile
+    with HepDataFile(filename) as hd:
+        datasets = [d.data for d in hd]
+    return write(directory or directory_name(filename), datasets, source=os.path.basename(filename))
+
+if __name__=='__main__':
+    main()
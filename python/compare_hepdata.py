@@ -0,0 +1,283 @@
+#!/bin/env python
+
+# Compare rebuilt hepdata files with the reference ones (the output/*.hep.dat of a previous build)
+#
+# The datasets of the two files are paired by '*location:' (by order
+# when a location appears more than once). A pair with the same text
+# (same sha1) is identical and is not parsed; when the two files have
+# the same text, the datasets are not even hashed. Otherwise:
+# - the header lines are compared as text, with the numbers rewritten
+#   in one format (--data-only skips them);
+# - the '*data:' columns (values, bin edges, errors) are compared as
+#   numbers: |new-reference| <= atol + rtol*|reference|, NaN equal to
+#   NaN, so that '130' and '130.0' (or '+-0.5' and '+0.5,-0.5') are
+#   the same. The default rtol allows for the 4 significant digits of
+#   the reference files.
+# For each dataset that differs the first diverging points are
+# printed. The pairs of datasets are compared on a pool of processes;
+# each one maps the files and parses the data blocks a few MB at a
+# time, so the memory does not grow with the size of the files (or of
+# a dataset). The exit status is 1 when something differs.
+#
+# Example:
+# > ./run_all.sh save_reference && ./run_all.sh && ./run_all.sh check_output
+# > compare_hepdata.py output output/reference          # all the .hep.dat files of two directories
+# > compare_hepdata.py new.hep.dat output/hepdata.hep.dat -l 'figure_8_*' --rtol 1e-2 -n 10
+#
+# Oct 2026
+
+import argparse
+import collections
+import fnmatch
+import glob
+import hashlib
+import itertools
+import mmap
+import multiprocessing
+import os
+import re
+import sys
+import numpy as np
+import tracing
+from hepdata_reader import HepDataFile, DatasetView, number
+
+chunk_size = 1<<23 # bytes of '*data:' rows parsed at a time
+
+Tolerance = collections.namedtuple('Tolerance', ['rtol', 'atol', 'points', 'data_only'])
+# status: identical, equal (within the tolerance), different, missing (only in the reference),
+# extra (only in the new file), error; points: [(row, [(column, new, reference)])], header: [(new, reference)]
+Result = collections.namedtuple('Result', ['new', 'reference', 'location', 'occurrence', 'status', 'rows',
+                                           'reference_rows', 'diverging', 'max_abs', 'max_rel', 'points',
+                                           'header', 'message'])
+
+def main():
+    parser = argparse.ArgumentParser(description='compare hepdata files with the reference ones')
+    parser.add_argument('new', help='.hep.dat file, or directory of .hep.dat files')
+    parser.add_argument('reference', help='.hep.dat file, or directory of .hep.dat files')
+    parser.add_argument('--rtol', type=float, default=1e-3, help='relative tolerance')
+    parser.add_argument('--atol', type=float, default=0.0, help='absolute tolerance')
+    parser.add_argument('-n', '--points', type=int, default=5, help='diverging points printed per dataset')
+    parser.add_argument('-l', '--location', help='compare only these locations (glob pattern)')
+    parser.add_argument('--data-only', action='store_true', help='do not compare the header lines')
+    parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(), help='number of processes')
+    args = parser.parse_args()
+    if os.path.isdir(args.new)!=os.path.isdir(args.reference):
+        parser.error("compare two files or two directories")
+    tolerance = Tolerance(args.rtol, args.atol, args.points, args.data_only)
+    failed = False
+    for new, reference in file_pairs(args.new, args.reference):
+        if not new or not reference:
+            print "%s: only in %s" % (os.path.basename(new or reference), args.new if new else args.reference)
+            failed = True
+    with tracing.span('compare', input=args.reference) as s:
+        counts = collections.Counter()
+        for result in compare(file_pairs(args.new, args.reference), tolerance, args.location, args.jobs):
+            counts[result.status] += 1
+            s.add(objects=1, points=result.rows)
+            for line in report(result):
+                print line
+        failed = failed or any(counts[k] for k in ['different', 'missing', 'extra', 'error'])
+    print "%d datasets: %s" % (sum(counts.values()), ', '.join('%d %s' % (counts[k], k) for k in sorted(counts)))
+    sys.exit(1 if failed else 0)
+
+def file_pairs(new, reference):
+    """[(new file, reference file)], with None for a file missing on one side"""
+    if not os.path.isdir(new):
+        return [(new, reference)]
+    names = sorted(set(os.path.basename(f) for d in [new, reference] for f in glob.glob(os.path.join(d, '*.hep.dat'))))
+    return [tuple(os.path.join(d, n) if os.path.exists(os.path.join(d, n)) else None for d in [new, reference])
+            for n in names]
+
+def file_digest(filename):
+    digest = hashlib.sha1()
+    with open(filename, 'rb') as input_file:
+        for block in iter(lambda: input_file.read(chunk_size), ''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def digest(buf, start, end):
+    """sha1 of buf[start:end], chunk_size bytes at a time"""
+    d = hashlib.sha1()
+    for offset in range(start, end, chunk_size):
+        d.update(buf[offset:min(offset+chunk_size, end)])
+    return d.hexdigest()
+
+def dataset_pairs(new, reference, location=None):
+    """[(location, occurrence, (start, end) in new, (start, end) in reference)], in the order of the reference
+    and then of the datasets only in new; None for a dataset missing on one side"""
+    bounds = []
+    for filename in [new, reference]:
+        with HepDataFile(filename) as hd:
+            occurrences = collections.Counter()
+            keyed = collections.OrderedDict()
+            for loc, start, end in hd.boundaries:
+                if location is None or fnmatch.fnmatchcase(loc, location):
+                    keyed[(loc, occurrences[loc])] = (start, end)
+                    occurrences[loc] += 1
+            bounds.append(keyed)
+    new_bounds, reference_bounds = bounds
+    keys = list(reference_bounds) + [k for k in new_bounds if k not in reference_bounds]
+    return [(loc, k, new_bounds.get((loc, k)), reference_bounds.get((loc, k))) for loc, k in keys]
+
+def compare(pairs, tolerance, location=None, jobs=1):
+    """the Results of all the datasets of the (new, reference) file pairs, in order"""
+    def tasks():
+        for new, reference in pairs:
+            if not new or not reference:
+                continue
+            if os.path.getsize(new)==os.path.getsize(reference) and file_digest(new)==file_digest(reference):
+                for loc, k, new_bounds, reference_bounds in dataset_pairs(new, reference, location):
+                    yield identical(new, reference, loc, k)
+                continue
+            for loc, k, new_bounds, reference_bounds in dataset_pairs(new, reference, location):
+                yield (new, new_bounds, reference, reference_bounds, loc, k, tolerance)
+    if jobs>1:
+        pool = multiprocessing.Pool(jobs)
+        try:
+            for result in pool.imap(_compare_job, tasks(), chunksize=4):
+                yield result
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for result in itertools.imap(_compare_job, tasks()):
+            yield result
+
+def identical(new, reference, location, occurrence):
+    return Result(new, reference, location, occurrence, 'identical', 0, 0, 0, 0.0, 0.0, [], [], '')
+
+_mapped = {} # filename : (file, mmap), in each process
+
+def _view(filename, bounds, location):
+    if filename not in _mapped:
+        if len(_mapped)>=4: # the files of the previous pairs
+            for f, m in _mapped.values():
+                m.close()
+                f.close()
+            _mapped.clear()
+        f = open(filename, 'rb')
+        _mapped[filename] = (f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    return DatasetView(_mapped[filename][1], location, *bounds)
+
+def _compare_job(task):
+    if isinstance(task, Result):
+        return task
+    new, new_bounds, reference, reference_bounds, location, occurrence, tolerance = task
+    result = Result(new, reference, location, occurrence, 'identical', 0, 0, 0, 0.0, 0.0, [], [], '')
+    if new_bounds is None or reference_bounds is None:
+        return result._replace(status='missing' if new_bounds is None else 'extra')
+    try:
+        return compare_datasets(_view(new, new_bounds, location), _view(reference, reference_bounds, location),
+                                tolerance, result)
+    except (IOError, ValueError) as e:
+        return result._replace(status='error', message=str(e))
+
+def compare_datasets(new, reference, tolerance, result):
+    if digest(new._buf, new.start, new.end)==digest(reference._buf, reference.start, reference.end):
+        return result
+    header = [] if tolerance.data_only else header_differences(new, reference)
+    names, message = column_names(new.kinds), ''
+    if new.kinds!=reference.kinds:
+        message = "columns %s, reference %s" % (' : '.join(new.kinds), ' : '.join(reference.kinds))
+        names = [n for n in names if n in column_names(reference.kinds)]
+    new_columns = [column_names(new.kinds).index(n) for n in names]
+    reference_columns = [column_names(reference.kinds).index(n) for n in names]
+    rows = reference_rows = diverging = 0
+    max_abs = max_rel = 0.0
+    points = []
+    for new_block, reference_block in aligned(tables(new), tables(reference)):
+        if new_block is None or reference_block is None:
+            rows += len(new_block) if new_block is not None else 0
+            reference_rows += len(reference_block) if reference_block is not None else 0
+            continue
+        a, b = new_block[:, new_columns], reference_block[:, reference_columns]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            difference = np.abs(a-b)
+            ok = (difference<=tolerance.atol+tolerance.rtol*np.abs(b)) | (a==b) | (np.isnan(a) & np.isnan(b))
+            bad = np.flatnonzero(~ok.all(axis=1))
+            if len(bad):
+                finite = difference[~ok & np.isfinite(difference)]
+                relative = (difference/np.abs(b))[~ok & np.isfinite(difference) & (b!=0)]
+                max_abs = max(max_abs, finite.max() if len(finite) else np.inf)
+                max_rel = max(max_rel, relative.max() if len(relative) else np.inf)
+        for row in bad[:tolerance.points-len(points)]:
+            points.append((rows+row, [(names[c], a[row, c], b[row, c]) for c in np.flatnonzero(~ok[row])]))
+        diverging += len(bad)
+        rows += len(a)
+        reference_rows += len(b)
+    different = header or message or diverging or rows!=reference_rows
+    return result._replace(status='different' if different else 'equal', rows=rows, reference_rows=reference_rows,
+                           diverging=diverging, max_abs=max_abs, max_rel=max_rel, points=points, header=header,
+                           message=message)
+
+def column_names(kinds):
+    """the columns of tables(): value, low, high of each x (bin edges) and of each y (errors minus, plus)"""
+    xs, ys = ['x%d' % i for i in range(kinds.count('x'))], ['y%d' % i for i in range(len(kinds)-kinds.count('x'))]
+    return ([n+s for n in xs for s in ['', ' low', ' high']] +
+            [n+s for n in ys for s in ['', ' minus', ' plus']])
+
+def tables(view):
+    """the '*data:' rows of a dataset as (rows, columns) arrays, one per chunk of text; the
+    missing bin edges are NaN and the missing errors 0 (as in the files written without them)"""
+    for xs, ys in view.data_chunks(chunk_size):
+        n = len((xs or ys)[0].values)
+        nan, zero = np.full(n, np.nan), np.zeros(n)
+        columns = []
+        for v in xs:
+            columns += [v.values, nan if v.bin_low is None else v.bin_low, nan if v.bin_high is None else v.bin_high]
+        for m in ys:
+            columns += [m.values, zero if m.err_minus is None else m.err_minus, zero if m.err_plus is None else m.err_plus]
+        yield np.column_stack(columns)
+
+def aligned(new_tables, reference_tables):
+    """(new, reference) blocks with the same number of rows; at the end, the rows left on one
+    side come with None on the other"""
+    new_tables, reference_tables = iter(new_tables), iter(reference_tables)
+    new = reference = None
+    while True:
+        if new is None or not len(new) : new = next(new_tables, None)
+        if reference is None or not len(reference) : reference = next(reference_tables, None)
+        if new is None or reference is None:
+            break
+        n = min(len(new), len(reference))
+        yield new[:n], reference[:n]
+        new, reference = new[n:], reference[n:]
+    for block in itertools.chain([new] if new is not None else [], new_tables):
+        yield block, None
+    for block in itertools.chain([reference] if reference is not None else [], reference_tables):
+        yield None, block
+
+def normalized(line):
+    return re.sub(number, lambda m: repr(float(m.group(0))), ' '.join(line.split()))
+
+def header_differences(new, reference):
+    """the (new, reference) header lines that differ, at most 5"""
+    lines = [[normalized(l) for l in v._buf[v.start:v._data_offset()].splitlines()] for v in [new, reference]]
+    return [(a or '', b or '') for a, b in itertools.izip_longest(*lines) if a!=b][:5]
+
+def report(result):
+    """the lines printed for a Result (none when it is identical or equal)"""
+    name = "%s %s%s" % (os.path.basename(result.new or result.reference), result.location,
+                        ' #%d' % (result.occurrence+1) if result.occurrence else '')
+    if result.status in ('identical', 'equal'):
+        return []
+    if result.status!='different':
+        return ["%s: %s" % (name, {'missing': 'only in the reference', 'extra': 'not in the reference'}.get(
+            result.status, result.message))]
+    lines = []
+    if result.message:
+        lines.append("%s: %s" % (name, result.message))
+    for a, b in result.header:
+        lines.append("%s: header '%s', reference '%s'" % (name, a, b))
+    if result.rows!=result.reference_rows:
+        lines.append("%s: %d rows, reference %d" % (name, result.rows, result.reference_rows))
+    if result.diverging:
+        lines.append("%s: %d of %d rows differ (max abs %g, max rel %g)" % (name, result.diverging,
+                                                                            min(result.rows, result.reference_rows),
+                                                                            result.max_abs, result.max_rel))
+        for row, columns in result.points:
+            lines.append("    row %d: %s" % (row, ', '.join("%s %r (reference %r)" % (c, a, b) for c, a, b in columns)))
+    return lines
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,188 @@
+#!/bin/env python
+
+# Exclusion contours on the mass plane: stitching, simplification, point-in-contour queries
+#
+# A contour is given as pieces (the TGraphs of the limit2d inputs,
+# e.g. WhMediated_expected_1 and WhMediated_expected_2 of figure_8_a).
+# - stitch: the pieces whose ends meet (within 'tolerance', reversing
+#   them if needed) are chained into one line; the lines that do not
+#   meet (separate islands) are kept in order, and merge() concatenates
+#   them, as was done by hand for figure_8_a.
+# - simplify: Douglas-Peucker with a tolerance in GeV, on all the
+#   segments of a line at once: each pass splits every segment whose
+#   farthest point is beyond the tolerance.
+# - Region: the area inside the lines (even-odd rule, so that holes and
+#   islands work; an open line is closed by the segment from its last
+#   point back to its first). contains() answers for many points at
+#   once: the points are sorted by y, each edge only looks at the ones
+#   in its band of y, and the crossings are counted with bincount.
+# Only numpy is needed, except to read the graphs from the ROOT files.
+#
+# Example:
+# > contours.py show input_formatted/figure_8_a.root
+# > contours.py excluded input_formatted/figure_8_d.root WhMediated_observed -g input_from_sigve/xsecs.txt
+#   lines = contours.stitch([(x1, y1), (x2, y2)])
+#   x, y = contours.simplify(x, y, tolerance=0.5)
+#   excluded = contours.Region(lines).contains(mc1, mn1)
+#
+# Oct 2026
+
+import argparse
+import sys
+import numpy as np
+
+tolerance = 1e-3 # GeV, pieces whose ends are closer than this are joined
+
+def main():
+    parser = argparse.ArgumentParser(description='stitch, simplify and query the exclusion contours of a root file')
+    parser.add_argument('action', choices=['show', 'excluded'])
+    parser.add_argument('input', help='root file with the contour graphs')
+    parser.add_argument('contour', nargs='?', help='excluded: name prefix of the pieces of the contour')
+    parser.add_argument('-g', '--grid', help="excluded: grid file of mass points (see mass_grid.py), or 'counts'")
+    parser.add_argument('-s', '--simplify', type=float, default=0.0, help='simplification tolerance [GeV]')
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    args = parser.parse_args()
+    try:
+        graphs = read_graphs(args.input)
+    except IOError as e:
+        sys.exit(str(e))
+    if args.action=='show':
+        for name, (x, y) in graphs:
+            sx, sy = simplify(x, y, args.simplify) if args.simplify else (x, y)
+            print "%s: %d points%s, %s" % (name, len(x), " (%d simplified)" % len(sx) if args.simplify else '',
+                                          'closed' if is_closed(x, y) else 'open')
+        return
+    import mass_grid
+    pieces = [xy for name, xy in graphs if args.contour and name.startswith(args.contour)]
+    if not pieces or not args.grid:
+        parser.error("excluded needs the name of a contour in %s and a grid (-g)" % args.input)
+    lines = [simplify(x, y, args.simplify) if args.simplify else (x, y) for x, y in stitch(pieces)]
+    grid = mass_grid.counts_grid() if args.grid=='counts' else mass_grid.read(args.grid)
+    inside = Region(lines).contains(grid.x, grid.y)
+    flagged = mass_grid.MassGrid(grid.x, grid.y, np.column_stack([grid.values, inside]), grid.names+['excluded'])
+    mass_grid.write(open(args.output, 'w') if args.output else sys.stdout, flagged)
+
+def read_graphs(filename):
+    """[(name, (x, y))] of the TGraphs in a root file"""
+    import ROOT as r
+    from root_arrays import graph_arrays
+    r.gROOT.SetBatch(True)
+    input_file = r.TFile.Open(filename)
+    if not input_file or input_file.IsZombie():
+        raise IOError("cannot open %s" % filename)
+    graphs = []
+    for key in input_file.GetListOfKeys():
+        o = key.ReadObj()
+        if o.InheritsFrom('TGraph'):
+            x, y = graph_arrays(o)[:2]
+            graphs.append((o.GetName(), (x.copy(), y.copy())))
+    input_file.Close()
+    return graphs
+
+def is_closed(x, y, tolerance=tolerance):
+    return len(x)>2 and np.hypot(x[0]-x[-1], y[0]-y[-1])<=tolerance
+
+def stitch(pieces, tolerance=tolerance):
+    """lines [(x, y)] made of the pieces [(x, y)] whose ends meet, in the order of the pieces"""
+    pieces = [(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)) for x, y in pieces if len(x)]
+    left = list(range(len(pieces)))
+    lines = []
+    while left:
+        x, y = pieces[left.pop(0)]
+        grown = True
+        while left and grown and not is_closed(x, y, tolerance):
+            # the ends of all the other pieces against the ends of this line
+            ends = np.array([[pieces[i][0][0], pieces[i][1][0], pieces[i][0][-1], pieces[i][1][-1]] for i in left])
+            grown = False
+            for here, there, reverse, append in [(-1, 0, False, True), (-1, 2, True, True),
+                                                 (0, 2, False, False), (0, 0, True, False)]:
+                distance = np.hypot(ends[:, there]-x[here], ends[:, there+1]-y[here])
+                if distance.min()<=tolerance:
+                    px, py = pieces[left.pop(int(np.argmin(distance)))]
+                    if reverse:
+                        px, py = px[::-1], py[::-1]
+                    # the shared point once
+                    x, y = ((np.concatenate([x, px[1:]]), np.concatenate([y, py[1:]])) if append else
+                            (np.concatenate([px[:-1], x]), np.concatenate([py[:-1], y])))
+                    grown = True
+                    break
+        lines.append((x, y))
+    return lines
+
+def merge(pieces, tolerance=tolerance):
+    """one (x, y) with the stitched lines one after the other"""
+    lines = stitch(pieces, tolerance)
+    return np.concatenate([x for x, y in lines]), np.concatenate([y for x, y in lines])
+
+def _segment_distance(px, py, ax, ay, bx, by):
+    """distance of the points p from the segments a-b (from a where a==b)"""
+    dx, dy = bx-ax, by-ay
+    length2 = dx*dx + dy*dy
+    t = np.clip(((px-ax)*dx + (py-ay)*dy)/np.where(length2>0, length2, 1.0), 0.0, 1.0)
+    return np.hypot(px-ax-t*dx, py-ay-t*dy)
+
+def simplify(x, y, tolerance):
+    """the points of the line (x, y) kept by Douglas-Peucker: no point removed is further than tolerance from the line"""
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    if len(x)<3:
+        return x, y
+    keep = np.zeros(len(x), dtype=bool)
+    keep[[0, -1]] = True
+    # the points removed so far that are not settled yet: those of the segments split at the last pass
+    inner = np.arange(1, len(x)-1)
+    while len(inner):
+        # each of them against the segment between the kept points around it
+        kept = np.flatnonzero(keep)
+        segment = np.searchsorted(kept, inner)-1
+        a, b = kept[segment], kept[segment+1]
+        distance = _segment_distance(x[inner], y[inner], x[a], y[a], x[b], y[b])
+        new = np.concatenate([[True], segment[1:]!=segment[:-1]])
+        first, which = np.flatnonzero(new), np.cumsum(new)-1
+        farthest = np.maximum.reduceat(distance, first)
+        split = farthest>tolerance
+        if not split.any():
+            break
+        hit = np.flatnonzero((distance==farthest[which]) & split[which])
+        # the first of the farthest points of each segment
+        hit = hit[np.concatenate([[True], which[hit][1:]!=which[hit][:-1]])]
+        keep[inner[hit]] = True
+        inner = inner[split[which] & ~keep[inner]]
+    return x[keep], y[keep]
+
+class Region(object):
+    """the area inside the lines [(x, y)], by the even-odd rule; open lines are closed"""
+    def __init__(self, lines):
+        edges = []
+        for x, y in lines:
+            x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+            if len(x)<3:
+                continue
+            edges.append(np.column_stack([x, y, np.roll(x, -1), np.roll(y, -1)]))
+        if not edges:
+            raise ValueError("no line with at least 3 points")
+        edges = np.concatenate(edges)
+        edges = edges[edges[:, 1]!=edges[:, 3]] # the horizontal ones never cross a horizontal ray
+        self.x1, self.y1, self.x2, self.y2 = edges.T
+        self.y_low, self.y_high = np.minimum(self.y1, self.y2), np.maximum(self.y1, self.y2)
+    def contains(self, x, y, chunk=10**7):
+        """for each point, whether it is inside (ray casting towards +x)"""
+        x, y = np.ravel(x).astype(np.float64), np.ravel(y).astype(np.float64)
+        order = np.argsort(y, kind='mergesort')
+        sorted_y = y[order]
+        # the points with y_low <= y < y_high, for each edge
+        start = np.searchsorted(sorted_y, self.y_low, side='left')
+        counts = np.searchsorted(sorted_y, self.y_high, side='left') - start
+        crossings = np.zeros(len(x), dtype=np.int64)
+        group = np.cumsum(counts)//chunk
+        boundaries = np.concatenate([[0], np.flatnonzero(np.diff(group))+1, [len(counts)]])
+        for first, last in zip(boundaries[:-1], boundaries[1:]):
+            c = counts[first:last]
+            edge = first + np.repeat(np.arange(len(c)), c)
+            point = order[np.repeat(start[first:last], c) + np.arange(c.sum()) - np.repeat(np.cumsum(c)-c, c)]
+            x1, y1, x2, y2 = self.x1[edge], self.y1[edge], self.x2[edge], self.y2[edge]
+            crossing_x = x1 + (y[point]-y1)*(x2-x1)/(y2-y1)
+            crossings += np.bincount(point[x[point]<crossing_x], minlength=len(x))
+        return crossings%2==1
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,233 @@
+#!/bin/env python
+
+# Copy (and rename) objects from ROOT files, following a list of rules
+#
+# This replaces the one-file-per-process scripts rename_tgraphs.py
+# (the 'Graph' primitives of canvas 'c1', renamed to their title) and
+# rename_semicolon.py (the 'WhMediated_*;N' cycles renamed to
+# '_N'). A rule says:
+# - source, destination: the input and output root files
+# - path: where the objects are: '' for the keys of the file, a
+#   canvas/pad path ('c1', 'canvas/canvas_1') for the primitives of a
+#   pad, or a directory
+# - name, title: a name (or a list of them), with * ? [] as in glob
+# - cycle: the key cycle (only for keys)
+# - class: the objects that inherit from this class
+# - target: the name in the output, where {name}, {title} and {cycle}
+#   are those of the object (default '{name}')
+# The rules are grouped by the files they touch: each group opens its
+# source files once (and lists each path once), writes its destination
+# files once, and the independent groups run on a pool of processes.
+# A rule that matches nothing, or two objects written with the same
+# name to the same file, are errors.
+#
+# For the figures, the rules are the 'prepare_args' of the figures
+# prepared with 'extract' in figures.json (source and destination are
+# those of the figure); make_figure.py --prepare runs all of them
+# in one go.
+#
+# Example:
+# > extract_objects.py rules.json -j 4
+# with rules.json:
+#   {"defaults": {"path": "c1", "name": "Graph", "target": "{title}"},
+#    "rules": [{"source": "input_from_alberto/1D_ee_noprelblackln.root", "destination": "input_formatted/figure_7_a.root",
+#               "title": ["exp_limit_ee", "obs_limit_ee"]},
+#              ...]}
+#
+# Oct 2026
+
+import argparse
+import collections
+import fnmatch
+import json
+import multiprocessing
+import os
+import sys
+import tracing
+
+rule_fields = ['source', 'destination', 'path', 'name', 'title', 'cycle', 'class', 'target']
+Rule = collections.namedtuple('Rule', ['source', 'destination', 'path', 'name', 'title', 'cycle', 'class_name', 'target'])
+# an object that a rule can select; read() gives the object itself
+Candidate = collections.namedtuple('Candidate', ['name', 'title', 'cycle', 'class_name', 'read'])
+
+def main():
+    parser = argparse.ArgumentParser(description='copy and rename objects from root files, following a list of rules')
+    parser.add_argument('manifest', help='json file with the rules')
+    parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(), help='number of groups processed in parallel')
+    parser.add_argument('-l', '--list', action='store_true', help='print the groups of rules and exit')
+    args = parser.parse_args()
+    try:
+        rules = read_manifest(args.manifest)
+    except (IOError, ValueError) as e:
+        sys.exit(str(e))
+    if args.list:
+        for group in groups(rules):
+            print "%s -> %s (%d rules)" % (' '.join(unique(r.source for r in group)),
+                                           ' '.join(unique(r.destination for r in group)), len(group))
+        return
+    errors = run(rules, args.jobs)
+    if errors:
+        sys.exit('\n'.join(message for destinations, message in errors))
+
+def unique(values):
+    return list(collections.OrderedDict.fromkeys(values))
+
+def rule(entry, source=None, destination=None):
+    """a Rule from a dict of rule_fields; source and destination are the defaults"""
+    unknown = [k for k in entry if k not in rule_fields]
+    if unknown:
+        raise ValueError("unknown rule field(s) %s; known: %s" % (', '.join(unknown), ', '.join(rule_fields)))
+    source, destination = entry.get('source', source), entry.get('destination', destination)
+    if not source or not destination:
+        raise ValueError("rule without source or destination: %s" % json.dumps(entry, sort_keys=True))
+    def patterns(value):
+        return None if value is None else (value,) if isinstance(value, basestring) else tuple(value)
+    cycle = entry.get('cycle')
+    if cycle is not None and not isinstance(cycle, int):
+        raise ValueError("cycle must be an integer, not %r" % cycle)
+    target = entry.get('target', '{name}')
+    try:
+        target.format(name='', title='', cycle=0)
+    except (KeyError, IndexError):
+        raise ValueError("target %r: only {name}, {title} and {cycle} can be used" % target)
+    return Rule(source, destination, entry.get('path', '').strip('/'), patterns(entry.get('name')),
+                patterns(entry.get('title')), cycle, entry.get('class'), target)
+
+def read_manifest(filename):
+    """the rules of a json file {"defaults": {...}, "rules": [{...}]}"""
+    try:
+        with open(filename) as manifest_file:
+            content = json.load(manifest_file, object_pairs_hook=collections.OrderedDict)
+    except (IOError, ValueError) as e:
+        raise IOError("cannot read %s: %s" % (filename, e))
+    defaults = content.get('defaults', {})
+    rules = []
+    for i, entry in enumerate(content.get('rules', [])):
+        try:
+            rules.append(rule(dict(defaults, **entry)))
+        except ValueError as e:
+            raise ValueError("%s: rule %d: %s" % (filename, i, e))
+    return rules
+
+def groups(rules):
+    """the rules split in groups sharing no source and no destination, in the order of the rules"""
+    both = set(r.source for r in rules) & set(r.destination for r in rules)
+    if both:
+        raise ValueError("both source and destination: %s" % ', '.join(sorted(both)))
+    parent = {}
+    def root(f):
+        parent.setdefault(f, f)
+        while parent[f]!=f:
+            parent[f] = parent[parent[f]]
+            f = parent[f]
+        return f
+    for r in rules:
+        parent[root(r.source)] = root(r.destination)
+    grouped = collections.OrderedDict()
+    for r in rules:
+        grouped.setdefault(root(r.destination), []).append(r)
+    return grouped.values()
+
+def run(rules, jobs=1):
+    """process the rules, one group per process; return the [(destinations, error)] of the groups that failed"""
+    work = groups(rules)
+    if jobs>1 and len(work)>1:
+        pool = multiprocessing.Pool(min(jobs, len(work)))
+        results = pool.map(_extract_job, work)
+        pool.close()
+        pool.join()
+    else:
+        results = map(_extract_job, work)
+    return [(unique(r.destination for r in group), error) for group, error in zip(work, results) if error]
+
+def _extract_job(group):
+    try:
+        extract(group)
+    except (IOError, KeyError, ValueError) as e:
+        return str(e)
+
+def matches(patterns, value):
+    return patterns is None or any(fnmatch.fnmatchcase(value, p) for p in patterns)
+
+def list_objects(input_file, path):
+    """the Candidates at path: keys of the file or of a directory, primitives of a pad"""
+    if not path:
+        return _keys(input_file)
+    parts = path.split('/')
+    o = input_file.Get(parts[0])
+    for part in parts[1:]:
+        if not o : break
+        o = o.Get(part) if o.InheritsFrom('TDirectory') else o.FindObject(part)
+    if not o:
+        raise KeyError("cannot find %s in %s" % (path, input_file.GetName()))
+    if o.InheritsFrom('TDirectory'):
+        return _keys(o)
+    if not o.InheritsFrom('TPad'):
+        raise KeyError("%s in %s is a %s, not a directory or a pad" % (path, input_file.GetName(), o.ClassName()))
+    return [Candidate(p.GetName(), p.GetTitle(), None, p.ClassName(), lambda p=p: p)
+            for p in o.GetListOfPrimitives()]
+
+def _keys(directory):
+    return [Candidate(k.GetName(), k.GetTitle(), k.GetCycle(), k.GetClassName(), k.ReadObj)
+            for k in directory.GetListOfKeys()]
+
+def extract(rules):
+    """apply the rules: each source and each destination file is opened once"""
+    import ROOT as R
+    R.gROOT.SetBatch(True)
+    sources, destinations = collections.OrderedDict(), collections.OrderedDict()
+    source_names = unique(r.source for r in rules)
+    destination_names = unique(r.destination for r in rules)
+    with tracing.span('extract', figure=' '.join(os.path.basename(d) for d in destination_names),
+                      input=' '.join(source_names)) as s:
+        try:
+            for name in source_names:
+                sources[name] = R.TFile.Open(name)
+                if not sources[name] or sources[name].IsZombie():
+                    raise IOError("cannot open %s" % name)
+            for name in destination_names:
+                output_dir = os.path.dirname(name)
+                if output_dir and not os.path.exists(output_dir) : os.makedirs(output_dir)
+                destinations[name] = R.TFile.Open(name, 'recreate')
+            listings = {}
+            written = collections.defaultdict(set)
+            inherits = {}
+            for r in rules:
+                if (r.source, r.path) not in listings:
+                    listings[(r.source, r.path)] = list_objects(sources[r.source], r.path)
+                selected = [c for c in listings[(r.source, r.path)]
+                            if matches(r.name, c.name) and matches(r.title, c.title)
+                            and (r.cycle is None or c.cycle==r.cycle)]
+                if r.class_name:
+                    for c in selected:
+                        if c.class_name not in inherits:
+                            inherits[c.class_name] = R.TClass.GetClass(c.class_name)
+                    selected = [c for c in selected
+                                if inherits[c.class_name] and inherits[c.class_name].InheritsFrom(r.class_name)]
+                if not selected:
+                    raise KeyError("%s: nothing matches %s" % (r.source, describe(r)))
+                for c in selected:
+                    target = r.target.format(name=c.name, title=c.title, cycle=c.cycle)
+                    if target in written[r.destination]:
+                        raise ValueError("%s: %s written twice (%s)" % (r.destination, target, describe(r)))
+                    written[r.destination].add(target)
+                    o = c.read()
+                    o.SetName(target)
+                    destinations[r.destination].cd()
+                    o.Write()
+                    s.add(objects=1, points=o.GetN() if hasattr(o, 'GetN') else 0)
+                    if tracing.verbose() : tracing.debug("%s: %s -> %s:%s" % (r.source, c.name, r.destination, target))
+        finally:
+            for f in destinations.values() + sources.values():
+                if f : f.Close()
+        s.add(bytes=sum(os.path.getsize(d) for d in destination_names if os.path.exists(d)))
+
+def describe(r):
+    """the selection of a rule, for the error messages"""
+    selection = [(k, v) for k, v in [('path', r.path), ('name', r.name and ' | '.join(r.name)),
+                                     ('title', r.title and ' | '.join(r.title)), ('cycle', r.cycle),
+                                     ('class', r.class_name)] if v not in (None, '')]
+    return ', '.join('%s=%s' % kv for kv in selection) or 'everything'
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,239 @@
+#!/bin/env python
+
+# The figures of the paper, read from figures.json
+#
+# This replaces the case statements of run_all.sh (axis labels,
+# captions, file names, channels) and the lists of figures hard-coded
+# in the scripts. For each figure the registry says where its input
+# comes from and how it is prepared, how it is converted, the values
+# that fill the hepdata placeholders, and in which merged files (and
+# in which order) it goes. The fields of a figure override those of
+# its kind, which override the defaults; '{name}' in the file names
+# is replaced by the field 'name' of the figure (id, channel, region).
+#
+# The file is read and validated once, up front: a figure with a
+# missing field, an unknown kind, or a merged file listing an unknown
+# figure is reported before anything runs.
+#
+# Example:
+# > figure_registry.py                          # validate
+# > figure_registry.py list --kind limit1d
+# > figure_registry.py show figure_7_a
+#   registry = figure_registry.load()
+#   for fig in registry.select(kind='distribution'):
+#       fill_header.fill_file(fig.output, figure_registry.substitutions(fig))
+#
+# Oct 2026
+
+import argparse
+import collections
+import json
+import os
+import re
+import sys
+import extract_objects
+
+default_filename = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'figures.json')
+
+# how the input file of a figure is made (see make_figure.py)
+prepare_steps = ['format_input', 'extract', 'copy', 'acceptance_efficiency']
+# the placeholders left by hepdata_writer.py, and which field fills them
+placeholders = [
+    ('*qual: . : GIVE COLUMN EXPLANATIONS, IF YOU USED OVERLAYS', '*qual: . : ', 'columns'),
+    ('*location: Figure GIVE FIGURE NUMBER', '*location: ', 'id'),
+    ('*reackey: P P --> GIVE THE PRODUCTION PROCESSES', '*reackey: ', 'reackey'),
+    ('*obskey: GIVE KEY FOR Y-AXIS VARIABLE', '*obskey: ', 'obskey'),
+    ('*qual: RE : P P --> GIVE THE PRODUCTION PROCESSES + DECAYS (IF RELEVANT)', '*qual: RE : ', 'process'),
+    ]
+# the header lines written by hepdata_writer.py depend on the object; 'replace' gives, for each kind, the text to be replaced
+replaced_headers = [('xheader', '*xheader: '), ('yheader', '*yheader: '), ('dscomment', '*dscomment: ')]
+
+Figure = collections.namedtuple('Figure', ['id', 'kind', 'prepare', 'source', 'prepare_args', 'input', 'output',
+                                           'convert', 'roles', 'columns', 'obskey', 'reackey', 'process',
+                                           'xheader', 'yheader', 'caption', 'replace'])
+required_fields = ['prepare', 'input', 'output', 'columns', 'obskey', 'reackey', 'process', 'xheader', 'yheader', 'caption']
+path_fields = ['source', 'input', 'output']
+variable = re.compile(r'\{(\w+)\}')
+valid_id = re.compile(r'^[A-Za-z0-9_]+$')
+
+class RegistryError(ValueError):
+    pass
+
+def main():
+    parser = argparse.ArgumentParser(description='validate and query the figure registry')
+    parser.add_argument('action', nargs='?', default='validate', choices=['validate', 'list', 'show'])
+    parser.add_argument('figures', nargs='*', help='for show: figure ids')
+    parser.add_argument('-r', '--registry', default=default_filename, help='registry file')
+    parser.add_argument('--kind', help='for list: only the figures of this kind')
+    parser.add_argument('--prepare', help='for list: only the figures prepared with this step')
+    parser.add_argument('--merged', help='for list: the figures of this merged file, in order')
+    args = parser.parse_args()
+    try:
+        registry = load(args.registry)
+        if args.action=='validate':
+            print "%s: %d figures, merged files %s" % (args.registry, len(registry.figures), ', '.join(registry.merged))
+        elif args.action=='list':
+            print ' '.join(f.id for f in registry.select(kind=args.kind, prepare=args.prepare, merged=args.merged))
+        else:
+            for fig in registry.select(args.figures):
+                print json.dumps(fig._asdict(), indent=1)
+    except (RegistryError, KeyError) as e:
+        sys.exit(str(e))
+
+def _to_str(value):
+    """json gives unicode strings; the rest of the code (and ROOT) expects str"""
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    if isinstance(value, list):
+        return [_to_str(v) for v in value]
+    if isinstance(value, dict):
+        return collections.OrderedDict((_to_str(k), _to_str(v)) for k, v in value.iteritems())
+    return value
+
+def expand(value, variables):
+    """replace {name} by variables[name]; the other braces (e.g. latex) are left alone"""
+    if isinstance(value, list):
+        return [expand(v, variables) for v in value]
+    if isinstance(value, dict):
+        return collections.OrderedDict((k, expand(v, variables)) for k, v in value.iteritems())
+    if isinstance(value, str):
+        return variable.sub(lambda m: str(variables[m.group(1)]) if m.group(1) in variables else m.group(0), value)
+    return value
+
+class Registry(object):
+    def __init__(self, figures, merged, filename=''):
+        self.figures = figures # {id : Figure}, in the order of the file
+        self.merged = merged   # {merged file name : [ids]}
+        self.filename = filename
+    def select(self, ids=None, kind=None, prepare=None, merged=None):
+        """figures by id (KeyError if unknown), or those of a kind / preparation step / merged file"""
+        if ids:
+            unknown = [i for i in ids if i not in self.figures]
+            if unknown:
+                raise KeyError("unknown figure(s) %s; see figure_registry.py list" % ', '.join(unknown))
+            return [self.figures[i] for i in ids]
+        if merged is not None:
+            if merged not in self.merged:
+                raise KeyError("unknown merged file %s" % merged)
+            figures = [self.figures[i] for i in self.merged[merged]]
+        else:
+            figures = self.figures.values()
+        return [f for f in figures
+                if (kind is None or f.kind==kind) and (prepare is None or f.prepare==prepare)]
+    def built(self):
+        """the figures made here (not those from the other channels, only merged)"""
+        return [f for f in self.figures.values() if f.kind!='external']
+    def merged_figures(self):
+        """the ids of the figures in at least one merged file"""
+        ids = []
+        for parts in self.merged.values():
+            ids.extend(p for p in parts if p not in ids)
+        return ids
+    def merged_parts(self, name):
+        return [self.figures[i].output for i in self.merged[name]]
+
+def resolve(entry, kinds, defaults):
+    """the fields of a figure: defaults < kind < figure; the other keys are variables for {name}"""
+    record = dict(defaults)
+    kind = kinds.get(entry.get('kind'), {})
+    replace = collections.OrderedDict()
+    for source in [kind, entry]:
+        replace.update(source.get('replace', {}))
+        record.update((k, v) for k, v in source.iteritems() if k not in ('replace', 'comment'))
+    variables = dict((k, v) for k, v in record.iteritems() if isinstance(v, (str, int)))
+    record = dict((k, expand(v, variables)) for k, v in record.iteritems())
+    record['replace'] = expand(replace, variables)
+    record.setdefault('convert', {})
+    record.setdefault('prepare_args', [])
+    return Figure(**dict((f, record.get(f)) for f in Figure._fields))
+
+def validate(figures, merged, entries, kinds):
+    errors = []
+    ids = set()
+    for entry in entries:
+        fig_id = entry.get('id')
+        if not fig_id or not valid_id.match(fig_id):
+            errors.append("invalid figure id %r" % fig_id)
+        elif fig_id in ids:
+            errors.append("%s: defined twice" % fig_id)
+        ids.add(fig_id)
+        if entry.get('kind') not in kinds:
+            errors.append("%s: unknown kind %r" % (fig_id, entry.get('kind')))
+    outputs = {}
+    for fig in figures.values():
+        for f in path_fields:
+            value = getattr(fig, f)
+            if value and variable.search(value):
+                errors.append("%s: %s %s has an unknown {variable}" % (fig.id, f, value))
+        if fig.output in outputs:
+            errors.append("%s: same output as %s (%s)" % (fig.id, outputs[fig.output], fig.output))
+        outputs[fig.output] = fig.id
+        if fig.kind=='external':
+            continue
+        missing = [f for f in required_fields if not getattr(fig, f)]
+        if missing:
+            errors.append("%s: missing %s" % (fig.id, ', '.join(missing)))
+        if fig.prepare not in prepare_steps:
+            errors.append("%s: unknown preparation step %r" % (fig.id, fig.prepare))
+        elif fig.prepare!='acceptance_efficiency' and not fig.source:
+            errors.append("%s: missing source" % fig.id)
+        elif fig.prepare=='extract':
+            if not fig.prepare_args:
+                errors.append("%s: extract needs the rules in prepare_args" % fig.id)
+            for i, entry in enumerate(fig.prepare_args):
+                try:
+                    extract_objects.rule(entry, fig.source, fig.input)
+                except (ValueError, AttributeError, TypeError) as e:
+                    errors.append("%s: prepare_args[%d]: %s" % (fig.id, i, e))
+        unknown = [k for k in fig.convert if k not in ('y', 'overlay', 'stitch')]
+        if unknown or ('y' in fig.convert and 'overlay' in fig.convert):
+            errors.append("%s: convert takes one of 'y' and 'overlay', and 'stitch', not %s" % (fig.id, ', '.join(fig.convert)))
+        stitch = fig.convert.get('stitch', {})
+        if not isinstance(stitch, dict) or not all(isinstance(p, list) and p for p in stitch.values()):
+            errors.append("%s: convert.stitch must be {contour name : [piece names]}" % fig.id)
+        missing = [k for k, prefix in replaced_headers if k not in fig.replace]
+        if missing:
+            errors.append("%s: missing replace.%s" % (fig.id, ', replace.'.join(missing)))
+        if fig.roles is not None and not all(isinstance(r, list) and len(r)==2 and isinstance(r[1], dict) for r in fig.roles):
+            errors.append("%s: roles must be a list of [role, {signature field : value}]" % fig.id)
+    for name, parts in merged.iteritems():
+        unknown = [p for p in parts if p not in figures]
+        if unknown:
+            errors.append("merged file %s: unknown figure(s) %s" % (name, ', '.join(unknown)))
+        duplicated = sorted(set(p for p in parts if parts.count(p)>1))
+        if duplicated:
+            errors.append("merged file %s: %s listed more than once" % (name, ', '.join(duplicated)))
+    return errors
+
+_registries = {}
+
+def load(filename=default_filename):
+    """the registry in filename, read and validated once; RegistryError with all the problems found"""
+    filename = os.path.abspath(filename)
+    if filename in _registries:
+        return _registries[filename]
+    try:
+        with open(filename) as f:
+            content = _to_str(json.load(f, object_pairs_hook=collections.OrderedDict))
+    except (IOError, ValueError) as e:
+        raise RegistryError("cannot read %s: %s" % (filename, e))
+    entries = content.get('figures', [])
+    kinds = content.get('kinds', {})
+    defaults = content.get('defaults', {})
+    merged = content.get('merged', collections.OrderedDict())
+    figures = collections.OrderedDict((e.get('id'), resolve(e, kinds, defaults)) for e in entries)
+    errors = validate(figures, merged, entries, kinds)
+    if errors:
+        raise RegistryError("%s:\n%s" % (filename, '\n'.join(errors)))
+    _registries[filename] = Registry(figures, merged, filename)
+    return _registries[filename]
+
+def substitutions(fig):
+    """the (from, to) pairs filling the placeholders of output/<figure>.hep.dat (see fill_header.py)"""
+    pairs = [(template, prefix+getattr(fig, field)) for template, prefix, field in placeholders]
+    pairs.extend((fig.replace[field], prefix+getattr(fig, 'caption' if field=='dscomment' else field))
+                 for field, prefix in replaced_headers)
+    return pairs
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/bin/env python
+
+# Fill the placeholders left by hepconverter.py and drop its header/footer
+#
+# This replaces the chain of replace_string.py calls followed by the
+# two 'sed -i' of remove_header_footer: all the substitutions for a
+# figure are applied in a single pass (one regex alternation over all
+# the patterns), the header (everything up to the line '*comment:
+# CERN-LHC. INSERT ABSTRACT') and the '*E' footer are dropped, and the
+# file is read once and written once. A placeholder left unfilled
+# (e.g. 'GIVE FIGURE NUMBER') is an error.
+#
+# Example:
+# > fill_header.py output/figure_5.hep.dat \
+#       "*location: Figure GIVE FIGURE NUMBER" "*location: figure_5" \
+#       "*obskey: GIVE KEY FOR Y-AXIS VARIABLE" "*obskey: N"
+# > fill_header.py --batch substitutions.json
+# where substitutions.json is {"output/figure_5.hep.dat": [["from", "to"], ...], ...}
+#
+# Oct 2026
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+import tracing
+
+header_end = re.compile(r'\*comment: CERN-LHC. INSERT ABSTRACT')
+footer = re.compile(r'\*E$')
+placeholder = re.compile(r'GIVE [A-Z][A-Z ,\-+()]*|INSERT ABSTRACT')
+
+class TemplateError(ValueError):
+    pass
+
+def main():
+    parser = argparse.ArgumentParser(description='fill the hepconverter.py placeholders')
+    parser.add_argument('input', nargs='?', help='file to be modified in place')
+    parser.add_argument('replacements', nargs='*', help='pairs of "string from" "string to"')
+    parser.add_argument('--batch', help='json file with {filename: [[from, to], ...]}')
+    parser.add_argument('--keep-header', action='store_true', help='do not drop the header and footer')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of processes for --batch')
+    args = parser.parse_args()
+    if args.batch:
+        with open(args.batch) as batch_file:
+            jobs = json.load(batch_file).items()
+    elif args.input and len(args.replacements)%2==0:
+        pairs = args.replacements
+        jobs = [(args.input, zip(pairs[0::2], pairs[1::2]))]
+    else:
+        parser.print_help()
+        return
+    try:
+        fill_files(jobs, strip=not args.keep_header, processes=args.jobs)
+    except TemplateError as e:
+        sys.exit(str(e))
+
+def compile_substitutions(substitutions):
+    """one regex matching any of the patterns; the longest pattern wins when several match"""
+    substitutions = dict(substitutions)
+    patterns = sorted(substitutions.keys(), key=len, reverse=True)
+    regex = re.compile('|'.join(re.escape(p) for p in patterns)) if patterns else None
+    return regex, substitutions
+
+def strip_header_footer(lines, filename=''):
+    # same as sed -e '1,/*comment:\ CERN-LHC.\ INSERT ABSTRACT/d' -e '/*E$/d'
+    end = next((i for i, l in enumerate(lines) if i>0 and header_end.search(l)), None)
+    if end is None:
+        raise TemplateError("%s: cannot find the end of the header ('*comment: CERN-LHC. INSERT ABSTRACT')" % filename)
+    return [l for l in lines[end+1:] if not footer.search(l.rstrip('\n'))]
+
+def check_unfilled(lines, filename=''):
+    unfilled = ["%s:%d: %s" % (filename, i+1, l.strip()) for i, l in enumerate(lines) if placeholder.search(l)]
+    if unfilled:
+        raise TemplateError("unfilled placeholders:\n" + '\n'.join(unfilled))
+
+def fill(text, substitutions, strip=True, check=True, filename=''):
+    """apply all the substitutions in one pass; return the new text"""
+    regex, replacements = compile_substitutions(substitutions)
+    if regex:
+        text = regex.sub(lambda m: replacements[m.group(0)], text)
+    lines = text.splitlines(True)
+    if strip:
+        lines = strip_header_footer(lines, filename)
+        if check:
+            check_unfilled(lines, filename)
+    return ''.join(lines)
+
+def fill_file(filename, substitutions, output_filename=None, strip=True, check=True):
+    with tracing.span('fill_header', figure=os.path.basename(filename).replace('.hep.dat', '')) as s:
+        with open(filename) as input_file:
+            text = input_file.read()
+        text = fill(text, substitutions, strip=strip, check=check, filename=filename)
+        with open(output_filename or filename, 'w') as output_file:
+            output_file.write(text)
+        s.add(bytes=len(text))
+
+def _fill_file_job(args):
+    filename, substitutions, strip = args
+    try:
+        fill_file(filename, substitutions, strip=strip)
+    except TemplateError as e:
+        return str(e)
+
+def fill_files(jobs, strip=True, processes=1):
+    """fill several files, each one with its own substitutions; report all the errors at the end"""
+    jobs = [(f, s, strip) for f, s in jobs]
+    if processes>1:
+        pool = multiprocessing.Pool(processes)
+        errors = pool.map(_fill_file_job, jobs)
+        pool.close()
+        pool.join()
+    else:
+        errors = map(_fill_file_job, jobs)
+    errors = [e for e in errors if e]
+    if errors:
+        raise TemplateError('\n'.join(errors))
+
+if __name__=='__main__':
+    main()
@@ -11,116 +11,130 @@
 # Jan 2015
 
 import array
+import collections
 import os
+import sys
 import numpy as np
 import ROOT as r
+import tracing
+import root_arrays
+import figure_registry
 r.gROOT.SetBatch(True)
 
-input_dir = 'input_from_suneet'
-output_dir = 'input_formatted'
-
-figure_files = {
-    'figure_5': 'pred_DGWH_WH_CRSSZVFAKE_EM_DGWH_mEff.root',
-    'figure_6_a' : 'kinematics_SR_1jNOHt_Ht.root',
-    'figure_6_b' : 'kinematics_SR_23jNOHt_Ht.root',
-    'figure_6_c' : 'kinematics_SR_1jNOmtmax_mtmax.root',
-    'figure_6_d' : 'kinematics_SR_23jNOmtmax_mtmax.root',
-    'figure_6_e' : 'kinematics_SR_1jNOmlj_mlj.root',
-    'figure_6_f' : 'kinematics_SR_23jNOmljj_mljj.root',
-}
-
+# the figures, their input files and their roles are in figures.json (see figure_registry.py)
 
 def main():
-    if not os.path.exists(output_dir) : os.makedirs(output_dir)
-    for fig, input_filename in figure_files.iteritems():
-        print "processing ",fig
-        input_file = r.TFile.Open(os.path.join(input_dir, input_filename))                                  
-        output_file = r.TFile.Open(os.path.join(output_dir, fig+'.root'), 'recreate')
-        move_everything_from_canvas_to_base(input_file, output_file)
+    registry = figure_registry.load()
+    figures = registry.select(sys.argv[1:]) if len(sys.argv)>1 else registry.select(prepare='format_input')
+    errors = []
+    for fig in figures:
+        tracing.info("processing %s" % fig.id, figure=fig.id)
+        try:
+            format_figure(fig.id, fig.source, fig.input, roles=fig.roles)
+        except PrimitiveError as e:
+            tracing.error("%s: %s" % (fig.id, e), figure=fig.id)
+            errors.append(fig.id)
+    if errors:
+        sys.exit("failed: %s" % ' '.join(errors))
+
+def format_figure(fig, input_filename, output_filename, roles=None):
+    """write the objects of each role (default_roles if None) from the canvas in input_filename"""
+    output_dir = os.path.dirname(output_filename)
+    if output_dir and not os.path.exists(output_dir) : os.makedirs(output_dir)
+    with tracing.span('format_input', figure=fig) as s:
+        input_file = r.TFile.Open(input_filename)
+        output_file = r.TFile.Open(output_filename, 'recreate')
+        points = move_everything_from_canvas_to_base(input_file, output_file, roles=roles or default_roles)
         output_file.Write()
         output_file.Close()
         input_file.Close()
+        s.add(objects=len(points), points=sum(points.values()), bytes=os.path.getsize(output_filename))
 
-def move_everything_from_canvas_to_base(input_file, output_file, canvas_name='canvas', pad_name='canvas_1'):
+# each role is selected by a (partial) style signature; see PrimitiveIndex
+default_roles = [
+    ('bkg', {'fill_style' : 3004}),                   # error band
+    ('sig', {'line_color' : 616, 'line_style' : 2}),  # dashed magenta
+    ('dat', {'line_color' : 1, 'line_style' : 1}),    # black markers
+    ]
+# the roles that can match several copies of the same values (the data graph may be drawn more than once);
+# any other role must match exactly one object
+roles_with_copies = ['dat']
+
+def move_everything_from_canvas_to_base(input_file, output_file, canvas_name='canvas', pad_name='canvas_1', roles=default_roles):
+    """write the objects of each role; return {role : number of points}"""
     can = input_file.Get(canvas_name).FindObject(pad_name)
-    keys = [k.GetName() for k in can.GetListOfPrimitives()]
-    objects = [can.FindObject(k) for k in keys]
-    objects = [o for o in objects if o.InheritsFrom('TH1') or o.InheritsFrom('TGraph')]
-    bkg = get_bkg_error_band(objects)
-    sig = get_sig_graph(objects)
-    dat = clean_data_graph(get_data_graph(objects))
-    # print 'bkg ',print_entries(bkg)
-    # print 'sig ',print_entries(sig)
-    # print 'dat ',print_entries(dat)
-    
+    objects = PrimitiveIndex(can).resolve(roles)
+    if 'dat' in objects : clean_data_graph(objects['dat'])
+    if tracing.verbose():
+        for role, o in objects.iteritems() : tracing.debug("%s %s" % (role, print_entries(o)), role=role)
+    points = collections.OrderedDict((role, len(content(o))) for role, o in objects.iteritems())
+
     output_file.cd()
-    bkg.SetName('bkg')
-    sig.SetName('sig')
-    dat.SetName('dat')
-    for o in [bkg, sig, dat]:
+    for role, o in objects.iteritems():
+        o.SetName(role)
         if hasattr(o, 'SetDirectory') : o.SetDirectory(output_file)
         o.Write()
     output_file.Close()
-    # for k in keys:
-    #     o = can.FindObject(k)
-    #     if o.InheritsFrom('TH1') or o.InheritsFrom('TGraph'):
-    #         if hasattr(o, 'SetDirectory') : o.SetDirectory(output_file)
-    #         o.Write()
-    #         print o.GetName(),' ',o.ClassName(),'marker style ',o.GetMarkerStyle(),' size ',o.GetMarkerSize(),' line color ',o.GetLineColor(),' style ',o.GetLineStyle(),' fill style ',o.GetFillStyle(),''
-    # output_file.Close()
+    return points
 
 def print_entries(gr_or_h):
-    o = gr_or_h
-    values = ([o.GetY()[i] for i in range(o.GetN())] if o.InheritsFrom('TGraph') else
-              [o.GetBinContent(i+1) for i in range(o.GetNbinsX())] if o.InheritsFrom('TH1') else
-              [])
-    return values
-
-def get_bkg_error_band(objects, fill_style=3004):
-    obj = None
-    objects = [o for o in objects if o.GetFillStyle()==fill_style]
-    if len(objects)!=1:
-        print 'cannot find bkg'
-    else:
-        obj = objects[0]
-    return obj
-
-def get_sig_graph(objects, line_color=616, line_style=2):
-    obj = None
-    objects = [o for o in objects if o.GetLineColor()==line_color and o.GetLineStyle()==line_style]
-    if len(objects)!=1:
-        print 'cannot find sig'
-    else:
-        obj = objects[0]
-    return obj
-
-def get_data_graph(objects, marker_style=20, marker_color=1, line_color=1,  line_style=1):
-    obj = None
-    objects = [o for o in objects if o.GetLineColor()==line_color and o.GetLineStyle()==line_style]
+    values = root_arrays.values(gr_or_h)
+    return values.tolist() if values is not None else []
+
+class PrimitiveError(LookupError):
+    pass
+
+Signature = collections.namedtuple('Signature', ['class_name', 'fill_style', 'line_color', 'line_style', 'marker_style'])
+
+def signature(o):
+    return Signature(o.ClassName(), o.GetFillStyle(), o.GetLineColor(), o.GetLineStyle(), o.GetMarkerStyle())
+
+class PrimitiveIndex(object):
+    """The TH1 and TGraph primitives of a pad, grouped by style signature.
+
+    The primitives are read once; a role is resolved by matching its
+    criteria against the distinct signatures, not against each object.
+    """
+    def __init__(self, pad):
+        self.by_signature = collections.OrderedDict()
+        for o in pad.GetListOfPrimitives():
+            if o.InheritsFrom('TH1') or o.InheritsFrom('TGraph'):
+                self.by_signature.setdefault(signature(o), []).append(o)
+    def select(self, **criteria):
+        unknown = [k for k in criteria if k not in Signature._fields]
+        if unknown:
+            raise KeyError("unknown signature field(s) %s" % ', '.join(unknown))
+        return [o for sig, objects in self.by_signature.iteritems()
+                if all(getattr(sig, k)==v for k, v in criteria.iteritems())
+                for o in objects]
+    def resolve(self, roles=default_roles):
+        """{role : object} for a list of (role, criteria); PrimitiveError if a role is not found"""
+        return collections.OrderedDict((role, unique_object(self.select(**criteria), role,
+                                                            allow_copies=role in roles_with_copies))
+                                       for role, criteria in roles)
+
+def content(o):
+    """y values of a graph, bin contents of a histogram (views, not copies)"""
+    return root_arrays.values(o)
+
+def unique_object(objects, role='', allow_copies=False):
+    """the only object, or (with allow_copies) the first one if they are all copies of the same values"""
     if len(objects)<1:
-        print 'cannot find data'
-    elif len(objects)>1:
-        o = objects[0]
-        y_values = [[[o.GetY()[i] for i in range(o.GetN())]] for o in objects]
-        has_multiple_values = len([vs for vs in y_values[1:] if vs!=y_values[0]])>0
-        if has_multiple_values:
-            print 'warning, multiple data with multiple values : ',y_values
-        else:
-            obj = objects[0]
-    else:
-        obj = objects[0]
-    return obj
+        raise PrimitiveError('cannot find %s' % role)
+    if len(objects)>1 and not allow_copies:
+        raise PrimitiveError('multiple %s : %s' % (role, ', '.join(o.GetName() for o in objects)))
+    if len(objects)>1:
+        reference = content(objects[0])
+        if not all(np.array_equal(reference, content(o)) for o in objects[1:]):
+            raise PrimitiveError('multiple %s with different values : %s' % (role, ', '.join(o.GetName() for o in objects)))
+    return objects[0]
 
 def clean_data_graph(graph, default_zero_value=-10):
     """data points with 0 entries were set to a negative default value so
     that they wouldn't show up. Also drop the error on data."""
-    for i in range(graph.GetN()):
-        x, y = graph.GetX()[i], graph.GetY()[i]
-        exl, exh = graph.GetErrorXlow(i), graph.GetErrorXhigh(i)
-        if y==default_zero_value:
-            graph.SetPoint(i, x, 0.0)
-        graph.SetPointError(i, 0.0, 0.0, 0.0, 0.0)
-    return graph
+    y = root_arrays.graph_arrays(graph)[1]
+    root_arrays.set_graph(graph, y=np.where(y==default_zero_value, 0.0, y))
+    return root_arrays.zero_errors(graph)
 
 if __name__=='__main__':
     main()
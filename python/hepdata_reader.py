@@ -0,0 +1,277 @@
+#!/bin/env python
+
+# Read hepdata files lazily: memory-map the file, parse only what is asked for
+#
+# The dataset boundaries come from the index written by
+# merge_hepdata.py when it is there and up to date, otherwise from one
+# scan of the mapped file. The header lines of a dataset are parsed
+# when they are first needed (e.g. to select by obskey), and its
+# '*data:' block is converted to numpy arrays only when accessed, so
+# reading one figure does not cost a full parse and the memory does
+# not grow with the number of datasets.
+#
+# Example:
+# > hepdata_reader.py output/hepdata.hep.dat                 # list the datasets
+# > hepdata_reader.py output/hepdata.hep.dat -l figure_8_a   # print the data of one figure
+# and from python:
+#   with HepDataFile('output/hepdata.hep.dat') as hd:
+#       for d in hd.find(obskey='ACC'):
+#           x, y = d.data.xs[0].values, d.data.ys[0].values
+#       for xs, ys in hd[0].data_chunks():                  # a few MB of rows at a time
+#
+# Oct 2026
+
+import argparse
+import collections
+import fnmatch
+import json
+import mmap
+import os
+import re
+import string
+import numpy as np
+from hepdata_writer import Variable, Measurement, Dataset
+
+dataset_start = re.compile(r'^\*dataset:', re.M)
+location_line = re.compile(r'^\*location:[ \t]*(.*?)[ \t]*$', re.M)
+header_line = re.compile(r'^\*(\w+):[ \t]?(.*?)[ \t]*$')
+data_start = re.compile(r'^\*data:(.*)$', re.M)
+
+def main():
+    parser = argparse.ArgumentParser(description='inspect a hepdata file')
+    parser.add_argument('input')
+    parser.add_argument('-l', '--location', help='location (or glob pattern) to be printed')
+    parser.add_argument('-k', '--obskey', help='select by obskey')
+    parser.add_argument('-q', '--qualifier', help='select by qualifier name')
+    args = parser.parse_args()
+    with HepDataFile(args.input) as hd:
+        datasets = hd.find(location=args.location, obskey=args.obskey, qualifier=args.qualifier)
+        for d in datasets:
+            print "%-20s [%d, %d) %s" % (d.location, d.start, d.end, d.obskey)
+            if args.location:
+                data = d.data
+                for v in data.xs : print '  x', v.title, v.values
+                for m in data.ys : print '  y', m.title, m.values
+
+def find_datasets(buf, size=None):
+    """(location, start, end) of each dataset in buf (a string or an mmap)"""
+    size = len(buf) if size is None else size
+    starts = [m.start() for m in dataset_start.finditer(buf)]
+    ends = starts[1:] + [size]
+    datasets = []
+    for start, end in zip(starts, ends):
+        location = location_line.search(buf, start, end)
+        dataend = buf.find('*dataend:', start, end)
+        if dataend>=0:
+            newline = buf.find('\n', dataend, end)
+            end = newline+1 if newline>=0 else end
+        datasets.append((location.group(1) if location else '', start, end))
+    return datasets
+
+def read_index(filename):
+    """dataset boundaries from the index of merge_hepdata.py, or None if missing/out of date"""
+    index_filename = filename + '.index.json'
+    if not os.path.exists(index_filename):
+        return None
+    with open(index_filename) as index_file:
+        index = json.load(index_file)
+    if index.get('size')!=os.path.getsize(filename):
+        return None
+    return [(d['location'], d['start'], d['end']) for d in index['datasets']]
+
+class HepDataFile(object):
+    def __init__(self, filename, use_index=True):
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        size = os.path.getsize(filename)
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else ''
+        boundaries = read_index(filename) if use_index else None
+        self.boundaries = boundaries if boundaries is not None else find_datasets(self._map, size)
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        self.close()
+    def close(self):
+        if self._map : self._map.close()
+        self._file.close()
+    def __len__(self):
+        return len(self.boundaries)
+    def __getitem__(self, i):
+        location, start, end = self.boundaries[i]
+        return DatasetView(self._map, location, start, end)
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+    def locations(self):
+        return [b[0] for b in self.boundaries]
+    def find(self, location=None, obskey=None, qualifier=None, value=None):
+        """datasets matching all the given criteria; location can be a glob pattern"""
+        selected = []
+        for loc, start, end in self.boundaries:
+            if location is not None and not fnmatch.fnmatchcase(loc, location):
+                continue
+            d = DatasetView(self._map, loc, start, end)
+            if obskey is not None and d.obskey!=obskey:
+                continue
+            if qualifier is not None and not d.has_qualifier(qualifier, value):
+                continue
+            selected.append(d)
+        return selected
+
+class DatasetView(object):
+    """one dataset of a mapped file; nothing is parsed until it is needed"""
+    def __init__(self, buf, location, start, end):
+        self._buf = buf
+        self.location = location
+        self.start = start
+        self.end = end
+        self._header = None
+    @property
+    def text(self):
+        return self._buf[self.start:self.end]
+    def _data_offset(self):
+        m = data_start.search(self._buf, self.start, self.end)
+        return m.start() if m else self.end
+    @property
+    def header(self):
+        """{keyword: [values]} of the lines before '*data:'"""
+        if self._header is None:
+            header = collections.OrderedDict()
+            for line in self._buf[self.start:self._data_offset()].splitlines():
+                m = header_line.match(line)
+                if m:
+                    header.setdefault(m.group(1), []).append(m.group(2))
+            self._header = header
+        return self._header
+    @property
+    def obskey(self):
+        return self.header.get('obskey', [''])[0]
+    @property
+    def qualifiers(self):
+        """[(name, value)] from the '*qual: name : value' lines"""
+        return [tuple(p.strip() for p in q.split(':', 1)) if ':' in q else (q.strip(), '')
+                for q in self.header.get('qual', [])]
+    def has_qualifier(self, name, value=None):
+        return any(n==name and (value is None or v==value) for n, v in self.qualifiers)
+    def _data_block(self):
+        """the kinds of the columns, and the [start, end) of the rows of the '*data:' block; None without one"""
+        m = data_start.search(self._buf, self.start, self.end)
+        if not m:
+            return None
+        block_start = m.end()+1
+        block_end = self._buf.find('*dataend:', block_start, self.end)
+        return [k.strip() for k in m.group(1).split(':')], block_start, block_end if block_end>=0 else self.end
+    @property
+    def kinds(self):
+        """the kinds ('x' or 'y') of the columns of the '*data:' block"""
+        block = self._data_block()
+        return block[0] if block else []
+    @property
+    def data(self):
+        """the '*data:' block as a hepdata_writer.Dataset of numpy arrays (parsed at each access)"""
+        block = self._data_block()
+        if not block:
+            return Dataset(self.location, '', [], [])
+        kinds, block_start, block_end = block
+        xs, ys = parse_data(self._buf[block_start:block_end], kinds)
+        x_titles = split_titles(self.header.get('xheader', [''])[0], len(xs))
+        y_titles = split_titles(self.header.get('yheader', [''])[0], len(ys))
+        xs = [v._replace(title=t) for v, t in zip(xs, x_titles)]
+        ys = [v._replace(title=t) for v, t in zip(ys, y_titles)]
+        return Dataset(self.location, self.header.get('dscomment', [''])[0], xs, ys)
+    def data_chunks(self, size=1<<23):
+        """the rows of the '*data:' block as (xs, ys) columns (see parse_data), about size bytes of text
+        at a time, so that a dataset of any size is read in bounded memory"""
+        block = self._data_block()
+        if not block:
+            return
+        kinds, start, end = block
+        while start<end:
+            stop = self._buf.find('\n', start+size, end) if end-start>size else -1
+            stop = end if stop<0 else stop+1
+            xs, ys = parse_data(self._buf[start:stop], kinds)
+            if xs or ys:
+                yield xs, ys
+            start = stop
+
+def split_titles(header, n):
+    titles = [t.strip() for t in header.split(' : ')] if header else []
+    return (titles + ['']*n)[:n]
+
+number = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+token_patterns = [ # (layout, regex), the first match wins
+    ('bin', re.compile(r'^\s*(%s)\s*\(BIN=\s*(%s)\s+TO\s+(%s)\s*\)\s*$' % (number, number, number))),
+    ('range', re.compile(r'^\s*(%s)\s+TO\s+(%s)\s*$' % (number, number))),
+    ('sym', re.compile(r'^\s*(%s)\s*\+-\s*(%s)\s*$' % (number, number))),
+    ('asym', re.compile(r'^\s*(%s)\s*\+\s*(%s)\s*,?\s*-\s*(%s)\s*$' % (number, number, number))), # the comma is optional
+    ('plain', re.compile(r'^\s*(%s)\s*$' % number)),
+    ]
+delimiters = ['(BIN=', 'TO', '+-'] # and the characters of separators, all replaced by spaces
+separators = string.maketrans(';,()', '    ')
+
+def numbers(text):
+    """the numbers of a block whose rows all have the same layout, in order"""
+    for d in delimiters:
+        text = text.replace(d, ' ')
+    return np.array(text.translate(separators).split(), dtype=np.float64)
+
+def delimiter_counts(text):
+    return [text.count(d) for d in delimiters+[';']]
+
+def token_layout(token):
+    for layout, regex in token_patterns:
+        m = regex.match(token)
+        if m:
+            return layout, [float(g) for g in m.groups()]
+    raise ValueError("cannot parse '%s'" % token)
+
+def canonical(layout, values):
+    """(value, low, high) of a token: the bin edges for x, the errors (minus, plus) for y"""
+    if layout=='bin':
+        return values
+    if layout=='range':
+        return [0.5*(values[0]+values[1]), values[0], values[1]]
+    if layout=='sym':
+        return [values[0], values[1], values[1]]
+    if layout=='asym':
+        return [values[0], np.abs(values[2]), values[1]]
+    return [values[0], np.nan*values[0], np.nan*values[0]]
+
+def parse_data(block, kinds):
+    """columns of a '*data:' block; all the rows are converted at once when they share the
+    layout of the first one (the usual case), otherwise row by row"""
+    rows = [l for l in block.splitlines() if l.strip()]
+    if not rows:
+        return [], []
+    text = '\n'.join(rows)
+    layouts = [token_layout(t)[0] for t in rows[0].split(';') if t.strip()] # the layout of the first row...
+    widths = [3 if l in ('bin', 'asym') else 2 if l in ('sym', 'range') else 1 for l in layouts]
+    try:
+        table = numbers(text)
+    except ValueError:
+        table = None
+    # ...is the one of all the rows when they have as many numbers and delimiters
+    if (table is not None and table.size==len(rows)*sum(widths)
+        and delimiter_counts(text)==[len(rows)*c for c in delimiter_counts(rows[0])]):
+        table = table.reshape(len(rows), sum(widths))
+        offsets = np.cumsum([0]+widths)
+        columns = [canonical(l, [table[:, o+k] for k in range(w)]) for l, w, o in zip(layouts, widths, offsets)]
+    else:
+        tokens = [[canonical(*token_layout(t)) for t in row.split(';') if t.strip()] for row in rows]
+        if len(set(len(r) for r in tokens))!=1:
+            raise ValueError("rows with a different number of columns")
+        table = np.array(tokens, dtype=np.float64) # (rows, columns, 3)
+        columns = [[table[:, c, k] for k in range(3)] for c in range(table.shape[1])]
+    xs, ys = [], []
+    for kind, (values, low, high) in zip(kinds, columns):
+        if kind=='x':
+            has_bins = not np.all(np.isnan(low))
+            xs.append(Variable('', values, low if has_bins else None, high if has_bins else None))
+        else:
+            has_errors = not np.all(np.isnan(low))
+            ys.append(Measurement('', values, np.nan_to_num(low) if has_errors else None,
+                                  np.nan_to_num(high) if has_errors else None))
+    return xs, ys
+
+if __name__=='__main__':
+    main()
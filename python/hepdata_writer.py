@@ -0,0 +1,213 @@
+#!/bin/env python
+
+# Write TGraph/TGraphAsymmErrors/TH1/TGraph2D objects in the hepdata input format
+#
+# In-repo replacement for HepDataTools/hepconverter.py, with the same
+# command-line options and the same output template, so that the
+# placeholders can be filled with fill_header.py. The coordinates and
+# errors are read from the ROOT buffers as whole arrays (root_arrays.py)
+# and the '*data:' block is formatted in chunks of rows (one format
+# string per chunk), so that graphs with millions of points do not
+# need one python string per point.
+#
+# Example:
+# > hepdata_writer.py -i input_formatted/figure_5.root -y sig dat bkg -o output/figure_5
+# > hepdata_writer.py -i input_formatted/figure_7_a.root --overlay exp obs -o output/figure_7_a
+# > hepdata_writer.py -i input_acc_eff/acceptance_sr1jee.root -o output/figure_app_8_a
+# > hepdata_writer.py -i input_formatted/figure_8_a.root --stitch WhMediated_expected WhMediated_expected_1 WhMediated_expected_2 -o output/figure_8_a
+#
+# Oct 2026
+
+import argparse
+import collections
+import os
+import numpy as np
+import tracing
+from root_arrays import graph_arrays, graph2d_arrays, histogram_arrays
+
+# an independent variable (x); bin_low/bin_high are None when there are no bins
+Variable = collections.namedtuple('Variable', ['title', 'values', 'bin_low', 'bin_high'])
+# a dependent variable (y); err_minus/err_plus are None when there are no errors,
+# and the same array when they are symmetric
+Measurement = collections.namedtuple('Measurement', ['title', 'values', 'err_minus', 'err_plus'])
+Dataset = collections.namedtuple('Dataset', ['name', 'title', 'xs', 'ys'])
+
+header_template = '''*author: GIVE FIRST AUTHOR
+*reference: GIVE PREPRINT NUMBER
+*experiment: CERN-LHC-ATLAS
+*detector: ATLAS
+*title: GIVE PAPER TITLE
+*comment: CERN-LHC. INSERT ABSTRACT
+'''
+footer_template = '*E\n'
+
+chunk_size = 65536 # rows formatted with a single format string
+
+def main():
+    parser = argparse.ArgumentParser(description='convert ROOT objects to the hepdata input format')
+    parser.add_argument('-i', '--input', nargs='+', required=True, help='input root files')
+    parser.add_argument('-o', '--output', required=True, help='output name (.hep.dat is appended)')
+    parser.add_argument('-y', nargs='+', help='objects to be written as y columns of one dataset, in this order')
+    parser.add_argument('--overlay', nargs='+', help='name prefixes of the objects to be overlaid in one dataset')
+    parser.add_argument('--stitch', nargs='+', action='append', metavar=('NAME', 'PIECE'),
+                        help='write the contour pieces (TGraphs) as one dataset NAME (see contours.py); can be repeated')
+    parser.add_argument('--sqrts', type=float, default=8000.0, help='centre-of-mass energy in GeV')
+    parser.add_argument('--columnar', action='store_true', help='also write the columns as .npy files (see columnar.py)')
+    args = parser.parse_args()
+    stitch = collections.OrderedDict((s[0], s[1:]) for s in args.stitch or [])
+    datasets = convert(args.input, args.output, y=args.y, overlay=args.overlay, stitch=stitch, sqrts=args.sqrts)
+    if args.columnar:
+        import columnar
+        source = os.path.basename(columnar.directory_name(args.output))[:-len(columnar.suffix)] + '.hep.dat'
+        columnar.write(columnar.directory_name(args.output), datasets, source=source)
+
+def convert(input_filenames, output_name, y=None, overlay=None, stitch=None, sqrts=8000.0):
+    """read the objects from the input files and write output_name.hep.dat; return the datasets"""
+    import ROOT as r
+    r.gROOT.SetBatch(True)
+    output_filename = output_name if output_name.endswith('.hep.dat') else output_name+'.hep.dat'
+    with tracing.span('hepdata_writer', figure=os.path.basename(output_filename)[:-len('.hep.dat')]) as s:
+        datasets = []
+        for input_filename in input_filenames:
+            input_file = r.TFile.Open(input_filename)
+            if not input_file or input_file.IsZombie():
+                raise IOError("cannot open %s" % input_filename)
+            objects = [k.ReadObj() for k in input_file.GetListOfKeys()]
+            objects = [o for o in objects if o.InheritsFrom('TH1') or o.InheritsFrom('TGraph') or o.InheritsFrom('TGraph2D')]
+            datasets.extend(select_datasets(objects, y=y, overlay=overlay, stitch=stitch))
+            input_file.Close()
+        output_dir = os.path.dirname(output_filename)
+        if output_dir and not os.path.exists(output_dir) : os.makedirs(output_dir)
+        with open(output_filename, 'w') as output_file:
+            write(output_file, datasets, sqrts=sqrts)
+        s.add(objects=sum(len(d.ys) for d in datasets),
+              points=sum(len(m.values) for d in datasets for m in d.ys),
+              bytes=os.path.getsize(output_filename))
+    return datasets
+
+def select_datasets(objects, y=None, overlay=None, stitch=None):
+    """one dataset with the y/overlay objects as columns, or one dataset per object
+    (per stitched contour for the pieces listed in stitch, {name : [piece names]})"""
+    by_name = dict((o.GetName(), o) for o in objects)
+    if y:
+        missing = [n for n in y if n not in by_name]
+        if missing:
+            raise KeyError("missing object(s) %s; available: %s" % (', '.join(missing), ', '.join(sorted(by_name))))
+        return [overlay_dataset([by_name[n] for n in y])]
+    if overlay:
+        selected = []
+        for prefix in overlay:
+            matches = [o for o in objects if o.GetName().startswith(prefix)]
+            if len(matches)!=1:
+                raise KeyError("expected one object starting with '%s', found %d" % (prefix, len(matches)))
+            selected.append(matches[0])
+        return [overlay_dataset(selected)]
+    datasets = [to_dataset(o) for o in objects]
+    return stitch_datasets(datasets, stitch) if stitch else datasets
+
+def stitch_datasets(datasets, stitch):
+    """the datasets of the pieces of each contour replaced by one, where the first piece was"""
+    import contours
+    by_name = dict((d.name, d) for d in datasets)
+    missing = [p for parts in stitch.values() for p in parts if p not in by_name]
+    if missing:
+        raise KeyError("missing contour piece(s) %s; available: %s" % (', '.join(missing), ', '.join(sorted(by_name))))
+    first = dict((parts[0], name) for name, parts in stitch.items())
+    pieces = set(p for parts in stitch.values() for p in parts)
+    result = []
+    for d in datasets:
+        if d.name in first:
+            name = first[d.name]
+            x, y = contours.merge([(by_name[p].xs[0].values, by_name[p].ys[0].values) for p in stitch[name]])
+            result.append(Dataset(name, d.title, [Variable(d.xs[0].title, x, None, None)],
+                                  [Measurement(d.ys[0].title, y, None, None)]))
+        elif d.name not in pieces:
+            result.append(d)
+    return result
+
+def axis_title(obj, axis):
+    a = getattr(obj, 'Get%saxis' % axis)()
+    return a.GetTitle() if a else ''
+
+def to_dataset(obj):
+    """single-object dataset"""
+    if obj.InheritsFrom('TGraph2D'):
+        x, y, z, ezl, ezh = graph2d_arrays(obj)
+        xs = [Variable('', x, None, None), Variable('', y, None, None)]
+        return Dataset(obj.GetName(), obj.GetTitle(), xs, [Measurement('', z, ezl, ezh)])
+    return overlay_dataset([obj])
+
+def overlay_dataset(objects):
+    """dataset with one y column per object; all the objects must have the same x values"""
+    reference = objects[0]
+    ys = []
+    x_var = None
+    for obj in objects:
+        if obj.InheritsFrom('TH1'):
+            x, lo, hi, y, ey = histogram_arrays(obj)
+            xvar, meas = Variable(axis_title(obj, 'X'), x, lo, hi), Measurement(axis_title(obj, 'Y'), y, ey, ey)
+        elif obj.InheritsFrom('TGraph'):
+            x, y, exl, exh, eyl, eyh = graph_arrays(obj)
+            has_bins = exl is not None and (np.any(exl) or np.any(exh))
+            xvar = Variable(axis_title(obj, 'X'), x, x-exl if has_bins else None, x+exh if has_bins else None)
+            meas = Measurement(axis_title(obj, 'Y'), y, eyl, eyh)
+        else:
+            raise TypeError("cannot convert %s (%s)" % (obj.GetName(), obj.ClassName()))
+        if x_var is None:
+            x_var = xvar
+        elif len(xvar.values)!=len(x_var.values) or not np.allclose(xvar.values, x_var.values):
+            raise ValueError("cannot overlay %s and %s: different x values" % (reference.GetName(), obj.GetName()))
+        elif x_var.bin_low is None and xvar.bin_low is not None:
+            x_var = xvar # prefer the binning of the histograms/error bands
+        ys.append(meas)
+    return Dataset(reference.GetName(), reference.GetTitle(), [x_var], ys)
+
+def x_column(var):
+    if var.bin_low is None:
+        return '%.4g; ', [var.values]
+    return '%.4g (BIN=%.4g TO %.4g); ', [var.values, var.bin_low, var.bin_high]
+
+def y_column(meas):
+    """the errors as the object has them: symmetric ones (err_minus is err_plus, e.g. a TH1) as '+-',
+    asymmetric ones as '+a,-b', on every row (also '0 +- 0'); none when they are all zero"""
+    minus, plus = meas.err_minus, meas.err_plus
+    if minus is None:
+        return '%.4g; ', [meas.values]
+    if minus is plus:
+        return '%.4g +- %.4g; ', [meas.values, plus]
+    if not np.any(minus) and not np.any(plus):
+        return '%.4g; ', [meas.values]
+    return '%.4g +%.4g,-%.4g; ', [meas.values, plus, minus]
+
+def write_data(output, dataset):
+    """the '*data:' block, formatted one chunk of rows at the time (4 significant digits, as hepconverter.py)"""
+    formats, columns = zip(*([x_column(v) for v in dataset.xs] + [y_column(m) for m in dataset.ys]))
+    row_format = ' ' + ''.join(formats).rstrip(' ') + '\n'
+    table = np.column_stack([np.asarray(c, dtype=np.float64) for cs in columns for c in cs])
+    output.write('*data: %s\n' % ' : '.join(['x']*len(dataset.xs) + ['y']*len(dataset.ys)))
+    for start in range(0, len(table), chunk_size):
+        block = table[start:start+chunk_size]
+        output.write((row_format*len(block)) % tuple(block.ravel().tolist()))
+    output.write('*dataend:\n')
+
+def write_dataset(output, dataset, sqrts=8000.0):
+    output.write('\n\n*dataset:\n')
+    output.write('*location: Figure GIVE FIGURE NUMBER\n')
+    output.write('*dscomment: %s\n' % dataset.title)
+    output.write('*reackey: P P --> GIVE THE PRODUCTION PROCESSES\n')
+    output.write('*obskey: GIVE KEY FOR Y-AXIS VARIABLE\n')
+    output.write('*qual: . : GIVE COLUMN EXPLANATIONS, IF YOU USED OVERLAYS\n')
+    output.write('*qual: RE : P P --> GIVE THE PRODUCTION PROCESSES + DECAYS (IF RELEVANT)\n')
+    output.write('*qual: SQRT(S) IN GEV : %s\n' % sqrts)
+    output.write('*yheader: %s\n' % ' : '.join(m.title for m in dataset.ys))
+    output.write('*xheader: %s\n' % ' : '.join(v.title for v in dataset.xs))
+    write_data(output, dataset)
+
+def write(output, datasets, sqrts=8000.0):
+    output.write(header_template)
+    for d in datasets:
+        write_dataset(output, d, sqrts=sqrts)
+    output.write(footer_template)
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,310 @@
+#!/bin/env python
+
+# Linear interpolation of values given on scattered (x, y) points
+#
+# This is what TGraph2D does when it is drawn with 'colz': a Delaunay
+# triangulation of the points, then linear interpolation inside each
+# triangle. TGraph2D redoes the triangulation for each graph. Here it
+# is computed once per set of points (Bowyer-Watson, on coordinates
+# scaled to the unit square like TGraphDelaunay does, inserting the
+# points along a Hilbert curve so that each one only touches the few
+# triangles around it: linear in the number of points) and cached,
+# together with the inverse affine map of each triangle and a bucket
+# index of the triangles. Locating the bins of an output grid is also
+# done once per grid. The maps of all the regions, and of both
+# acceptance and efficiency, share the same mass points, so each map
+# then costs only a gather and a weighted sum. Nothing here depends
+# on ROOT.
+#
+# There is no value outside the convex hull of the points: it is nan
+# in the dense map, and the sparse map has no entry there.
+#
+# Example:
+#   interp = Interpolator(mc1, mn1)                   # triangulated once
+#   grid = Grid(100, 130., 270., 100, 0., 80.)
+#   z = interp.dense(acceptance[:, i], grid)          # (ny, nx), nan outside
+#   bins, z = interp.sparse(acceptance[:, i], grid)   # flat bin indices (iy*nx+ix) inside the hull
+#
+# Oct 2026
+
+import collections
+import hashlib
+import numpy as np
+
+tolerance = 1e-10 # relative, for the in-circle and in-triangle tests
+super_triangle_size = 1000.0 # in units of the (scaled) range of the points
+
+class Grid(collections.namedtuple('Grid', ['nx', 'xmin', 'xmax', 'ny', 'ymin', 'ymax'])):
+    """regular binning, as the one of a TH2"""
+    def x_centers(self):
+        width = (self.xmax-self.xmin)/float(self.nx)
+        return self.xmin + width*(np.arange(self.nx)+0.5)
+    def y_centers(self):
+        width = (self.ymax-self.ymin)/float(self.ny)
+        return self.ymin + width*(np.arange(self.ny)+0.5)
+    def centers(self):
+        """x, y of all the bins, flattened as iy*nx+ix"""
+        x, y = np.meshgrid(self.x_centers(), self.y_centers())
+        return x.ravel(), y.ravel()
+
+def hilbert_order(x, y, bits=16):
+    """the order of the points (coordinates in [0, 1]) along a Hilbert curve: consecutive points are close"""
+    side = 1<<bits
+    ix = np.clip((np.asarray(x)*(side-1)).astype(np.int64), 0, side-1)
+    iy = np.clip((np.asarray(y)*(side-1)).astype(np.int64), 0, side-1)
+    d = np.zeros(len(ix), dtype=np.int64)
+    s = side>>1
+    while s:
+        rx, ry = (ix & s)>0, (iy & s)>0
+        d += s*s*((3*rx) ^ ry)
+        flip = ~ry & rx
+        ix[flip], iy[flip] = side-1-ix[flip], side-1-iy[flip]
+        swap = ~ry
+        ix[swap], iy[swap] = iy[swap], ix[swap]
+        s >>= 1
+    return np.argsort(d, kind='mergesort')
+
+def delaunay(x, y):
+    """triangles (n, 3) of the Delaunay triangulation of distinct points (Bowyer-Watson);
+    the coordinates should be of order 1 (see Triangulation)"""
+    n = len(x)
+    # a super-triangle well outside the unit square, its triangles are dropped at the end;
+    # too close, it would hide the thin triangles along the hull
+    m = super_triangle_size
+    px = np.concatenate([x, [-m, 2*m+2, -m]]).tolist()
+    py = np.concatenate([y, [-m, -m, 2*m+2]]).tolist()
+    shrink = 1.0-tolerance
+    # the triangles (counter-clockwise), the neighbour across the edge opposite to each vertex
+    # (-1 on the super-triangle), and their circumcircles; the places of the triangles of a
+    # cavity are reused by the next points
+    vertices, neighbours, alive = [(n, n+1, n+2)], [[-1, -1, -1]], [True]
+    circles = [circumcircle(px, py, n, n+1, n+2)]
+    free, last = [], 0
+    # inserted along a Hilbert curve, each point is found by walking from the last triangle made for
+    # the previous one, and its cavity is grown from there through the neighbours: a few triangles per point
+    for i in hilbert_order(x, y).tolist():
+        qx, qy = px[i], py[i]
+        seed = walk(px, py, vertices, neighbours, last, qx, qy)
+        if seed<0:
+            seed = next(t for t in xrange(len(vertices)) if alive[t] and
+                        (circles[t][0]-qx)**2 + (circles[t][1]-qy)**2 < circles[t][2]*shrink)
+        # the triangles whose circumcircle contains the new point form a cavity...
+        cavity, stack = set([seed]), [seed]
+        while stack:
+            for t in neighbours[stack.pop()]:
+                if t>=0 and t not in cavity:
+                    ux, uy, r2 = circles[t]
+                    if (ux-qx)*(ux-qx) + (uy-qy)*(uy-qy) < r2*shrink:
+                        cavity.add(t)
+                        stack.append(t)
+        while True:
+            # ...whose boundary must be seen from the point (rounding can leave out a triangle)
+            boundary, missing = [], []
+            for t in cavity:
+                va, vb, vc = vertices[t]
+                for a, b, other in ((vb, vc, neighbours[t][0]), (vc, va, neighbours[t][1]), (va, vb, neighbours[t][2])):
+                    if other in cavity:
+                        continue
+                    if other<0 or (px[b]-px[a])*(qy-py[a]) - (py[b]-py[a])*(qx-px[a]) > 0:
+                        boundary.append((a, b, other, t))
+                    else:
+                        missing.append(other)
+            if not missing:
+                break
+            cavity.update(missing)
+        # ...that is replaced by the triangles joining its boundary to the point
+        from_vertex, to_vertex = {}, {}
+        for a, b, other, old in boundary:
+            if free:
+                t = free.pop()
+                vertices[t], neighbours[t], alive[t] = (a, b, i), [-1, -1, other], True
+                circles[t] = circumcircle(px, py, a, b, i)
+            else:
+                t = len(vertices)
+                vertices.append((a, b, i))
+                neighbours.append([-1, -1, other])
+                alive.append(True)
+                circles.append(circumcircle(px, py, a, b, i))
+            if other>=0:
+                around = neighbours[other]
+                around[around.index(old)] = t
+            from_vertex[a] = to_vertex[b] = last = t
+        for a, b, other, old in boundary:
+            around = neighbours[from_vertex[a]]
+            around[0], around[1] = from_vertex[b], to_vertex[a]
+        for t in cavity:
+            alive[t] = False
+        free.extend(cavity)
+    triangles = np.array(vertices, dtype=np.int64)[np.array(alive)]
+    triangles = triangles[(triangles<n).all(axis=1)]
+    return np.concatenate([triangles, hull_triangles(px, py, triangles)])
+
+def hull_triangles(px, py, triangles):
+    """the triangles filling the dents of the boundary left by the super-triangle (thin triangles
+    between almost aligned points of the hull), so that the triangles cover the convex hull"""
+    edges = triangles[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2) # counter-clockwise: the inside is on the left
+    size = len(px)
+    outer = ~np.in1d(edges[:, 0]*size + edges[:, 1], edges[:, 1]*size + edges[:, 0])
+    following = dict(edges[outer].tolist())
+    if not following:
+        return np.zeros((0, 3), dtype=np.int64)
+    ring = [min(following)]
+    while len(ring)<len(following):
+        ring.append(following[ring[-1]])
+    added, changed = [], True
+    while changed and len(ring)>3:
+        changed, k = False, 0
+        while k<len(ring) and len(ring)>3:
+            u, v, w = ring[k-1], ring[k], ring[(k+1)%len(ring)]
+            dx, dy = px[w]-px[u], py[w]-py[u]
+            if (px[v]-px[u])*dy - (py[v]-py[u])*dx < -tolerance*(dx*dx + dy*dy): # v is inside the hull, not on it
+                added.append((u, w, v))
+                del ring[k]
+                changed = True
+            else:
+                k += 1
+    return np.array(added, dtype=np.int64).reshape(-1, 3)
+
+def circumcircle(px, py, a, b, c):
+    """centre and squared radius of the circle through the points a, b, c (counter-clockwise);
+    relative to a, with the same determinant as the orientation tests, so that it is positive"""
+    ax, ay = px[a], py[a]
+    bx, by, cx, cy = px[b]-ax, py[b]-ay, px[c]-ax, py[c]-ay
+    b2, c2 = bx*bx+by*by, cx*cx+cy*cy
+    d = 2.0*(bx*cy - by*cx)
+    ux, uy = (cy*b2 - by*c2)/d, (bx*c2 - cx*b2)/d
+    return ax+ux, ay+uy, ux*ux + uy*uy
+
+def walk(px, py, vertices, neighbours, start, qx, qy):
+    """the triangle containing the point, walking from start towards it; -1 if lost (degenerate cases)"""
+    t = start
+    for step in xrange(len(vertices)):
+        va, vb, vc = vertices[t]
+        edges = ((vb, vc), (vc, va), (va, vb))
+        for k in (step%3, (step+1)%3, (step+2)%3): # rotating the first edge avoids cycles
+            a, b = edges[k]
+            if (px[b]-px[a])*(qy-py[a]) - (py[b]-py[a])*(qx-px[a]) < 0:
+                t = neighbours[t][k]
+                break
+        else:
+            return t
+        if t<0:
+            return -1
+    return -1
+
+class Triangulation(object):
+    """Delaunay triangulation of the points, with what is needed to locate points and interpolate"""
+    def __init__(self, x, y):
+        x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        self.n_points = len(x)
+        self.scale = ((x.min(), max(x.max()-x.min(), 1e-300)), (y.min(), max(y.max()-y.min(), 1e-300)))
+        sx, sy = self.normalize(x, y)
+        # duplicated points would make a degenerate cavity: keep the first one
+        _, keep = np.unique(np.round(np.column_stack([sx, sy]), 12).view([('x', np.float64), ('y', np.float64)]).ravel(),
+                            return_index=True)
+        keep.sort()
+        triangles = delaunay(sx[keep], sy[keep])
+        if not len(triangles):
+            raise ValueError("cannot triangulate %d points: fewer than 3 distinct points, or all on a line" % len(x))
+        self.triangles = keep[triangles] # indices of the input points
+        self.x, self.y = sx, sy
+        self._affine()
+        self._buckets()
+    def normalize(self, x, y):
+        (x0, dx), (y0, dy) = self.scale
+        return (np.asarray(x, dtype=np.float64)-x0)/dx, (np.asarray(y, dtype=np.float64)-y0)/dy
+    def _affine(self):
+        """for each triangle, vertex 0 and the inverse of [[x1-x0, x2-x0], [y1-y0, y2-y0]]"""
+        t = self.triangles
+        self.x0, self.y0 = self.x[t[:, 0]], self.y[t[:, 0]]
+        a, b = self.x[t[:, 1]]-self.x0, self.x[t[:, 2]]-self.x0
+        c, d = self.y[t[:, 1]]-self.y0, self.y[t[:, 2]]-self.y0
+        det = a*d - b*c
+        self.inverse = np.column_stack([d/det, -b/det, -c/det, a/det])
+    def _buckets(self):
+        """a regular grid of buckets over the unit square, each one listing the triangles overlapping it"""
+        t = self.triangles
+        m = self.n_buckets = max(1, int(np.sqrt(len(t))))
+        tx, ty = self.x[t], self.y[t]
+        def cell(v):
+            return np.clip((v*m).astype(np.int64), 0, m-1)
+        ix0, ix1 = cell(tx.min(axis=1)), cell(tx.max(axis=1))
+        iy0, iy1 = cell(ty.min(axis=1)), cell(ty.max(axis=1))
+        nx = ix1-ix0+1
+        counts = nx*(iy1-iy0+1)
+        tri = np.repeat(np.arange(len(t)), counts)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts)-counts, counts)
+        cells = (iy0[tri] + k//nx[tri])*m + ix0[tri] + k%nx[tri]
+        order = np.argsort(cells, kind='mergesort')
+        self.bucket_triangles = tri[order]
+        sorted_cells = cells[order]
+        self.bucket_start = np.searchsorted(sorted_cells, np.arange(m*m))
+        self.bucket_end = np.searchsorted(sorted_cells, np.arange(m*m), side='right')
+    def locate(self, x, y):
+        """triangle of each point (-1 outside the hull) and its barycentric weights (n, 3)"""
+        qx, qy = self.normalize(np.ravel(x), np.ravel(y))
+        n, m = len(qx), self.n_buckets
+        in_box = (qx>=-tolerance) & (qx<=1+tolerance) & (qy>=-tolerance) & (qy<=1+tolerance)
+        cell = (np.clip((qx*m).astype(np.int64), 0, m-1) +
+                np.clip((qy*m).astype(np.int64), 0, m-1)*m)
+        start = self.bucket_start[cell]
+        counts = np.where(in_box, self.bucket_end[cell]-start, 0)
+        # every (point, candidate triangle) pair, tested at once
+        query = np.repeat(np.arange(n), counts)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts)-counts, counts)
+        tri = self.bucket_triangles[np.repeat(start, counts) + k]
+        l1, l2 = self._barycentric(qx[query], qy[query], tri)
+        inside = (l1>=-tolerance) & (l2>=-tolerance) & (1.0-l1-l2>=-tolerance)
+        located = np.repeat(-1, n)
+        located[query[inside][::-1]] = tri[inside][::-1] # the first triangle found wins
+        weights = np.zeros((n, 3))
+        found = located>=0
+        l1, l2 = self._barycentric(qx[found], qy[found], located[found])
+        weights[found] = np.column_stack([1.0-l1-l2, l1, l2])
+        return located, weights
+    def _barycentric(self, qx, qy, tri):
+        dx, dy = qx-self.x0[tri], qy-self.y0[tri]
+        inv = self.inverse[tri]
+        return inv[:, 0]*dx + inv[:, 1]*dy, inv[:, 2]*dx + inv[:, 3]*dy
+
+_triangulations = {}
+
+def triangulation(x, y):
+    """the Triangulation of these points, computed once"""
+    x, y = np.ascontiguousarray(x, dtype=np.float64), np.ascontiguousarray(y, dtype=np.float64)
+    key = hashlib.sha1(x.tostring() + b'\0' + y.tostring()).hexdigest()
+    if key not in _triangulations:
+        _triangulations[key] = Triangulation(x, y)
+    return _triangulations[key]
+
+class Interpolator(object):
+    """values on the points x, y interpolated on grids; the triangulation
+    and the location of the bins of each grid are computed once"""
+    def __init__(self, x, y):
+        self.triangulation = triangulation(x, y)
+        self._located = {}
+    def _locate(self, grid):
+        if grid not in self._located:
+            tri, weights = self.triangulation.locate(*grid.centers())
+            inside = np.flatnonzero(tri>=0)
+            self._located[grid] = (inside, self.triangulation.triangles[tri[inside]], weights[inside])
+        return self._located[grid]
+    def at(self, values, x, y):
+        """values interpolated at the points x, y (nan outside the hull)"""
+        tri, weights = self.triangulation.locate(x, y)
+        z = np.repeat(np.nan, len(tri))
+        found = tri>=0
+        z[found] = (np.asarray(values, dtype=np.float64)[self.triangulation.triangles[tri[found]]]*weights[found]).sum(axis=1)
+        return z
+    def sparse(self, values, grid):
+        """(flat bin indices, values) of the bins of grid inside the hull"""
+        if len(values)!=self.triangulation.n_points:
+            raise ValueError("%d values for %d points" % (len(values), self.triangulation.n_points))
+        bins, vertices, weights = self._locate(grid)
+        return bins, (np.asarray(values, dtype=np.float64)[vertices]*weights).sum(axis=1)
+    def dense(self, values, grid):
+        """(ny, nx) array, nan outside the hull"""
+        bins, z = self.sparse(values, grid)
+        dense = np.repeat(np.nan, grid.nx*grid.ny)
+        dense[bins] = z
+        return dense.reshape(grid.ny, grid.nx)
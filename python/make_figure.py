@@ -0,0 +1,112 @@
+#!/bin/env python
+
+# Prepare the input of a figure, or convert it and fill its hepdata placeholders
+#
+# Everything comes from the figure registry (figures.json, see
+# figure_registry.py): this replaces the per-figure functions of
+# run_all.sh (main_figure, limit1d_figure, ...) and their case
+# statements. Several figures can be given in one call; they are
+# processed in the same process, and the failures are reported at the
+# end.
+#
+# Example:
+# > make_figure.py --prepare figure_7_a    # input_from_alberto/... -> input_formatted/figure_7_a.root
+# > make_figure.py figure_7_a              # -> output/figure_7_a.hep.dat
+# > make_figure.py --columnar figure_8_a    # and output/figure_8_a.columns (see columnar.py)
+# > make_figure.py $(./python/figure_registry.py list --kind distribution)
+# > make_figure.py --prepare -j 4 $(./python/figure_registry.py list --prepare extract)
+#
+# Oct 2026
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tracing
+import extract_objects
+import figure_registry
+from fill_header import fill_file
+from hepdata_writer import convert
+
+def main():
+    parser = argparse.ArgumentParser(description='make the hepdata output of the given figures')
+    parser.add_argument('figures', nargs='+', help='figure ids (see figure_registry.py list)')
+    parser.add_argument('-p', '--prepare', action='store_true', help='make the input file instead (input_formatted/...)')
+    parser.add_argument('-c', '--columnar', action='store_true', help='also write the columnar copy of the output')
+    parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(),
+                        help='with --prepare, number of processes for the extractions')
+    parser.add_argument('-r', '--registry', default=figure_registry.default_filename, help='registry file')
+    args = parser.parse_args()
+    try:
+        figures = figure_registry.load(args.registry).select(args.figures)
+    except (figure_registry.RegistryError, KeyError) as e:
+        sys.exit(str(e))
+    external = [f.id for f in figures if f.kind=='external']
+    if external:
+        sys.exit("not made here (kind 'external'): %s" % ' '.join(external))
+    errors = []
+    prepared = set()
+    if args.prepare:
+        # all the extractions together: each source file is read once, the independent ones in parallel
+        extracted = [f for f in figures if f.prepare=='extract']
+        figures = [f for f in figures if f.prepare!='extract']
+        for fig_id, message in extract_figures(extracted, args.jobs):
+            tracing.error("%s: %s" % (fig_id, message), figure=fig_id)
+            errors.append(fig_id)
+    for fig in figures:
+        try:
+            if not args.prepare:
+                make(fig, columnar=args.columnar)
+            elif fig.prepare not in prepared or fig.prepare!='acceptance_efficiency':
+                prepare(fig)
+                prepared.add(fig.prepare)
+        except (IOError, OSError, KeyError, LookupError, ValueError) as e:
+            tracing.error("%s: %s" % (fig.id, e), figure=fig.id)
+            errors.append(fig.id)
+    if errors:
+        sys.exit("failed: %s" % ' '.join(errors))
+
+def prepare(fig):
+    """write fig.input from fig.source"""
+    output_dir = os.path.dirname(fig.input)
+    if output_dir and not os.path.exists(output_dir) : os.makedirs(output_dir)
+    if fig.prepare=='format_input':
+        import format_input
+        format_input.format_figure(fig.id, fig.source, fig.input, roles=fig.roles)
+    elif fig.prepare=='extract':
+        extract_objects.extract(extraction_rules(fig))
+    elif fig.prepare=='copy':
+        shutil.copy2(fig.source, fig.input)
+    elif fig.prepare=='acceptance_efficiency':
+        import plot_acceptance_efficiency_TGraph2D
+        plot_acceptance_efficiency_TGraph2D.make_inputs()
+
+def extraction_rules(fig):
+    """the extract_objects rules of a figure (its prepare_args), from fig.source to fig.input"""
+    return [extract_objects.rule(entry, fig.source, fig.input) for entry in fig.prepare_args]
+
+def extract_figures(figures, jobs=1):
+    """prepare the 'extract' figures in one go; return the [(figure id, error)] of those that failed"""
+    by_input = dict((f.input, f.id) for f in figures)
+    try:
+        failed = extract_objects.run([r for f in figures for r in extraction_rules(f)], jobs)
+    except ValueError as e:
+        return [(f.id, str(e)) for f in figures]
+    return [(by_input[d], message) for destinations, message in failed for d in destinations]
+
+def make(fig, columnar=False):
+    """convert fig.input to fig.output and fill its placeholders; with columnar, also write the
+    columns of the same datasets (the filled header values go in the manifest)"""
+    datasets = convert([fig.input], fig.output, y=fig.convert.get('y'), overlay=fig.convert.get('overlay'),
+                       stitch=fig.convert.get('stitch'))
+    fill_file(fig.output, figure_registry.substitutions(fig)) # TemplateError is a ValueError
+    if columnar:
+        import columnar as columnar_copy
+        fields = dict((f, getattr(fig, f)) for f in ['id', 'caption', 'columns', 'obskey', 'reackey', 'process',
+                                                      'xheader', 'yheader'])
+        columnar_copy.write(columnar_copy.directory_name(fig.output), datasets,
+                            source=os.path.basename(fig.output), fields=fields)
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,259 @@
+#!/bin/env python
+
+# Tables of values on the (m(chargino1), m(neutralino1)) plane, and joins between them
+#
+# A grid file has one mass point per line: the two masses followed by
+# one or more values, separated by ';' (input_from_sigve/xsecs.txt),
+# ',' or blanks; '#' starts a comment. It is parsed in one go into a
+# MassGrid (x, y, values with one column per quantity).
+#
+# The values of one grid are looked up at the points of another one in
+# bulk, with an index of its mass points built once (and cached):
+# - exact: the masses (rounded to 'resolution') as one integer key,
+#   sorted, and searched with searchsorted;
+# - nearest: the points in buckets of a regular grid, each query
+#   searching the buckets within one bucket size; where nothing that
+#   close is found, the distance is bounded by the closest of a few
+#   representative points (one per block of buckets), and the buckets
+#   within that distance are searched (each row of buckets is one
+#   contiguous range of the sorted points, so this is one range per
+#   row for each query);
+# - interpolate: linear, in the Delaunay triangles of the points (see
+#   interpolation.py), nan outside their hull.
+# The counts table of plot_acceptance_efficiency_TGraph2D.py can be
+# used as a grid by the name 'counts' (cross section, acceptance and
+# efficiency for each region).
+#
+# Example:
+# > mass_grid.py show input_from_sigve/xsecs.txt
+# > mass_grid.py join counts input_from_sigve/xsecs.txt --how nearest
+#   xsecs = mass_grid.read('input_from_sigve/xsecs.txt', names=['xsec'])
+#   values = mass_grid.join(limits, xsecs, how='interpolate') # xsecs at the points of limits
+#
+# Oct 2026
+
+import argparse
+import collections
+import hashlib
+import re
+import sys
+import numpy as np
+import interpolation
+
+methods = ['exact', 'nearest', 'interpolate']
+resolution = 1e-3 # GeV, masses closer than this are the same point for the exact join
+separators = re.compile(r'[;,\s]+')
+comment = re.compile(r'#[^\n]*')
+
+class MassGrid(collections.namedtuple('MassGrid', ['x', 'y', 'values', 'names'])):
+    """mass points x, y (n,) and their values (n, k), one name per column"""
+    def column(self, name):
+        return self.values[:, self.names.index(name)]
+
+def main():
+    parser = argparse.ArgumentParser(description='read grids of values on the mass plane and join them')
+    parser.add_argument('action', choices=['show', 'join'])
+    parser.add_argument('grids', nargs='+', help="grid files (or 'counts'); join: the values of the others at the points of the first one")
+    parser.add_argument('--how', default='exact', choices=methods)
+    parser.add_argument('--max-distance', type=float, help='nearest: no value (nan) beyond this distance [GeV]')
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    args = parser.parse_args()
+    try:
+        grids = [counts_grid() if g=='counts' else read(g) for g in args.grids]
+    except (IOError, ValueError) as e:
+        sys.exit(str(e))
+    if args.action=='show':
+        for filename, grid in zip(args.grids, grids):
+            print "%s: %d points, %d columns (%s), x in [%g, %g], y in [%g, %g]" % (
+                filename, len(grid.x), len(grid.names), ', '.join(grid.names),
+                grid.x.min(), grid.x.max(), grid.y.min(), grid.y.max())
+        return
+    target = grids[0]
+    names = list(target.names)
+    columns = [target.values]
+    for filename, grid in zip(args.grids[1:], grids[1:]):
+        columns.append(join(target, grid, how=args.how, max_distance=args.max_distance))
+        names.extend(n if n not in names else '%s:%s' % (filename, n) for n in grid.names)
+    joined = MassGrid(target.x, target.y, np.column_stack(columns), names)
+    write(open(args.output, 'w') if args.output else sys.stdout, joined)
+
+def read(filename, names=None):
+    """the MassGrid of a grid file; names default to value_0, value_1, ..."""
+    with open(filename) as f:
+        text = comment.sub('', f.read())
+    rows = [(i+1, l.strip()) for i, l in enumerate(text.splitlines()) if l.strip()]
+    if not rows:
+        raise ValueError("%s: no mass points" % filename)
+    n_columns = len(separators.split(rows[0][1]))
+    # parsed by numpy in one go; it stops at the first token that is not a number
+    table = np.fromstring(text.replace(';', ' ').replace(',', ' '), dtype=np.float64, sep=' ')
+    if n_columns<3 or len(table)!=n_columns*len(rows):
+        # slow path, only to say where the problem is
+        for number, line in rows:
+            tokens = separators.split(line)
+            if len(tokens)!=n_columns:
+                raise ValueError("%s:%d: expected %d columns, got '%s'" % (filename, number, n_columns, line))
+            try:
+                [float(t) for t in tokens]
+            except ValueError as e:
+                raise ValueError("%s:%d: %s" % (filename, number, e))
+        raise ValueError("%s: need the two masses and at least one value per line" % filename)
+    table = table.reshape(len(rows), n_columns)
+    names = names or ['value_%d' % i for i in range(n_columns-2)]
+    if len(names)!=n_columns-2:
+        raise ValueError("%s: %d values per point, %d names" % (filename, n_columns-2, len(names)))
+    return MassGrid(table[:, 0].copy(), table[:, 1].copy(), table[:, 2:].copy(), list(names))
+
+def write(output, grid, separator=' ; '):
+    """one line per point: x ; y ; values (the format of xsecs.txt)"""
+    output.write('# %s\n' % separator.join(['x', 'y'] + grid.names))
+    np.savetxt(output, np.column_stack([grid.x, grid.y, grid.values]), fmt='%g', delimiter=separator)
+
+def counts_grid():
+    """cross section, acceptance and efficiency per region, from the counts table"""
+    import plot_acceptance_efficiency_TGraph2D as pae
+    table = pae.counts_to_array(pae.counts)
+    acceptance, efficiency = pae.acceptance_efficiency(table)
+    names = ['xsec'] + ['acceptance_'+r for r in pae.regions] + ['efficiency_'+r for r in pae.regions]
+    return MassGrid(table['mc1'], table['mn1'], np.column_stack([table['xsec'], acceptance, efficiency]), names)
+
+class MassIndex(object):
+    """the mass points x, y, indexed for exact and nearest-neighbour lookups in bulk"""
+    def __init__(self, x, y, resolution=resolution):
+        self.x, self.y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        if not len(self.x):
+            raise ValueError("cannot index an empty grid")
+        self.resolution = resolution
+        self._keys()
+        self._buckets()
+    def _integer(self, x, y):
+        return np.round(x/self.resolution).astype(np.int64), np.round(y/self.resolution).astype(np.int64)
+    def _keys(self):
+        ix, iy = self._integer(self.x, self.y)
+        self.ix0, self.iy0 = ix.min(), iy.min()
+        self.nx, self.ny = ix.max()-self.ix0+1, iy.max()-self.iy0+1
+        keys = (ix-self.ix0)*self.ny + (iy-self.iy0)
+        self.key_order = np.argsort(keys, kind='mergesort') # for repeated points, the first one wins
+        self.sorted_keys = keys[self.key_order]
+    def _buckets(self):
+        """a regular grid of about n buckets over the bounding box of the points"""
+        n = len(self.x)
+        self.x0, self.y0 = self.x.min(), self.y.min()
+        width, height = max(self.x.max()-self.x0, 1e-300), max(self.y.max()-self.y0, 1e-300)
+        self.bucket_size = max(np.sqrt(width*height/n), width/n, height/n)
+        self.mx = int(width/self.bucket_size)+1
+        self.my = int(height/self.bucket_size)+1
+        cx, cy = self._cell_xy(self.x, self.y)
+        cells = cy*self.mx + cx
+        self.bucket_order = np.argsort(cells, kind='mergesort')
+        sorted_cells = cells[self.bucket_order]
+        self.bucket_start = np.searchsorted(sorted_cells, np.arange(self.mx*self.my))
+        self.bucket_end = np.searchsorted(sorted_cells, np.arange(self.mx*self.my), side='right')
+        # one point in each block of about sqrt(n) buckets, for a first bound of the distance
+        side = max(1, int(n**0.25))
+        _, first = np.unique((cy[self.bucket_order]//side)*(self.mx//side+1) + cx[self.bucket_order]//side,
+                             return_index=True)
+        self.representatives = self.bucket_order[first]
+    def _cell_xy(self, x, y):
+        return (np.clip(np.floor((x-self.x0)/self.bucket_size), -1, self.mx).astype(np.int64),
+                np.clip(np.floor((y-self.y0)/self.bucket_size), -1, self.my).astype(np.int64))
+    def find(self, x, y):
+        """index of the point at each x, y (within the resolution), -1 if there is none"""
+        ix, iy = self._integer(np.ravel(x), np.ravel(y))
+        ix, iy = ix-self.ix0, iy-self.iy0
+        inside = (ix>=0) & (ix<self.nx) & (iy>=0) & (iy<self.ny)
+        keys = np.where(inside, ix*self.ny + iy, -1)
+        position = np.clip(np.searchsorted(self.sorted_keys, keys), 0, len(self.sorted_keys)-1)
+        found = inside & (self.sorted_keys[position]==keys)
+        return np.where(found, self.key_order[position], -1)
+    def nearest(self, x, y, chunk=10**7):
+        """index of the closest point to each x, y, and its distance"""
+        qx, qy = np.ravel(x).astype(np.float64), np.ravel(y).astype(np.float64)
+        n = len(qx)
+        index, best = np.repeat(-1, n), np.repeat(np.inf, n)
+        # the buckets within one bucket size: exact if a point closer than that is found
+        h = self.bucket_size
+        self._search(qx, qy, np.arange(n), np.repeat(h, n), index, best, chunk)
+        unsure = np.flatnonzero(best>h*h)
+        # otherwise bound the distance with the closest representative, then search all the buckets within it
+        rows = max(1, chunk//len(self.representatives))
+        for start in range(0, len(unsure), rows):
+            q, r = unsure[start:start+rows], self.representatives
+            d2 = (qx[q, np.newaxis]-self.x[r])**2 + (qy[q, np.newaxis]-self.y[r])**2
+            closest = np.argmin(d2, axis=1)
+            index[q], best[q] = r[closest], d2[np.arange(len(q)), closest]
+        self._search(qx, qy, unsure, np.sqrt(best[unsure]), index, best, chunk)
+        return index, np.sqrt(best)
+    def _search(self, qx, qy, queries, radius, index, best, chunk):
+        """update index/best of the queries with the points of the buckets overlapping the
+        circle of radius around them; on each row of buckets these are contiguous in bucket_order"""
+        h = self.bucket_size
+        cx, cy = qx[queries], qy[queries]
+        y_low, y_high = self._cell_xy(cx, cy-radius)[1], self._cell_xy(cx, cy+radius)[1]
+        y_low, y_high = np.maximum(y_low, 0), np.minimum(y_high, self.my-1)
+        rows = np.maximum(y_high-y_low+1, 0)
+        # one (query, row of buckets) pair per range of points, the row limited to the chord of the circle
+        pair = np.repeat(np.arange(len(queries)), rows)
+        row = y_low[pair] + np.arange(rows.sum()) - np.repeat(np.cumsum(rows)-rows, rows)
+        dy = np.maximum(np.maximum(self.y0+row*h-cy[pair], cy[pair]-(self.y0+(row+1)*h)), 0.0)
+        chord = np.sqrt(np.maximum(radius[pair]**2-dy*dy, 0.0))
+        x_low = np.maximum(self._cell_xy(cx[pair]-chord, cy[pair])[0], 0)
+        x_high = np.minimum(self._cell_xy(cx[pair]+chord, cy[pair])[0], self.mx-1)
+        starts = self.bucket_start[row*self.mx + np.minimum(x_low, self.mx-1)]
+        counts = np.where(x_low<=x_high, self.bucket_end[row*self.mx + np.maximum(x_high, 0)] - starts, 0)
+        # in groups of pairs with at most about chunk points
+        group = np.cumsum(counts)//chunk
+        boundaries = np.concatenate([[0], np.flatnonzero(np.diff(group))+1, [len(pair)]])
+        for first, last in zip(boundaries[:-1], boundaries[1:]):
+            c = counts[first:last]
+            k = np.arange(c.sum()) - np.repeat(np.cumsum(c)-c, c)
+            candidates = self.bucket_order[np.repeat(starts[first:last], c) + k]
+            owner = queries[np.repeat(pair[first:last], c)]
+            if not len(owner):
+                continue
+            distance2 = (self.x[candidates]-qx[owner])**2 + (self.y[candidates]-qy[owner])**2
+            # the candidates of a query are contiguous: minimum per segment (lowest index among equals)
+            new = np.concatenate([[True], owner[1:]!=owner[:-1]])
+            segment, first = np.cumsum(new)-1, np.flatnonzero(new)
+            d2 = np.minimum.reduceat(distance2, first)
+            hit = np.flatnonzero(distance2==d2[segment])
+            closest = np.repeat(len(self.x), len(first))
+            np.minimum.at(closest, segment[hit], candidates[hit])
+            owner = owner[first]
+            better = (d2<best[owner]) | ((d2==best[owner]) & (closest<index[owner]))
+            index[owner[better]], best[owner[better]] = closest[better], d2[better]
+
+_indices = {}
+
+def index(x, y):
+    """the MassIndex of these points, built once"""
+    x, y = np.ascontiguousarray(x, dtype=np.float64), np.ascontiguousarray(y, dtype=np.float64)
+    key = hashlib.sha1(x.tostring() + b'\0' + y.tostring()).hexdigest()
+    if key not in _indices:
+        _indices[key] = MassIndex(x, y)
+    return _indices[key]
+
+def join(target, source, how='exact', max_distance=None):
+    """the values (n_target, k) of source at the points of target; nan where there are none"""
+    if how not in methods:
+        raise ValueError("unknown join %r; known: %s" % (how, ', '.join(methods)))
+    values = np.repeat(np.nan, len(target.x)*source.values.shape[1]).reshape(len(target.x), -1)
+    if how=='interpolate':
+        t = interpolation.triangulation(source.x, source.y)
+        triangles, weights = t.locate(target.x, target.y)
+        found = triangles>=0
+        vertices = t.triangles[triangles[found]]
+        values[found] = (source.values[vertices]*weights[found][:, :, np.newaxis]).sum(axis=1)
+        return values
+    source_index = index(source.x, source.y)
+    if how=='exact':
+        matched = source_index.find(target.x, target.y)
+        found = matched>=0
+    else:
+        matched, distance = source_index.nearest(target.x, target.y)
+        found = distance<=max_distance if max_distance is not None else np.ones(len(matched), dtype=bool)
+    values[found] = source.values[matched[found]]
+    return values
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,168 @@
+#!/bin/env python
+
+# Concatenate the header and the per-figure outputs into the merged hepdata files
+#
+# Replaces the 'cat' of merge_all_parts and merge_all_ss2l_parts. The
+# size of each part is known in advance, so the output file is
+# preallocated and the parts are copied in parallel, each one at its
+# own offset, with copy_file_range (the data does not go through
+# python; plain reads/writes are used where the kernel does not
+# support it). Both merged files are written in the same pass.
+#
+# Next to each merged file an index (<file>.index.json) lists the byte
+# range of each dataset and its '*location:', so that a reader can
+# seek directly to one figure (see hepdata_reader.py).
+#
+# Example:
+# > merge_hepdata.py                       # output/hepdata.hep.dat and output/hepdata_ss2l.hep.dat
+# > merge_hepdata.py hepdata_ss2l          # only one of them
+# > merge_hepdata.py -o merged.hep.dat output/figure_5.hep.dat output/figure_6_a.hep.dat
+#
+# Oct 2026
+
+import argparse
+import ctypes
+import ctypes.util
+import errno
+import json
+import mmap
+import os
+import shutil
+from multiprocessing.pool import ThreadPool
+import figure_registry
+import tracing
+from hepdata_reader import find_datasets
+
+header = 'input_formatted/hepdata_header.txt'
+output_dir = 'output'
+
+# the merged files and the order of their parts are in figures.json (see figure_registry.py)
+
+def main():
+    parser = argparse.ArgumentParser(description='merge the per-figure hepdata files')
+    parser.add_argument('parts', nargs='*', help='merged file names (default: all those in the registry), or the parts to be merged with -o')
+    parser.add_argument('-o', '--output', help='merge the given parts into this file')
+    parser.add_argument('--header', default=header, help='file prepended to the parts')
+    parser.add_argument('-r', '--registry', default=figure_registry.default_filename, help='figure registry')
+    parser.add_argument('-j', '--jobs', type=int, default=8, help='number of parallel copies')
+    args = parser.parse_args()
+    if args.output:
+        outputs = {args.output : [args.header] + args.parts}
+    else:
+        try:
+            outputs = merged_outputs(figure_registry.load(args.registry), args.parts, args.header)
+        except (figure_registry.RegistryError, KeyError) as e:
+            parser.error(str(e))
+    merge(outputs, jobs=args.jobs)
+
+def merged_filename(name):
+    return os.path.join(output_dir, name+'.hep.dat')
+
+def merged_outputs(registry, names=None, header=header):
+    """{merged filename : [header] + parts} for the given merged files (default: all)"""
+    unknown = [n for n in (names or []) if n not in registry.merged]
+    if unknown:
+        raise KeyError("unknown merged file(s) %s; known: %s" % (', '.join(unknown), ', '.join(registry.merged)))
+    return dict((merged_filename(n), [header] + registry.merged_parts(n)) for n in (names or registry.merged.keys()))
+
+def scan_datasets(filename):
+    """(location, start, end) of each dataset in a file; start/end are byte offsets"""
+    size = os.path.getsize(filename)
+    if size==0:
+        return []
+    with open(filename, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return find_datasets(data, size)
+        finally:
+            data.close()
+
+def _load_copy_file_range():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        function = libc.copy_file_range
+    except (OSError, AttributeError):
+        return None
+    function.restype = ctypes.c_ssize_t
+    function.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_int64),
+                         ctypes.c_int, ctypes.POINTER(ctypes.c_int64),
+                         ctypes.c_size_t, ctypes.c_uint]
+    return function
+
+copy_file_range = _load_copy_file_range()
+
+def copy_into(source, destination, offset, size):
+    """copy the whole source file into destination at offset (destination must exist)"""
+    with open(source, 'rb') as src:
+        with open(destination, 'r+b') as dst:
+            if copy_file_range is not None:
+                src_offset, dst_offset = ctypes.c_int64(0), ctypes.c_int64(offset)
+                remaining = size
+                while remaining>0:
+                    copied = copy_file_range(src.fileno(), ctypes.byref(src_offset),
+                                             dst.fileno(), ctypes.byref(dst_offset),
+                                             remaining, 0)
+                    if copied<0:
+                        err = ctypes.get_errno()
+                        if err in (errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP) and remaining==size:
+                            break # not supported here, fall back to read/write
+                        raise OSError(err, os.strerror(err), source)
+                    if copied==0:
+                        raise IOError("%s: unexpected end of file" % source)
+                    remaining -= copied
+                else:
+                    return
+            dst.seek(offset)
+            shutil.copyfileobj(src, dst, 1<<20)
+
+def merge(outputs, jobs=8):
+    """outputs = {merged filename : [parts]}; each distinct part is scanned once"""
+    missing = sorted(set(p for parts in outputs.values() for p in parts if not os.path.exists(p)))
+    if missing:
+        raise IOError("missing input files:\n" + '\n'.join(missing))
+    with tracing.span('merge_hepdata', figure=' '.join(sorted(os.path.basename(o) for o in outputs))) as s:
+        indices = _merge(outputs, jobs)
+        s.add(objects=sum(len(index) for size, index in indices.values()),
+              bytes=sum(size for size, index in indices.values()))
+
+def _merge(outputs, jobs):
+    """copy the parts; return {merged filename : (size, index)}"""
+    distinct_parts = sorted(set(p for parts in outputs.values() for p in parts))
+    pool = ThreadPool(jobs)
+    try:
+        part_datasets = dict(zip(distinct_parts, pool.map(scan_datasets, distinct_parts)))
+        copies, indices = [], {}
+        for output_filename, parts in sorted(outputs.items()):
+            offset = 0
+            index = []
+            tmp_filename = output_filename + '.tmp'
+            offsets = []
+            for part in parts:
+                offsets.append(offset)
+                index.extend({'location': location, 'start': offset+start, 'end': offset+end, 'part': part}
+                             for location, start, end in part_datasets[part])
+                offset += os.path.getsize(part)
+            with open(tmp_filename, 'wb') as output_file:
+                output_file.truncate(offset) # preallocate
+            copies.extend((part, tmp_filename, o, os.path.getsize(part)) for part, o in zip(parts, offsets))
+            indices[output_filename] = (offset, index)
+        pool.map(lambda c: copy_into(*c), copies)
+    finally:
+        pool.close()
+        pool.join()
+    for output_filename, (size, index) in sorted(indices.items()):
+        os.rename(output_filename + '.tmp', output_filename)
+        write_index(output_filename, size, index)
+        tracing.info("written %s" % output_filename)
+    return indices
+
+def index_filename(filename):
+    return filename + '.index.json'
+
+def write_index(filename, size, datasets):
+    with open(index_filename(filename), 'w') as index_file:
+        json.dump({'file': os.path.basename(filename), 'size': size, 'datasets': datasets},
+                  index_file, indent=1)
+
+if __name__=='__main__':
+    main()
@@ -18,17 +18,30 @@
 # Dec 09, update: grey palette, adjust font sizes, labels
 # Dec 12, bugfix: missing parentheses acceptance denominator
 # Feb 27, update: save root files for hepdata script
+# Oct 18, update: counts as a columnar array, acc/eff for all regions in one go
+# Oct 18, update: draw the canvases in parallel, skip the ones that did not change
+# Oct 18, update: one triangulation of the mass points for all the maps (see interpolation.py)
+# Oct 18, update: binomial uncertainties on acc/eff (see binomial.py), saved as graph errors
 #
 #___________________________________________________________
 
+import argparse
 import array
+import hashlib
+import inspect
+import json
+import multiprocessing
 import os
+import numpy as np
 import ROOT as r
+import binomial
+import interpolation
+import tracing
 r.gROOT.SetBatch(True)                     # no windows popping up
 r.PyConfig.IgnoreCommandLineOptions = True # don't let root steal our cmd-line options
 
 def setAtlasStyle() :
-    aStyle = getAtlasStyle()
+    aStyle = r.gROOT.GetStyle('ATLAS') or getAtlasStyle() # made once per process (e.g. by root_worker.py)
     r.gROOT.SetStyle("ATLAS")
     r.gROOT.ForceStyle()
     r.gStyle.SetPalette(52)
@@ -150,132 +163,258 @@ counts = [
 # missing    (177528,      275.0,         0.0,    0.2168904692,   0.3063600000,    0.1821800000,         95000,           1,        1),
 ]
 
-def dsid_cal(line) : return line[0]
-def mc1_val(line) : return line[1]
-def mn1_val(line) : return line[2]
-def xsec_val(line) : return line[3]
-def bf_val(line): return line[4]
-def filter_eff_val(line) : return line[5]
-def n_gen_val(line) : return line[6]
-def n_fiducial_val(line, region) : return line[7][region][0]
-def n_fiducial_reco_val(line, region) : return line[7][region][1]
+regions = ['sr1jee', 'sr1jmm', 'sr1jem', 'sr2jee', 'sr2jmm', 'sr2jem']
 
+def counts_to_array(counts, regions=regions) :
+    """columnar version of the counts table: one field per column,
+    with N_fiducial and N_fiducial-reco as (n_points, n_regions) arrays"""
+    table = np.zeros(len(counts), dtype=[('dsid', np.int64),
+                                         ('mc1', np.float64),
+                                         ('mn1', np.float64),
+                                         ('xsec', np.float64),
+                                         ('bf', np.float64),
+                                         ('filter_eff', np.float64),
+                                         ('n_generated', np.float64),
+                                         ('n_fiducial', np.float64, (len(regions),)),
+                                         ('n_fiducial_reco', np.float64, (len(regions),))])
+    columns = zip(*counts)
+    for field, column in zip(['dsid', 'mc1', 'mn1', 'xsec', 'bf', 'filter_eff', 'n_generated'], columns):
+        table[field] = column
+    table['n_fiducial'] = [[c[7][r][0] for r in regions] for c in counts]
+    table['n_fiducial_reco'] = [[c[7][r][1] for r in regions] for c in counts]
+    return table
 
-mc1Range = {'min': min([mc1_val(c) for c in counts]), 'max' : max([mc1_val(c) for c in counts])}
-mn1Range = {'min': min([mn1_val(c) for c in counts]), 'max' : max([mn1_val(c) for c in counts])}
-mc1Range = {'max': 270.0, 'min': 130.0} # set the range by hand (auto is ok as a first approx)
-mn1Range = {'max': 80.0, 'min': 0.0}
+def acceptance_efficiency(table) :
+    """acceptance and efficiency for all points and all regions, each one with shape (n_points, n_regions)"""
+    n_generated = table['n_generated'] / (table['bf'] * table['filter_eff'])
+    acceptance = table['n_fiducial'] / n_generated[:, np.newaxis]
+    efficiency = table['n_fiducial_reco'] / table['n_fiducial']
+    return acceptance, efficiency
 
+def acceptance_efficiency_intervals(table, method='clopper-pearson', cl=binomial.one_sigma, **options) :
+    """(low, high) of the acceptance and of the efficiency, for all points and all regions at once;
+    the acceptance interval is the one of N_fiducial/N_generated, scaled by BR*filter_eff"""
+    n_generated = np.repeat(table['n_generated'][:, np.newaxis], table['n_fiducial'].shape[1], axis=1)
+    # both fractions in one call
+    low, high = binomial.interval(np.concatenate([table['n_fiducial'], table['n_fiducial_reco']]),
+                                  np.concatenate([n_generated, table['n_fiducial']]),
+                                  method, cl, **options)
+    n_points = len(table)
+    scale = (table['bf'] * table['filter_eff'])[:, np.newaxis]
+    return (low[:n_points]*scale, high[:n_points]*scale), (low[n_points:], high[n_points:])
+
+def graph2d(name, x, y, z, interval=None) :
+    """TGraph2D for hepdata; with an interval, the errors are z-low and high-z
+    (symmetrized if this ROOT does not have TGraph2DAsymmErrors)"""
+    n = len(z)
+    if interval is None :
+        g = r.TGraph2D(n, x, y, z)
+    else :
+        low, high = interval
+        zeros = np.zeros(n)
+        if hasattr(r, 'TGraph2DAsymmErrors') :
+            g = r.TGraph2DAsymmErrors(n, x, y, z, zeros, zeros, zeros, zeros, column(z-low), column(high-z))
+        else :
+            g = r.TGraph2DErrors(n, x, y, z, zeros, zeros, column(0.5*(high-low)))
+    g.SetName(name)
+    return g
+
+def column(values) :
+    """contiguous copy of a column, as needed by the ROOT functions taking a double*"""
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+def interpolated_map(interpolator, values, grid) :
+    """bin centres and values of the bins of grid inside the hull of the mass points"""
+    bins, z = interpolator.sparse(values, grid)
+    x, y = grid.centers()
+    return {'map_x' : column(x[bins]), 'map_y' : column(y[bins]), 'map_z' : column(z)}
+
+n_bins = 100 # of the maps, along each axis
 output_dir = './input_acc_eff/'
+hash_file = '.render_hashes.json' # in output_dir, one content hash per canvas
+
+def main() :
+    parser = argparse.ArgumentParser(description='plot acceptance and efficiency, save the graphs for hepdata')
+    parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(), help='number of processes drawing the canvases')
+    parser.add_argument('-f', '--formats', default='eps,png', help='comma-separated list of output formats')
+    parser.add_argument('--force', action='store_true', help='draw the canvases even if their content did not change')
+    parser.add_argument('--interval', default='clopper-pearson', choices=binomial.methods+['none'],
+                        help='uncertainty on acceptance and efficiency saved for hepdata')
+    parser.add_argument('--cl', type=float, default=binomial.one_sigma, help='confidence level of the interval')
+    parser.add_argument('--bootstrap-samples', type=int, default=1000, help='for --interval bootstrap')
+    args = parser.parse_args()
+    make_inputs(jobs=args.jobs, formats=[f for f in args.formats.split(',') if f], force=args.force,
+                interval=args.interval, cl=args.cl, bootstrap_samples=args.bootstrap_samples)
+
+def make_inputs(jobs=multiprocessing.cpu_count(), formats=['eps', 'png'], force=False,
+                interval='clopper-pearson', cl=binomial.one_sigma, bootstrap_samples=1000) :
+    """write the TGraph2D files for hepdata and draw the canvases"""
+    with tracing.span('acceptance_efficiency', points=len(counts)*len(regions)) :
+        table = counts_to_array(counts)
+        acceptance, efficiency = acceptance_efficiency(table)
+    acc_interval = eff_interval = None
+    if interval!='none' :
+        with tracing.span('binomial_intervals', points=2*len(counts)*len(regions), method=interval) :
+            options = {'samples' : bootstrap_samples} if interval=='bootstrap' else {}
+            acc_interval, eff_interval = acceptance_efficiency_intervals(table, interval, cl, **options)
+    mc1, mn1 = column(table['mc1']), column(table['mn1'])
+    n_points = len(table)
+
+    mc1Range = {'min': mc1.min(), 'max' : mc1.max()}
+    mn1Range = {'min': mn1.min(), 'max' : mn1.max()}
+    mc1Range = {'max': 270.0, 'min': 130.0} # set the range by hand (auto is ok as a first approx)
+    mn1Range = {'max': 80.0, 'min': 0.0}
+
+    # the regions and both quantities share the mass points: triangulate and locate the bins once
+    interpolator = interpolation.Interpolator(mc1, mn1)
+    grid = interpolation.Grid(n_bins, float(mc1Range['min']), float(mc1Range['max']),
+                              n_bins, float(mn1Range['min']), float(mn1Range['max']))
+
+    mkdirIfNeeded(output_dir)
+    percent = 100.
+    acceptance_scale_factor = 1.0e4
+    canvases = []
+    for iRegion, selection in enumerate(regions):
+        acc = column(acceptance[:, iRegion])
+        eff = column(efficiency[:, iRegion])
+        acc_scaled = acc * acceptance_scale_factor
+        eff_scaled = eff * percent
+        canvases.append(dict({'name' : 'c_h_acceptance_'+selection, 'quantity' : 'acceptance', 'selection' : selection,
+                              'mc1' : mc1, 'mn1' : mn1, 'values' : acc_scaled,
+                              'labels' : [str(round(v, 1)) for v in acc_scaled.tolist()],
+                              'mc1Range' : mc1Range, 'mn1Range' : mn1Range},
+                             **interpolated_map(interpolator, acc_scaled, grid)))
+        canvases.append(dict({'name' : 'c_h_efficiency_'+selection, 'quantity' : 'efficiency', 'selection' : selection,
+                              'mc1' : mc1, 'mn1' : mn1, 'values' : eff_scaled,
+                              'labels' : [str(int(round(v, 0))) for v in eff_scaled.tolist()],
+                              'mc1Range' : mc1Range, 'mn1Range' : mn1Range},
+                             **interpolated_map(interpolator, eff_scaled, grid)))
+        # save graphs for hepdata (don't want a bunch of zeroes)
+        def region(interval) :
+            return None if interval is None else [column(v[:, iRegion]) for v in interval]
+        tg2d_acceptance = graph2d('acceptance_'+selection, mc1, mn1, acc, region(acc_interval))
+        tg2d_efficiency = graph2d('efficiency_'+selection, mc1, mn1, eff, region(eff_interval))
+        for g in [tg2d_acceptance, tg2d_efficiency]:
+            with tracing.span('write_tgraph2d', figure=g.GetName()) as s :
+                out_filename = output_dir +'/'+ g.GetName()+'.root'
+                out_file = r.TFile.Open(out_filename, 'recreate')
+                out_file.cd()
+                g.Write()
+                out_file.Close()
+                s.add(objects=1, points=n_points, bytes=os.path.getsize(out_filename))
+    render_canvases(canvases, formats, jobs=jobs, force=force)
+
+def style_signature() :
+    """anything that changes the look of the plots: the source of the drawing functions"""
+    functions = [setAtlasStyle, getAtlasStyle, topRightLabel, topLeftLabel, drawAtlasLabel, nicelabel, render_canvas]
+    return ''.join(inspect.getsource(f) for f in functions)
+
+def canvas_hash(canvas, formats, style=None) :
+    sha = hashlib.sha1(style if style is not None else style_signature())
+    sha.update(json.dumps(dict((k, v) for k, v in canvas.items() if not isinstance(v, np.ndarray)), sort_keys=True))
+    sha.update(json.dumps(formats))
+    for k in sorted(k for k, v in canvas.items() if isinstance(v, np.ndarray)):
+        sha.update(k)
+        sha.update(np.ascontiguousarray(canvas[k]).tostring())
+    return sha.hexdigest()
+
+def render_canvases(canvases, formats, jobs=1, force=False) :
+    """draw the canvases on a pool of processes, skipping the ones whose content did not change"""
+    hash_path = os.path.join(output_dir, hash_file)
+    previous = {}
+    if os.path.exists(hash_path) and not force:
+        with open(hash_path) as f:
+            previous = json.load(f)
+    style = style_signature()
+    hashes = dict((c['name'], canvas_hash(c, formats, style)) for c in canvases)
+    def up_to_date(c) :
+        return (previous.get(c['name'])==hashes[c['name']] and
+                all(os.path.exists(os.path.join(output_dir, c['name']+'.'+f)) for f in formats))
+    todo = [c for c in canvases if not up_to_date(c)]
+    tracing.info("drawing %d canvases (%d unchanged)" % (len(todo), len(canvases)-len(todo)))
+    tasks = [(c, formats) for c in todo]
+    if jobs>1 and len(todo)>1:
+        pool = multiprocessing.Pool(min(jobs, len(todo)), initializer=setAtlasStyle)
+        pool.map(render_canvas_task, tasks)
+        pool.close()
+        pool.join()
+    elif todo:
+        setAtlasStyle()
+        map(render_canvas_task, tasks)
+    previous.update(hashes)
+    with open(hash_path, 'w') as f:
+        json.dump(previous, f, indent=1, sort_keys=True)
 
-setAtlasStyle()
+def render_canvas_task(args) :
+    canvas, formats = args
+    with tracing.span('render_canvas', figure=canvas['name'], points=len(canvas['values'])) :
+        return render_canvas(canvas, formats)
 
-for selection in ['sr1jee', 'sr1jmm', 'sr1jem', 'sr2jee', 'sr2jmm', 'sr2jem']:
+def render_canvas(canvas, formats) :
+    """draw one acceptance or efficiency canvas and save it in all the formats"""
+    name, quantity, selection = canvas['name'], canvas['quantity'], canvas['selection']
+    mc1, mn1, values = canvas['mc1'], canvas['mn1'], canvas['values']
+    mc1Range, mn1Range = canvas['mc1Range'], canvas['mn1Range']
+    acceptance_scale_label = '10^{4}'
     title  = ''
     title += '; m_{#tilde{#chi}_{1}^{#pm},#tilde{#chi}_{2}^{0}} [GeV]'
     title += '; m_{#tilde{#chi}_{1}^{0}} [GeV]'
 
-    histo_pad_master = r.TH2F('h_acceptance_'+selection, title,
-                              100, float(mc1Range['min']), float(mc1Range['max']),
-                              100, float(mn1Range['min']), float(mn1Range['max']))
-    histo_acceptance = r.TH2F('h_acceptance_'+selection, title,
+    histo_pad_master = r.TH2F('h_pad_master_'+quantity+'_'+selection, title,
                               100, float(mc1Range['min']), float(mc1Range['max']),
                               100, float(mn1Range['min']), float(mn1Range['max']))
-    histo_efficiency = r.TH2F('h_efficiency_'+selection, title,
-                              100, float(mc1Range['min']), float(mc1Range['max']),
-                              100, float(mn1Range['min']), float(mn1Range['max']))
-    tg2d_acceptance = r.TGraph2D()
-    tg2d_acceptance.SetName('acceptance_'+selection)
-    tg2d_efficiency = r.TGraph2D()
-    tg2d_efficiency.SetName('efficiency_'+selection)
+    # the map interpolated between the mass points (what TGraph2D would draw), only the bins inside their hull
+    h = r.TH2F('h_'+quantity+'_'+selection, title,
+               n_bins, float(mc1Range['min']), float(mc1Range['max']),
+               n_bins, float(mn1Range['min']), float(mn1Range['max']))
+    h.FillN(len(canvas['map_z']), canvas['map_x'], canvas['map_y'], canvas['map_z'])
 
-    percent = 100.
-    acceptance_scale_factor = 1.0e4
-    acceptance_scale_label = '10^{4}'
-    for count in counts:
-        mc1, mn1 = mc1_val(count), mn1_val(count)
-        bf, filterEff = bf_val(count), filter_eff_val(count)
-        N_generated = n_gen_val(count)
-        N_fiducial, N_fiducial_reco = n_fiducial_val(count, selection), n_fiducial_reco_val(count, selection)
-
-        histo_acceptance.Fill(mc1, mn1, N_fiducial / (N_generated / (bf * filterEff)) * acceptance_scale_factor)
-        histo_efficiency.Fill(mc1, mn1, N_fiducial_reco / N_fiducial * percent)
-        tg2d_acceptance.SetPoint(tg2d_acceptance.GetN(), mc1, mn1, N_fiducial / (N_generated / (bf * filterEff)))
-        tg2d_efficiency.SetPoint(tg2d_efficiency.GetN(), mc1, mn1, N_fiducial_reco / N_fiducial)
-
-    # plot
     r.gStyle.SetPaintTextFormat('.3f')
-    maxEff = 100.
-    for h in [histo_acceptance, histo_efficiency]:
-        c = r.TCanvas('c_'+h.GetName(), '', 800, 600)
-        c.cd()
-        c.SetRightMargin(2.0*c.GetRightMargin())
-        graph = r.TGraph2D(h)
-        h.SetStats(0)
-        h.SetMarkerSize(1.5*h.GetMarkerSize())
-        # histo_pad_master.SetMaximum(h.GetMaximum())
-        histo_pad_master.Draw('axis') # just to get axes and palette
-	graph.Draw("colz same")
- 	c.Update()
-
-	text_eff = []
-	text_acc = []
-	counter = 0
-	for count in counts:
-	  mc1_txt, mn1_txt = mc1_val(count), mn1_val(count)
-	  bf_txt, filterEff_txt = bf_val(count), filter_eff_val(count)
-	  N_generated_txt = n_gen_val(count)
-	  N_fiducial_txt, N_fiducial_reco_txt = n_fiducial_val(count, selection), n_fiducial_reco_val(count, selection)
-	  acceptance_txt = N_fiducial_txt / (N_generated_txt / (bf_txt * filterEff_txt)) * acceptance_scale_factor
-	  efficiency_txt = N_fiducial_reco_txt / N_fiducial_txt * percent
-	  #print N_fiducial_reco_txt, N_fiducial_txt
-	  if "accep" in c.GetName():
-	    text_acc.append(r.TText(mc1_txt, mn1_txt, str(round(acceptance_txt,1))))
-	    text_acc[counter].SetTextSize(0.03)
-	    # text_acc[counter].SetTextAngle(15)
-	    text_acc[counter].Draw("same")
-	    #print mc1_txt, mn1_txt, acceptance_txt, str(round(acceptance_txt,2))
-	  if "efficiency" in c.GetName():
-	    text_eff.append(r.TText(mc1_txt, mn1_txt, str(int(round(efficiency_txt,0)))))
-	    text_eff[counter].SetTextSize(0.03)
-	    # text_eff[counter].SetTextAngle(15)
-	    text_eff[counter].Draw("same")
-	    #print mc1_txt, mn1_txt, efficiency_txt, str(round(efficiency_txt,2))
-	  counter += 1
-
-	c.Update()
-	xAx = histo_pad_master.GetXaxis()
-        yAx = histo_pad_master.GetYaxis()
-	xAx.SetTitle("m_{#tilde{#chi}_{1}^{#pm},#tilde{#chi}_{2}^{0}} [GeV]")
-	yAx.SetTitle("m_{#tilde{#chi}_{1}^{0}} [GeV]")
-	# xAx.SetLimits(125, 350)
-	# yAx.SetLimits(0, 90)
-	xAx.SetRangeUser(125.0, 350.0)
-	yAx.SetRangeUser(0.0, 90.0)
-        minTitleSize = min(a.GetTitleSize() for a in [xAx, yAx])
-        xAx.SetTitleSize(minTitleSize)
-        yAx.SetTitleSize(minTitleSize)
-	xAx.SetTitleOffset(1.1*xAx.GetTitleOffset())
-	yAx.SetTitleOffset(1.1*yAx.GetTitleOffset())
-        # zAx.SetTitle("Acceptance [%]" if 'accep' in c.GetName() else 'Efficiency [%]')
-	c.Update()
-
-        zAx = graph.GetZaxis()
-        zAx.SetTitle((acceptance_scale_label+' x Acceptance') if 'accep' in c.GetName() else 'Efficiency [%]')
-        zAx.SetTitleOffset(1.1*zAx.GetTitleOffset())
-
-        # labels etc.
-        drawAtlasLabel(c, ypos=0.92)
-        topLeftLabel(c, '#sqrt{s} = 8 TeV, 20.3 fb^{-1}', ypos=0.86)
-        topRightLabel(c, nicelabel(selection), xpos=0.75, ypos=0.92)
-        c.Update()
-
-        mkdirIfNeeded(output_dir)
-        c.SaveAs(output_dir +'/'+ c.GetName()+'.eps')
-        c.SaveAs(output_dir +'/'+ c.GetName()+'.png')
-    # save graphs for hepdata (don't want a bunch of zeroes)
-    for g in [tg2d_acceptance, tg2d_efficiency]:
-        out_file = r.TFile.Open(output_dir +'/'+ g.GetName()+'.root', 'recreate')
-        out_file.cd()
-        g.Write()
-        out_file.Close()
+    c = r.TCanvas(name, '', 800, 600)
+    c.cd()
+    c.SetRightMargin(2.0*c.GetRightMargin())
+    h.SetStats(0)
+    h.SetMarkerSize(1.5*h.GetMarkerSize())
+    # histo_pad_master.SetMaximum(h.GetMaximum())
+    histo_pad_master.Draw('axis') # just to get axes and palette
+    h.Draw("colz same")
+    c.Update()
+
+    texts = []
+    for x, y, label in zip(mc1.tolist(), mn1.tolist(), canvas['labels']):
+        text = r.TText(x, y, label)
+        text.SetTextSize(0.03)
+        # text.SetTextAngle(15)
+        text.Draw("same")
+        texts.append(text)
+
+    c.Update()
+    xAx = histo_pad_master.GetXaxis()
+    yAx = histo_pad_master.GetYaxis()
+    xAx.SetTitle("m_{#tilde{#chi}_{1}^{#pm},#tilde{#chi}_{2}^{0}} [GeV]")
+    yAx.SetTitle("m_{#tilde{#chi}_{1}^{0}} [GeV]")
+    # xAx.SetLimits(125, 350)
+    # yAx.SetLimits(0, 90)
+    xAx.SetRangeUser(125.0, 350.0)
+    yAx.SetRangeUser(0.0, 90.0)
+    minTitleSize = min(a.GetTitleSize() for a in [xAx, yAx])
+    xAx.SetTitleSize(minTitleSize)
+    yAx.SetTitleSize(minTitleSize)
+    xAx.SetTitleOffset(1.1*xAx.GetTitleOffset())
+    yAx.SetTitleOffset(1.1*yAx.GetTitleOffset())
+    c.Update()
+
+    zAx = h.GetZaxis()
+    zAx.SetTitle((acceptance_scale_label+' x Acceptance') if quantity=='acceptance' else 'Efficiency [%]')
+    zAx.SetTitleOffset(1.1*zAx.GetTitleOffset())
+
+    # labels etc.
+    drawAtlasLabel(c, ypos=0.92)
+    topLeftLabel(c, '#sqrt{s} = 8 TeV, 20.3 fb^{-1}', ypos=0.86)
+    topRightLabel(c, nicelabel(selection), xpos=0.75, ypos=0.92)
+    c.Update()
+    for f in formats:
+        c.SaveAs(output_dir +'/'+ name+'.'+f)
+
+if __name__=='__main__':
+    main()
@@ -5,40 +5,26 @@
 # Extract from the canvas all the objects that have name 'TGraph', and
 # save them with name = title.
 #
+# This is now one rule of extract_objects.py (the figures use it
+# through figures.json); kept for the command line.
+#
 # davide.gerbaudo@gmail.com
 # Apr 2015
 
-import re
 import sys
-import ROOT as R
-R.gROOT.SetBatch(1)
+import extract_objects
 
 def main():
     if len(sys.argv)<3:
         print "usage: {} input,root output.root [title1 title2 ...]".format(sys.argv[0])
         return
 
-    input_filename  = sys.argv[1]
-    output_filename = sys.argv[2]
-    allowed_titles  = sys.argv[3:]
-    input_file = R.TFile.Open(input_filename)
-    output_file = R.TFile.Open(output_filename, 'recreate')
-    output_file.cd()
-
-    c1 = input_file.Get('c1')
+    rename_tgraphs(sys.argv[1], sys.argv[2], sys.argv[3:])
 
-    for p in c1.GetListOfPrimitives():
-        print p.GetName(),' ',p.GetTitle()
-        if p.GetName()!='Graph':
-            continue
-        title = p.GetTitle()
-        if allowed_titles and title not in allowed_titles:
-            print "skipping {}".format(title)
-            continue
-        p.SetName(title)
-        p.Write()
-        print "saving {}".format(title)
-    output_file.Close()
+def rename_tgraphs(input_filename, output_filename, allowed_titles=[]):
+    rule = extract_objects.rule({'path' : 'c1', 'name' : 'Graph', 'title' : allowed_titles or None, 'target' : '{title}'},
+                                input_filename, output_filename)
+    extract_objects.extract([rule])
 
 if __name__=='__main__':
     main()
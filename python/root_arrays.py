@@ -0,0 +1,172 @@
+#!/bin/env python
+
+# numpy views of the arrays inside the ROOT objects, and bulk writes back into them
+#
+# A TGraph keeps its points in C arrays (fX, fY, and fEXlow... for the
+# graphs with errors); a TH1 keeps its bin contents in the TArray it
+# inherits from, and its sum of squared weights in fSumw2. Here they
+# are exposed as numpy arrays sharing the memory of the object, with
+# no copy and no per-point call, so that e.g. replacing a sentinel
+# value or dropping the errors is one array operation. A view is valid
+# as long as the object is not resized (Set(n), Rebin, ...) or deleted.
+#
+# The set_* functions write whole arrays (or scalars, broadcast) into
+# the object; they resize a graph when the number of points changes,
+# and they go through SetPoint/SetBinContent only when the buffer
+# cannot be mapped (e.g. a TH1 that is not a TH1F/D/I/S/C).
+#
+# Example:
+#   x, y, exl, exh, eyl, eyh = root_arrays.graph_arrays(graph)   # errors are None for a TGraph
+#   y[y==-10] = 0.0                                              # changes the graph
+#   root_arrays.set_graph(graph, eyl=0.0, eyh=0.0)
+#   contents = root_arrays.histogram_contents(histo)            # without under/overflow
+#   root_arrays.set_histogram(histo, contents=2*contents, errors=np.sqrt(2*contents))
+#
+# Oct 2026
+
+import numpy as np
+
+# the TArray a TH1 inherits from, and the type of its elements
+histogram_types = [('TArrayD', np.float64), ('TArrayF', np.float32), ('TArrayI', np.int32),
+                   ('TArrayS', np.int16), ('TArrayC', np.int8)]
+
+def buffer_to_array(buf, n, dtype=np.float64):
+    """view (no copy) of a C array returned by ROOT"""
+    if n==0 or buf is None:
+        return np.zeros(n, dtype=dtype)
+    if hasattr(buf, 'SetSize') : buf.SetSize(n)      # PyROOT
+    elif hasattr(buf, 'reshape') : buf.reshape((n,)) # cppyy
+    return np.frombuffer(buf, dtype=dtype, count=n)
+
+def graph_arrays(graph):
+    """x, y, exl, exh, eyl, eyh of a TGraph (errors are None if the graph has none;
+    for a TGraphErrors, exl is exh and eyl is eyh)"""
+    n = graph.GetN()
+    x, y = buffer_to_array(graph.GetX(), n), buffer_to_array(graph.GetY(), n)
+    if graph.InheritsFrom('TGraphAsymmErrors'):
+        errors = [buffer_to_array(e, n) for e in [graph.GetEXlow(), graph.GetEXhigh(), graph.GetEYlow(), graph.GetEYhigh()]]
+    elif graph.InheritsFrom('TGraphErrors'):
+        ex, ey = buffer_to_array(graph.GetEX(), n), buffer_to_array(graph.GetEY(), n)
+        errors = [ex, ex, ey, ey]
+    else:
+        errors = [None]*4
+    return [x, y] + errors
+
+def graph2d_arrays(graph):
+    """x, y, z, ezl, ezh of a TGraph2D (the errors are None if the graph has none)"""
+    n = graph.GetN()
+    x, y, z = [buffer_to_array(b, n) for b in [graph.GetX(), graph.GetY(), graph.GetZ()]]
+    if graph.InheritsFrom('TGraph2DAsymmErrors'):
+        ezl, ezh = buffer_to_array(graph.GetEZlow(), n), buffer_to_array(graph.GetEZhigh(), n)
+    elif graph.InheritsFrom('TGraph2DErrors'):
+        ezl = ezh = buffer_to_array(graph.GetEZ(), n)
+    else:
+        ezl = ezh = None
+    return x, y, z, ezl, ezh
+
+def histogram_dtype(histo):
+    for name, dtype in histogram_types:
+        if histo.InheritsFrom(name):
+            return dtype
+    return None
+
+def histogram_edges(histo):
+    """the n+1 bin edges of the x axis (a view for variable bins)"""
+    n = histo.GetNbinsX()
+    axis = histo.GetXaxis()
+    return (buffer_to_array(axis.GetXbins().GetArray(), n+1) if axis.GetXbins().GetSize() else
+            np.linspace(axis.GetXmin(), axis.GetXmax(), n+1))
+
+def histogram_contents(histo, flow=False):
+    """view of the bin contents, in the type of the histogram (with under/overflow if flow);
+    a copy (float64) if the histogram does not store them in a TArray"""
+    n = histo.GetNbinsX()
+    dtype = histogram_dtype(histo)
+    if dtype is not None:
+        contents = buffer_to_array(histo.GetArray(), n+2, dtype)
+    else:
+        contents = np.array([histo.GetBinContent(i) for i in range(n+2)])
+    return contents if flow else contents[1:-1]
+
+def histogram_sumw2(histo, flow=False):
+    """view of the sums of squared weights, None if the histogram does not have them"""
+    if not histo.GetSumw2N():
+        return None
+    sumw2 = buffer_to_array(histo.GetSumw2().GetArray(), histo.GetNbinsX()+2)
+    return sumw2 if flow else sumw2[1:-1]
+
+def histogram_arrays(histo):
+    """bin centers, low edges, high edges, contents, errors of a TH1 (without under/overflow), as float64"""
+    edges = histogram_edges(histo)
+    contents = histogram_contents(histo).astype(np.float64)
+    sumw2 = histogram_sumw2(histo)
+    errors = np.sqrt(sumw2) if sumw2 is not None else np.sqrt(np.abs(contents))
+    return 0.5*(edges[:-1]+edges[1:]), edges[:-1], edges[1:], contents, errors
+
+def values(o):
+    """y values of a graph, bin contents of a histogram (views when possible), None otherwise"""
+    return (graph_arrays(o)[1] if o.InheritsFrom('TGraph') else
+            histogram_contents(o) if o.InheritsFrom('TH1') else
+            None)
+
+def _write(view, new_values):
+    """new_values (array or scalar) into view; False if the buffer is read-only"""
+    if not view.flags.writeable:
+        return False
+    view[...] = new_values
+    return True
+
+def set_graph(graph, x=None, y=None, exl=None, exh=None, eyl=None, eyh=None):
+    """write the given arrays (or scalars) into the graph; with an array of another length
+    than GetN(), the graph is resized first (the new points are at 0)"""
+    columns = [x, y, exl, exh, eyl, eyh]
+    lengths = sorted(set(len(a) for a in columns if a is not None and np.ndim(a)>0))
+    if len(lengths)>1:
+        raise ValueError("arrays of different lengths %s for %s" % (lengths, graph.GetName()))
+    if lengths and lengths[0]!=graph.GetN():
+        graph.Set(lengths[0])
+    arrays = graph_arrays(graph)
+    if any(e is not None for e in columns[2:]) and arrays[2] is None:
+        raise TypeError("%s (%s) has no errors" % (graph.GetName(), graph.ClassName()))
+    written = all([_write(view, new) for view, new in zip(arrays, columns) if new is not None])
+    if not written:
+        _set_points(graph, *[np.broadcast_to(new if new is not None else old, (graph.GetN(),))
+                             for old, new in zip(arrays, columns) if old is not None])
+    return graph
+
+def _set_points(graph, x, y, exl=None, exh=None, eyl=None, eyh=None):
+    for i in range(graph.GetN()):
+        graph.SetPoint(i, x[i], y[i])
+        if graph.InheritsFrom('TGraphAsymmErrors'):
+            graph.SetPointError(i, exl[i], exh[i], eyl[i], eyh[i])
+        elif exl is not None:
+            graph.SetPointError(i, exh[i], eyh[i])
+
+def zero_errors(graph):
+    """drop the errors of a graph, whatever its class"""
+    for view in graph_arrays(graph)[2:]:
+        if view is not None and not _write(view, 0.0):
+            return set_graph(graph, exl=0.0, exh=0.0, eyl=0.0, eyh=0.0)
+    return graph
+
+def set_histogram(histo, contents=None, errors=None):
+    """write the bin contents and/or errors (without under/overflow) into the histogram"""
+    n = histo.GetNbinsX()
+    for name, a in [('contents', contents), ('errors', errors)]:
+        if a is not None and np.ndim(a)>0 and len(a)!=n:
+            raise ValueError("%d %s for the %d bins of %s" % (len(a), name, n, histo.GetName()))
+    if contents is not None:
+        dtype = histogram_dtype(histo)
+        if dtype is None or not _write(histogram_contents(histo), contents):
+            contents = np.broadcast_to(contents, (n,))
+            for i in range(n):
+                histo.SetBinContent(i+1, contents[i])
+    if errors is not None:
+        if not histo.GetSumw2N():
+            histo.Sumw2()
+        if not _write(histogram_sumw2(histo), np.square(errors)):
+            errors = np.broadcast_to(errors, (n,))
+            for i in range(n):
+                histo.SetBinError(i+1, errors[i])
+    histo.ResetStats()
+    return histo
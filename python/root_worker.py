@@ -0,0 +1,217 @@
+#!/bin/env python
+
+# Keep ROOT imported in a long-lived local process and run the scripts in it
+#
+# Importing ROOT takes seconds, and each script of the pipeline used to
+# pay for it. The server imports ROOT (and the scripts) once, listens
+# on a Unix socket, and for each request forks a child that runs the
+# main() of the requested script with the given arguments; the child
+# starts with everything already loaded, requests can run in parallel,
+# and a crash in one of them does not take the server down. Output
+# (including the one from ROOT) goes back to the client together with
+# the exit code.
+#
+# Example:
+# > root_worker.py start                                # in the background
+# > root_worker.py call ./python/format_input.py figure_5
+# > root_worker.py stop
+# The socket is $ROOT_WORKER_SOCKET (default /tmp/root_worker_<uid>.sock);
+# run_all.sh uses the worker whenever that socket exists.
+#
+# Oct 2026
+
+import argparse
+import json
+import os
+import signal
+import socket
+import SocketServer
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+
+# environment of the client passed to the scripts (see tracing.py)
+forwarded_variables = ['HEPDATA_TRACE', 'HEPDATA_VERBOSE']
+
+# scripts that can be run by the worker (python/<name>.py)
+scripts = ['format_input',
+           'rename_tgraphs',
+           'rename_semicolon',
+           'extract_objects',
+           'add_error_bar_from_tgraph',
+           'plot_acceptance_efficiency_TGraph2D',
+           'hepdata_writer',
+           'fill_header',
+           'merge_hepdata',
+           'make_figure',
+           ]
+
+class WorkerError(RuntimeError):
+    pass
+
+def default_socket():
+    return os.environ.get('ROOT_WORKER_SOCKET', '/tmp/root_worker_%d.sock' % os.getuid())
+
+def main():
+    parser = argparse.ArgumentParser(description='warm ROOT worker')
+    parser.add_argument('action', choices=['serve', 'start', 'stop', 'call', 'status'])
+    parser.add_argument('command', nargs=argparse.REMAINDER, help='for call: script and its arguments')
+    parser.add_argument('-s', '--socket', default=default_socket(), help='unix socket path')
+    args = parser.parse_args()
+    if args.action=='serve':
+        serve(args.socket)
+    elif args.action=='start':
+        start(args.socket)
+    elif args.action=='stop':
+        stop(args.socket)
+    elif args.action=='status':
+        print 'running' if is_running(args.socket) else 'not running'
+    elif args.action=='call':
+        try:
+            returncode, output = call(args.command, args.socket)
+        except WorkerError as e:
+            sys.exit(str(e))
+        sys.stdout.write(output)
+        sys.exit(returncode)
+
+def script_name(path):
+    name = os.path.basename(path)
+    return name[:-3] if name.endswith('.py') else name
+
+def run_script(command):
+    """run main() of one of the scripts as if it was called from the command line; return the exit code"""
+    name = script_name(command[0])
+    if name not in scripts:
+        print "root_worker: unknown script '%s' (known: %s)" % (command[0], ', '.join(scripts))
+        return 2
+    module = sys.modules.get(name) or __import__(name)
+    sys.argv = [a.encode('utf-8') if isinstance(a, unicode) else a for a in command] # json gives unicode
+    try:
+        module.main()
+    except SystemExit as e:
+        if e.code is None : return 0
+        if isinstance(e.code, int) : return e.code
+        print e.code
+        return 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
+
+class RequestHandler(SocketServer.StreamRequestHandler):
+    def handle(self):
+        request = json.loads(self.rfile.readline())
+        if request.get('op')=='shutdown':
+            os.kill(os.getppid(), signal.SIGTERM)
+            self.wfile.write(json.dumps({'returncode': 0, 'output': ''}) + '\n')
+            return
+        if request.get('op')=='ping':
+            self.wfile.write(json.dumps({'returncode': 0, 'output': 'pong\n'}) + '\n')
+            return
+        # this is the forked child: redirect the file descriptors so that
+        # the output from C++ is captured too
+        capture = tempfile.TemporaryFile()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(capture.fileno(), 1)
+        os.dup2(capture.fileno(), 2)
+        try:
+            os.chdir(request.get('cwd', '.'))
+            for k in forwarded_variables:
+                os.environ.pop(k, None)
+            os.environ.update(request.get('env', {}))
+            returncode = run_script(request['command'])
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        capture.seek(0)
+        output = capture.read().decode('utf-8', 'replace') # ROOT does not always write utf-8
+        self.wfile.write(json.dumps({'returncode': returncode, 'output': output}) + '\n')
+
+class Server(SocketServer.ForkingMixIn, SocketServer.UnixStreamServer):
+    max_children = 256
+
+def warm_up():
+    """import ROOT and the scripts, load the classes they use, set up the plot style"""
+    import ROOT as r
+    r.gROOT.SetBatch(True)
+    r.PyConfig.IgnoreCommandLineOptions = True
+    for c in ['TFile', 'TH1F', 'TH2F', 'TGraph', 'TGraphAsymmErrors', 'TGraph2D', 'TCanvas', 'TText', 'TLatex']:
+        getattr(r, c)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    for s in scripts:
+        __import__(s)
+    # the plot style is set up once too, and inherited by the requests
+    sys.modules['plot_acceptance_efficiency_TGraph2D'].setAtlasStyle()
+
+def serve(socket_path):
+    warm_up()
+    if os.path.exists(socket_path):
+        if is_running(socket_path):
+            sys.exit("a worker is already listening on %s" % socket_path)
+        os.remove(socket_path)
+    old_umask = os.umask(0o077) # only this user can connect
+    server = Server(socket_path, RequestHandler)
+    os.umask(old_umask)
+    def terminate(signum, frame):
+        if os.path.exists(socket_path) : os.remove(socket_path)
+        os._exit(0)
+    signal.signal(signal.SIGTERM, terminate)
+    signal.signal(signal.SIGINT, terminate)
+    print "root_worker listening on %s" % socket_path
+    sys.stdout.flush()
+    server.serve_forever()
+
+def request(message, socket_path=None):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(socket_path or default_socket())
+    try:
+        stream = sock.makefile('rw')
+        stream.write(json.dumps(message) + '\n')
+        stream.flush()
+        reply = stream.readline()
+    finally:
+        sock.close()
+    if not reply:
+        raise WorkerError("root_worker: no reply to %s (the request process died, see the worker log)"
+                          % ' '.join(message.get('command', [message.get('op', '')])))
+    return json.loads(reply)
+
+def call(command, socket_path=None):
+    """run a script in the worker; return (exit code, output)"""
+    env = dict((k, os.environ[k]) for k in forwarded_variables if k in os.environ)
+    response = request({'op': 'run', 'command': command, 'cwd': os.getcwd(), 'env': env}, socket_path)
+    return response['returncode'], response['output'].encode('utf-8')
+
+def is_running(socket_path=None):
+    try:
+        return request({'op': 'ping'}, socket_path)['returncode']==0
+    except (socket.error, ValueError, WorkerError):
+        return False
+
+def start(socket_path=None, timeout=120.0):
+    """start a server in the background and wait until it answers"""
+    socket_path = socket_path or default_socket()
+    if is_running(socket_path):
+        return None
+    log = open(socket_path + '.log', 'w')
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), 'serve', '--socket', socket_path],
+                            stdout=log, stderr=subprocess.STDOUT)
+    start_time = time.time()
+    while not is_running(socket_path):
+        if proc.poll() is not None:
+            raise RuntimeError("root_worker exited, see %s" % log.name)
+        if time.time()-start_time > timeout:
+            proc.terminate()
+            raise RuntimeError("root_worker did not start in %.0fs, see %s" % (timeout, log.name))
+        time.sleep(0.1)
+    return proc
+
+def stop(socket_path=None):
+    if is_running(socket_path):
+        request({'op': 'shutdown'}, socket_path)
+
+if __name__=='__main__':
+    main()
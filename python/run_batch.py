@@ -0,0 +1,234 @@
+#!/bin/env python
+
+# Prepare the hepdata records of several analyses at once, on one shared pool of processes
+#
+# The scripts work in the current directory: they read input_from_*/,
+# write input_formatted/, input_acc_eff/ and output/, and the merged
+# files start with input_formatted/hepdata_header.txt. Each analysis
+# of the batch file gets its own directory with this layout:
+# - its input directories (and the outputs of its 'external' figures)
+#   are linked there;
+# - the header is written from a template, with the values of the
+#   analysis ('*inspireId:', '*title:', ...);
+# - its figures come from its own registry (see figure_registry.py).
+# The steps of all the analyses (the graph of run_pipeline.py, in each
+# directory) go into one graph, with names '<analysis>/<step>', run on
+# one pool of -j processes: the cores stay busy until the last step of
+# the last analysis, instead of running one run_all.sh after the other.
+# What is expensive is shared: with --worker, ROOT, the scripts and the
+# plot style are loaded once in a root_worker used by all the analyses;
+# the artifact cache is shared too, and a step with the same inputs in
+# two analyses (same scripts, same input files, same registry entry)
+# is run once and copied to the other.
+#
+# Example:
+# > run_batch.py analyses.json                       # all the analyses
+# > run_batch.py -j 16 --worker analyses.json wh_1l2l
+# > run_batch.py analyses.json --list
+# with analyses.json:
+#   {"defaults": {"header": "input_formatted/hepdata_header.txt"},
+#    "analyses": [{"name": "wh_1l2l", "registry": "figures.json",
+#                  "inputs": {"input_from_sigve": "input_from_sigve", "input_from_suneet": "/data/suneet"},
+#                  "external": "/data/other_channels",
+#                  "header_values": {"inspireId": 1341609, "title": "Search for ..."},
+#                  "figures": ["figure_5", "merge_all"]},
+#                 ...]}
+# The paths are relative to the batch file. Each analysis runs in
+# "directory" (default batch/<name>); "figures" are the nodes to build
+# (see run_pipeline.py --list; default: all).
+#
+# Oct 2026
+
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import re
+import sys
+import tracing
+import figure_registry
+import merge_hepdata
+import run_pipeline
+from artifact_cache import ArtifactCache, default_dir, default_max_size, parse_size
+
+top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+Analysis = collections.namedtuple('Analysis', ['name', 'directory', 'registry', 'inputs', 'external', 'header',
+                                               'header_values', 'figures'])
+analysis_fields = list(Analysis._fields) + ['comment']
+valid_name = re.compile(r'^[\w.\-]+$')
+header_key = re.compile(r'^\*(\w+):')
+
+class BatchError(ValueError):
+    pass
+
+def main():
+    parser = argparse.ArgumentParser(description='prepare the hepdata records of several analyses')
+    parser.add_argument('batch', help='json file with the analyses')
+    parser.add_argument('analyses', nargs='*', help='names of the analyses to run (default: all)')
+    parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(), help='number of worker processes')
+    parser.add_argument('-l', '--list', action='store_true', help='print the graph and exit')
+    parser.add_argument('-n', '--dry-run', action='store_true', help='print the commands in the order they would run')
+    parser.add_argument('-w', '--worker', action='store_true', help='run the python steps in one warm ROOT worker')
+    parser.add_argument('-c', '--columnar', action='store_true', help='also write the columnar copy of each figure')
+    parser.add_argument('--no-cache', action='store_true', help='always run the steps, do not use the artifact cache')
+    parser.add_argument('--cache-dir', default=default_dir, help='artifact cache directory (shared by the analyses)')
+    parser.add_argument('--cache-size', default=str(default_max_size), help='maximum cache size (suffix K, M, G)')
+    parser.add_argument('--trace', help='json-lines trace file (overwritten)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='also print the debug messages of the scripts')
+    args = parser.parse_args()
+    try:
+        analyses = read_batch(args.batch, args.analyses)
+        tasks = [t for a in analyses for t in analysis_tasks(a, columnar=args.columnar)]
+    except (BatchError, figure_registry.RegistryError, KeyError) as e:
+        sys.exit(str(e))
+    if args.list:
+        for t in run_pipeline.topological_order(tasks):
+            print "{} <- {}".format(t.name, ' '.join(t.deps))
+        return
+    if args.dry_run:
+        for t in run_pipeline.topological_order(tasks):
+            print "(cd %s && %s)" % (t.cwd, ' '.join(t.command))
+        return
+    try:
+        for a in analyses:
+            setup_directory(a)
+    except (BatchError, IOError, OSError) as e:
+        sys.exit(str(e))
+    if args.trace:
+        if os.path.exists(args.trace) : os.remove(args.trace)
+        os.environ[tracing.trace_variable] = os.path.abspath(args.trace)
+    if args.verbose:
+        os.environ[tracing.verbose_variable] = '1'
+    cache = None if args.no_cache else ArtifactCache(os.path.abspath(args.cache_dir))
+    with tracing.span('batch', objects=len(tasks), analyses=len(analyses), jobs=args.jobs, worker=args.worker):
+        if args.worker:
+            failed = run_pipeline.run_with_worker(tasks, jobs=args.jobs, cache=cache)
+        else:
+            failed = run_pipeline.run(tasks, jobs=args.jobs, cache=cache)
+    for a in analyses:
+        steps = [t.name for t in tasks if t.cwd==a.directory]
+        errors = [s for s in steps if s in failed]
+        print "%-20s %3d steps, %s (%s)" % (a.name, len(steps), "%d failed" % len(errors) if errors else 'ok',
+                                            os.path.relpath(a.directory))
+    if cache:
+        cache.evict(parse_size(args.cache_size))
+    sys.exit(1 if failed else 0)
+
+def read_batch(filename, names=None):
+    """the Analyses of a json file {"defaults": {...}, "analyses": [{...}]} (those in names, if given);
+    the paths are made absolute, relative to the file"""
+    try:
+        with open(filename) as batch_file:
+            content = json.load(batch_file, object_pairs_hook=collections.OrderedDict)
+    except (IOError, ValueError) as e:
+        raise BatchError("cannot read %s: %s" % (filename, e))
+    base = os.path.dirname(os.path.abspath(filename))
+    def path(p):
+        return os.path.normpath(os.path.join(base, p)) if p else p
+    defaults = content.get('defaults', {})
+    analyses, errors = [], []
+    for i, entry in enumerate(content.get('analyses', [])):
+        entry = dict(defaults, **entry)
+        name = entry.get('name')
+        unknown = [k for k in entry if k not in analysis_fields]
+        if not name or not valid_name.match(name):
+            errors.append("analysis %d: invalid name '%s'" % (i, name))
+            continue
+        if unknown:
+            errors.append("%s: unknown field(s) %s; known: %s" % (name, ', '.join(unknown), ', '.join(analysis_fields)))
+        analyses.append(Analysis(name,
+                                 path(entry.get('directory') or os.path.join('batch', name)),
+                                 path(entry.get('registry')) or os.path.normpath(figure_registry.default_filename),
+                                 collections.OrderedDict((k, path(v)) for k, v in entry.get('inputs', {}).items()),
+                                 path(entry.get('external')),
+                                 path(entry.get('header')) or os.path.join(top_dir, merge_hepdata.header),
+                                 entry.get('header_values', {}),
+                                 entry.get('figures')))
+    for field in ['name', 'directory']:
+        values = [getattr(a, field) for a in analyses]
+        duplicated = sorted(set(v for v in values if values.count(v)>1))
+        if duplicated:
+            errors.append("%s: the same %s for several analyses: %s" % (filename, field, ', '.join(duplicated)))
+    unknown = [n for n in (names or []) if n not in [a.name for a in analyses]]
+    if unknown:
+        errors.append("%s: unknown analysis(es) %s" % (filename, ', '.join(unknown)))
+    if errors:
+        raise BatchError('\n'.join(errors))
+    return [a for a in analyses if not names or a.name in names]
+
+def absolute(command):
+    """the command with the scripts of this repository given by their absolute path"""
+    return [os.path.normpath(os.path.join(top_dir, c)) if c.startswith('./python/') or c=='./run_all.sh' else c
+            for c in command]
+
+def analysis_tasks(analysis, columnar=False):
+    """the steps of run_pipeline.py for one analysis, run in its directory, named '<analysis>/<step>'"""
+    registry = figure_registry.load(analysis.registry)
+    tasks = run_pipeline.build_graph(registry, columnar=columnar)
+    # the steps whose outputs are given as inputs (e.g. input_from_suneet instead of the zip file) are not run
+    provided = set(analysis.inputs)
+    tasks = [t for t in tasks if not t.outputs or not all(o in provided for o in t.outputs)]
+    names = set(t.name for t in tasks)
+    tasks = [t._replace(deps=[d for d in t.deps if d in names]) for t in tasks]
+    tasks = run_pipeline.select_tasks(tasks, analysis.figures)
+    def qualified(name):
+        return analysis.name + '/' + name
+    return [t._replace(name=qualified(t.name), deps=[qualified(d) for d in t.deps], command=absolute(t.command),
+                       inputs=[os.path.join(top_dir, i) if i.startswith('python/') else i for i in t.inputs],
+                       cwd=analysis.directory)
+            for t in tasks]
+
+def link(source, destination):
+    """destination -> source; an existing link is replaced, anything else is left alone (error)"""
+    if not os.path.exists(source):
+        raise BatchError("missing input %s" % source)
+    if os.path.islink(destination):
+        os.remove(destination)
+    elif os.path.exists(destination):
+        raise BatchError("%s exists and is not a link, not replaced by %s" % (destination, source))
+    parent = os.path.dirname(destination)
+    if parent and not os.path.exists(parent) : os.makedirs(parent)
+    os.symlink(source, destination)
+
+def header_text(template, values):
+    """the template with the lines '*key: ...' of each key in values replaced by '*key: value'
+    (one line for each element of a list); a key that is not in the template is an error"""
+    with open(template) as template_file:
+        lines = template_file.read().decode('utf-8').splitlines()
+    keys = set(m.group(1) for m in (header_key.match(l) for l in lines) if m)
+    unknown = sorted(k for k in values if k not in keys)
+    if unknown:
+        raise BatchError("%s: no line for %s" % (template, ', '.join('*%s:' % k for k in unknown)))
+    text, replaced = [], set()
+    for line in lines:
+        m = header_key.match(line)
+        key = m.group(1) if m else None
+        if key not in values:
+            text.append(line)
+        elif key not in replaced:
+            value = values[key]
+            text.extend(u'*%s: %s' % (key, v) for v in (value if isinstance(value, list) else [value]))
+            replaced.add(key)
+    return (u'\n'.join(text) + u'\n').encode('utf-8')
+
+def setup_directory(analysis):
+    """the directory of an analysis: links to its inputs (and to the outputs of its external figures), header"""
+    with tracing.span('batch_setup', figure=analysis.name):
+        for d in ['input_formatted', merge_hepdata.output_dir]:
+            path = os.path.join(analysis.directory, d)
+            if not os.path.exists(path) : os.makedirs(path)
+        for name, source in analysis.inputs.items():
+            link(source, os.path.join(analysis.directory, name))
+        if analysis.external:
+            for fig in figure_registry.load(analysis.registry).select(kind='external'):
+                link(os.path.join(analysis.external, os.path.basename(fig.output)),
+                     os.path.join(analysis.directory, fig.output))
+        header = os.path.join(analysis.directory, merge_hepdata.header)
+        text = header_text(analysis.header, analysis.header_values)
+        if not os.path.exists(header) or open(header).read()!=text: # same file, same cache key
+            with open(header, 'w') as header_file:
+                header_file.write(text)
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,304 @@
+#!/bin/env python
+
+# Run the steps of run_all.sh as a dependency graph on a process pool
+#
+# Each node of the graph is one figure (or one preparation step); a
+# node is started as soon as all the nodes it depends on are done, so
+# the independent figures are converted in parallel and the total
+# time is set by the longest chain rather than by the sum of all the
+# conversions. The nodes are the figures of the registry (figures.json,
+# see figure_registry.py), made with make_figure.py.
+#
+# The graph follows the data:
+#   raw input (input_from_*) -> input_formatted/*.root, input_acc_eff/*.root
+#                            -> output/*.hep.dat -> output/hepdata*.hep.dat (+ .index.json)
+#
+# Example:
+# > ./python/run_pipeline.py                            # everything
+# > ./python/run_pipeline.py -j 4 figure_5 figure_6_a  # only these figures
+# > ./python/run_pipeline.py --list
+# > ./python/run_pipeline.py --worker                   # import ROOT once (see root_worker.py)
+# > ./python/run_pipeline.py --columnar                 # also output/*.columns (see columnar.py)
+#
+# The outputs of each step are cached by the hash of its inputs (see
+# artifact_cache.py): a step whose inputs did not change is not rerun,
+# its outputs are copied back from the cache (--no-cache to disable).
+#
+# With --trace, each step and the work done by the scripts are
+# recorded in a json-lines file (see tracing.py):
+# > ./python/run_pipeline.py --trace trace.jsonl && ./python/tracing.py summary trace.jsonl
+#
+# Oct 2026
+
+import argparse
+import collections
+import multiprocessing
+import os
+import Queue
+import subprocess
+import sys
+import time
+import traceback
+import tracing
+from artifact_cache import ArtifactCache, default_dir, default_max_size, parse_size
+
+RUN_ALL = ['bash', './run_all.sh']
+MAKE_FIGURE = ['./python/make_figure.py']
+
+# inputs/outputs: files or directories; they define the cache key and what is cached;
+# params: the registry fields the step depends on (also in the key);
+# cwd: the directory the step runs in, and where its relative inputs/outputs are (default: the current one)
+Task = collections.namedtuple('Task', ['name', 'command', 'deps', 'inputs', 'outputs', 'params', 'cwd'])
+Task.__new__.__defaults__ = (None,)
+# the python modules each step imports, at top level or on its way (they are part of its cache key)
+REGISTRY = ['python/figure_registry.py', 'python/extract_objects.py', 'python/make_figure.py', 'python/tracing.py']
+WRITER = REGISTRY + ['python/hepdata_writer.py', 'python/root_arrays.py', 'python/contours.py', 'python/fill_header.py']
+COLUMNAR = ['python/columnar.py', 'python/hepdata_reader.py']
+PREPARE_SCRIPTS = {
+    'format_input': ['python/format_input.py', 'python/root_arrays.py'],
+    'extract': [],
+    'copy': [],
+    }
+ACCEPTANCE_EFFICIENCY = ['python/plot_acceptance_efficiency_TGraph2D.py', 'python/interpolation.py', 'python/binomial.py',
+                         'python/tracing.py']
+MERGE = ['python/merge_hepdata.py', 'python/figure_registry.py', 'python/extract_objects.py', 'python/tracing.py',
+         'python/hepdata_reader.py', 'python/hepdata_writer.py', 'python/root_arrays.py']
+
+def main():
+    parser = argparse.ArgumentParser(description='run the hepdata steps following their dependencies')
+    parser.add_argument('targets', nargs='*', help='nodes to build, together with their dependencies (default: all)')
+    parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(), help='number of worker processes')
+    parser.add_argument('-l', '--list', action='store_true', help='print the graph and exit')
+    parser.add_argument('-n', '--dry-run', action='store_true', help='print the commands in the order they would run')
+    parser.add_argument('-w', '--worker', action='store_true', help='run the python steps in a warm ROOT worker')
+    parser.add_argument('-c', '--columnar', action='store_true', help='also write the columnar copy of each figure')
+    parser.add_argument('--no-cache', action='store_true', help='always run the steps, do not use the artifact cache')
+    parser.add_argument('--cache-dir', default=default_dir, help='artifact cache directory')
+    parser.add_argument('--cache-size', default=str(default_max_size), help='maximum cache size (suffix K, M, G)')
+    parser.add_argument('--trace', help='json-lines trace file (overwritten)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='also print the debug messages of the scripts')
+    args = parser.parse_args()
+
+    tasks = select_tasks(build_graph(columnar=args.columnar), args.targets)
+    if args.list:
+        for t in topological_order(tasks):
+            print "{} <- {}".format(t.name, ' '.join(t.deps))
+        return
+    if args.dry_run:
+        for t in topological_order(tasks):
+            print ' '.join(t.command)
+        return
+    if args.trace:
+        if os.path.exists(args.trace) : os.remove(args.trace)
+        os.environ[tracing.trace_variable] = os.path.abspath(args.trace) # also for the steps
+    if args.verbose:
+        os.environ[tracing.verbose_variable] = '1'
+    cache = None if args.no_cache else ArtifactCache(os.path.abspath(args.cache_dir))
+    with tracing.span('pipeline', objects=len(tasks), jobs=args.jobs, worker=args.worker):
+        if args.worker:
+            failed = run_with_worker(tasks, jobs=args.jobs, cache=cache)
+        else:
+            failed = run(tasks, jobs=args.jobs, cache=cache)
+    if cache:
+        cache.evict(parse_size(args.cache_size))
+    sys.exit(1 if failed else 0)
+
+def build_graph(registry=None, columnar=False):
+    """one node per figure and one per input file to be prepared, from the figure registry;
+    with columnar, the figures also write output/<figure>.columns"""
+    import figure_registry
+    from columnar import directory_name
+    from merge_hepdata import merged_outputs, index_filename
+    registry = registry or figure_registry.load()
+    # another registry than figures.json is passed on to the scripts
+    other = (['-r', registry.filename] if registry.filename and
+             os.path.abspath(registry.filename)!=os.path.abspath(figure_registry.default_filename) else [])
+    tasks = []
+    def add(name, command, deps=[], inputs=[], outputs=[], params=None):
+        tasks.append(Task(name, command, list(deps), list(inputs), list(outputs), params))
+    figures = registry.built()
+    preparations = set(f.prepare for f in figures)
+    if 'format_input' in preparations:
+        add('unzip_suneet_input', RUN_ALL+['unzip_suneet_input'],
+            inputs=['/tmp/whss_root_plots.zip'], outputs=['input_from_suneet'])
+    if 'acceptance_efficiency' in preparations:
+        add('acceptance_efficiency_input', ['./python/plot_acceptance_efficiency_TGraph2D.py'],
+            inputs=ACCEPTANCE_EFFICIENCY, outputs=['input_acc_eff'])
+    for fig in figures:
+        if fig.prepare=='acceptance_efficiency':
+            deps = ['acceptance_efficiency_input'] # one step for all of them
+        else:
+            add('input_'+fig.id, MAKE_FIGURE+other+['--prepare', fig.id],
+                ['unzip_suneet_input'] if fig.prepare=='format_input' else [],
+                inputs=REGISTRY+PREPARE_SCRIPTS[fig.prepare]+[fig.source], outputs=[fig.input],
+                params=[fig.prepare, fig.source, fig.prepare_args, fig.roles])
+            deps = ['input_'+fig.id]
+        # the key depends on this figure's entry only: editing a caption reruns only that figure
+        if columnar:
+            add(fig.id, MAKE_FIGURE+other+['--columnar', fig.id], deps, inputs=WRITER+COLUMNAR+[fig.input],
+                outputs=[fig.output, directory_name(fig.output)], params=fig._asdict())
+        else:
+            add(fig.id, MAKE_FIGURE+other+[fig.id], deps, inputs=WRITER+[fig.input], outputs=[fig.output],
+                params=fig._asdict())
+    # both merged files are written by the same node; the figures from
+    # the other channels (kind 'external') are already in output/ and
+    # are not rebuilt here
+    outputs = merged_outputs(registry)
+    parts = sorted(set(p for files in outputs.values() for p in files))
+    merged = sorted(outputs)
+    built = set(f.id for f in figures)
+    add('merge_all', ['./python/merge_hepdata.py']+other,
+        [f for f in registry.merged_figures() if f in built],
+        inputs=MERGE+parts,
+        outputs=merged + [index_filename(m) for m in merged],
+        params=registry.merged)
+    return tasks
+
+def select_tasks(tasks, targets=None):
+    """the targets and everything they depend on"""
+    by_name = dict((t.name, t) for t in tasks)
+    unknown = [t for t in (targets or []) if t not in by_name]
+    if unknown:
+        raise KeyError("unknown target(s) %s; see --list" % ', '.join(unknown))
+    if not targets:
+        return tasks
+    selected = set()
+    to_visit = list(targets)
+    while to_visit:
+        name = to_visit.pop()
+        if name not in selected:
+            selected.add(name)
+            to_visit.extend(by_name[name].deps)
+    return [t for t in tasks if t.name in selected]
+
+def topological_order(tasks):
+    by_name = dict((t.name, t) for t in tasks)
+    ordered, done, visiting = [], set(), set()
+    def visit(name):
+        if name in done : return
+        if name in visiting : raise ValueError("dependency cycle through %s" % name)
+        visiting.add(name)
+        for d in by_name[name].deps:
+            if d not in by_name : raise KeyError("%s depends on unknown node %s" % (name, d))
+            visit(d)
+        visiting.remove(name)
+        done.add(name)
+        ordered.append(by_name[name])
+    for t in tasks:
+        visit(t.name)
+    return ordered
+
+def count_dependents(tasks):
+    """number of nodes downstream of each node; used to start the longest chains first"""
+    dependents = collections.defaultdict(set)
+    for t in topological_order(tasks):
+        for d in t.deps:
+            dependents[d].add(t.name)
+    counts = {}
+    for t in reversed(topological_order(tasks)):
+        downstream = set(dependents[t.name])
+        for d in dependents[t.name]:
+            downstream |= counts[d]
+        counts[t.name] = downstream
+    return dict((k, len(v)) for k, v in counts.iteritems())
+
+def run_task(name, command, key=None, outputs=[], cache_dir=None, cwd=None):
+    """executed in the worker processes; never raise, otherwise the callback is never called.
+    With a cache key, restore the outputs if they are cached, store them after a successful run.
+    With cwd, everything (command, outputs) is relative to that directory."""
+    start = time.time()
+    cache = ArtifactCache(cache_dir) if key else None
+    previous_dir = os.getcwd()
+    try:
+        if cwd : os.chdir(cwd)
+        if cache and cache.restore(key, outputs):
+            return name, 0, '', time.time()-start, True
+        proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        output, _ = proc.communicate()
+        returncode = proc.returncode
+        if cache and returncode==0:
+            try:
+                cache.store(key, name, outputs)
+            except (IOError, OSError) as e:
+                output += "\ncannot cache the outputs of %s: %s\n" % (name, e)
+    except Exception:
+        output, returncode = traceback.format_exc(), -1
+    finally:
+        os.chdir(previous_dir) # the pool process runs the next task
+    return name, returncode, output, time.time()-start, False
+
+def run(tasks, jobs=None, cache=None, wrap=None):
+    """run the tasks on a pool of `jobs` processes; return the names of the failed/skipped ones.
+    The cache keys are computed here, when a task is ready (its inputs are there);
+    wrap(command) is what is actually executed."""
+    topological_order(tasks) # validate before starting anything
+    priority = count_dependents(tasks)
+    pending = dict((t.name, t) for t in tasks)
+    done, failed, running = set(), set(), set()
+    results = Queue.Queue()
+    pool = multiprocessing.Pool(jobs or multiprocessing.cpu_count())
+    start = time.time()
+    try:
+        while pending or running:
+            ready = [t for t in pending.values() if all(d in done for d in t.deps)]
+            for t in sorted(ready, key=lambda t: -priority[t.name]):
+                del pending[t.name]
+                running.add(t.name)
+                key = cache.key(t.command, t.inputs, t.params, root=t.cwd) if cache and t.outputs else None
+                command = wrap(t.command) if wrap else t.command
+                pool.apply_async(run_task, (t.name, command, key, t.outputs, cache and cache.directory, t.cwd),
+                                 callback=results.put)
+            if not running:
+                break
+            try:
+                name, returncode, output, duration, cached = results.get(timeout=1.0)
+            except Queue.Empty:
+                continue
+            running.remove(name)
+            status = 'cached' if cached else 'done' if returncode==0 else 'FAILED'
+            print "[%6.1fs] %-28s %s (%.1fs)" % (time.time()-start, name, status, duration)
+            tracing.record_span('pipeline_step', time.time()-duration, duration, status='ok' if returncode==0 else 'error',
+                                figure=name, cached=cached)
+            if returncode==0:
+                done.add(name)
+            else:
+                print output
+                failed.add(name)
+                skipped = skip_dependents(name, pending)
+                if skipped : print "skipping %s" % ' '.join(sorted(skipped))
+                failed |= skipped
+    finally:
+        pool.close()
+        pool.join()
+        if cache : cache.save_hashes()
+    return failed
+
+def run_with_worker(tasks, jobs=None, cache=None):
+    """start a root_worker, route the python steps through it, stop it at the end;
+    the run_all.sh steps find it through ROOT_WORKER_SOCKET"""
+    import root_worker
+    socket_path = root_worker.default_socket()
+    os.environ['ROOT_WORKER_SOCKET'] = socket_path
+    started = root_worker.start(socket_path) is not None
+    client = [os.path.join(os.path.dirname(os.path.abspath(__file__)), 'root_worker.py'), 'call']
+    def wrap(command):
+        return client+command if root_worker.script_name(command[0]) in root_worker.scripts else command
+    try:
+        return run(tasks, jobs=jobs, cache=cache, wrap=wrap)
+    finally:
+        if started : root_worker.stop(socket_path)
+
+def skip_dependents(name, pending):
+    """remove from pending everything downstream of name"""
+    skipped = set()
+    new = set([name])
+    while new:
+        downstream = set(n for n, t in pending.iteritems() if new.intersection(t.deps))
+        for n in downstream:
+            del pending[n]
+        skipped |= downstream
+        new = downstream
+    return skipped
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,185 @@
+#!/bin/env python
+
+# Structured trace of what the scripts do and how long it takes
+#
+# The scripts and the driver record one json line per event in the
+# file named by $HEPDATA_TRACE (nothing is recorded when it is not
+# set): a 'span' for each unit of work (stage, figure, duration,
+# objects/points processed, bytes written, peak RSS of the process,
+# status) and an 'instant' for each message. Several processes can
+# write to the same file (each line is a single O_APPEND write).
+#
+# Messages are still printed; the debug ones (e.g. one line per point)
+# only when $HEPDATA_VERBOSE is set, and callers check verbose()
+# before building them, so that they cost nothing otherwise.
+#
+# Example:
+#   with tracing.span('hepdata_writer', figure='figure_5') as s:
+#       ...
+#       s.add(objects=3, points=n, bytes=size)
+#   tracing.info("processing %s" % fig, figure=fig)
+# > tracing.py summary trace.jsonl                 # where the time goes
+# > tracing.py chrome trace.jsonl -o trace.json    # for chrome://tracing or ui.perfetto.dev
+#
+# Oct 2026
+
+import argparse
+import collections
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+trace_variable = 'HEPDATA_TRACE'
+verbose_variable = 'HEPDATA_VERBOSE'
+
+def main():
+    parser = argparse.ArgumentParser(description='inspect a trace')
+    parser.add_argument('action', choices=['summary', 'chrome'])
+    parser.add_argument('trace', help='json-lines trace file')
+    parser.add_argument('-o', '--output', help='for chrome: output file (default: trace with .json)')
+    parser.add_argument('-n', '--top', type=int, default=10, help='for summary: number of slowest spans listed')
+    args = parser.parse_args()
+    events = read(args.trace)
+    if args.action=='summary':
+        print_summary(events, top=args.top)
+    else:
+        output = args.output or os.path.splitext(args.trace)[0]+'.json'
+        with open(output, 'w') as f:
+            json.dump(to_chrome(events), f)
+        print "written %s" % output
+
+def trace_filename():
+    return os.environ.get(trace_variable)
+
+def verbose():
+    return os.environ.get(verbose_variable, '') not in ('', '0')
+
+def peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def emit(record):
+    filename = trace_filename()
+    if not filename:
+        return
+    record.setdefault('pid', os.getpid())
+    record.setdefault('tid', threading.current_thread().ident)
+    line = json.dumps(record, sort_keys=True) + '\n'
+    fd = os.open(filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+class Span(object):
+    """a timed unit of work; the counters (objects, points, bytes, ...) are summed with add()"""
+    def __init__(self, name, **fields):
+        self.name = name
+        self.fields = fields
+        self.counters = collections.OrderedDict()
+        self.start = None
+    def add(self, **counters):
+        for k, v in counters.iteritems():
+            self.counters[k] = self.counters.get(k, 0) + v
+        return self
+    def __enter__(self):
+        self.start = time.time()
+        return self
+    def __exit__(self, exc_type, exc_value, tb):
+        duration = time.time()-self.start
+        record = {'type': 'span', 'name': self.name, 'ts': self.start, 'duration': duration,
+                  'status': 'ok' if exc_type is None else 'error', 'peak_rss_kb': peak_rss_kb()}
+        if exc_type is not None:
+            record['error'] = "%s: %s" % (exc_type.__name__, exc_value)
+        record.update(self.fields)
+        record.update(self.counters)
+        emit(record)
+        return False
+
+def span(name, **fields):
+    return Span(name, **fields)
+
+def record_span(name, start, duration, status='ok', **fields):
+    """a span measured elsewhere (e.g. by the driver for a subprocess)"""
+    record = {'type': 'span', 'name': name, 'ts': start, 'duration': duration, 'status': status}
+    record.update(fields)
+    emit(record)
+
+def log(message, level='info', **fields):
+    stream = sys.stderr if level in ('warning', 'error') else sys.stdout
+    if level!='debug' or verbose():
+        print >>stream, message
+    record = {'type': 'instant', 'level': level, 'message': message, 'ts': time.time()}
+    record.update(fields)
+    emit(record)
+
+def debug(message, **fields):
+    log(message, 'debug', **fields)
+
+def info(message, **fields):
+    log(message, 'info', **fields)
+
+def warning(message, **fields):
+    log(message, 'warning', **fields)
+
+def error(message, **fields):
+    log(message, 'error', **fields)
+
+#___________________________________________________________
+
+def read(filename):
+    events = []
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                events.append(json.loads(line))
+    return events
+
+counter_names = ['objects', 'points', 'bytes']
+
+def to_chrome(events):
+    """chrome trace event format: complete events for the spans, instant events for the messages"""
+    trace_events = []
+    for e in events:
+        args = dict((k, v) for k, v in e.iteritems() if k not in ('type', 'name', 'ts', 'duration', 'pid', 'tid'))
+        common = {'pid': e.get('pid', 0), 'tid': e.get('tid', 0), 'ts': int(e['ts']*1e6), 'args': args}
+        if e['type']=='span':
+            trace_events.append(dict(common, ph='X', name=e['name'], cat=e.get('stage', e['name']),
+                                     dur=int(e['duration']*1e6)))
+        else:
+            trace_events.append(dict(common, ph='i', s='t', name=e['message'][:80], cat=e.get('level', 'info')))
+    return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+def print_summary(events, top=10):
+    spans = [e for e in events if e['type']=='span']
+    if not spans:
+        print "no spans"
+        return
+    start = min(e['ts'] for e in spans)
+    end = max(e['ts']+e['duration'] for e in spans)
+    print "%d spans over %.1fs" % (len(spans), end-start)
+    by_name = collections.OrderedDict()
+    for e in sorted(spans, key=lambda e: e['ts']):
+        by_name.setdefault(e['name'], []).append(e)
+    print "%-28s %6s %10s %10s %10s %12s %12s %10s" % ('name', 'count', 'total [s]', 'mean [s]', 'max [s]', 'points', 'bytes', 'rss [MB]')
+    for name, group in sorted(by_name.items(), key=lambda kv: -sum(e['duration'] for e in kv[1])):
+        durations = [e['duration'] for e in group]
+        print "%-28s %6d %10.2f %10.3f %10.3f %12d %12d %10.1f" % (
+            name, len(group), sum(durations), sum(durations)/len(group), max(durations),
+            sum(e.get('points', 0) for e in group), sum(e.get('bytes', 0) for e in group),
+            max(e.get('peak_rss_kb', 0) for e in group)/1024.)
+    print "slowest:"
+    for e in sorted(spans, key=lambda e: -e['duration'])[:top]:
+        print "  %8.3fs %-28s %s%s" % (e['duration'], e['name'], e.get('figure', ''),
+                                       '' if e.get('status', 'ok')=='ok' else ' (%s)' % e.get('error', e['status']))
+    errors = [e for e in events if e.get('status')=='error' or e.get('level')=='error']
+    if errors:
+        print "errors:"
+        for e in errors:
+            print "  %s %s" % (e.get('figure', e.get('name', '')), e.get('error', e.get('message', '')))
+
+if __name__=='__main__':
+    main()